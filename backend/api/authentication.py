@@ -1,19 +1,103 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.contrib.auth import get_user_model
 from rest_framework_simplejwt.authentication import JWTAuthentication
-from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
 import logging
 
 logger = logging.getLogger(__name__)
 
+
+class UserCache:
+    """Small in-process LRU of users keyed by id, with a TTL.
+
+    Entries are dropped on user save/delete (see signals.py); the TTL bounds
+    how stale a user changed by another process can be. Callers get a copy,
+    so a view mutating ``request.user`` never touches the cached instance.
+    """
+
+    def __init__(self, max_size=1024, ttl=60):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        # Token claims may carry the id as a string; signals pass the pk.
+        key = str(user_id)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                self._entries.move_to_end(key)
+                return copy.copy(entry[1])
+
+        user = get_user_model().objects.get(**{api_settings.USER_ID_FIELD: user_id})
+        with self._lock:
+            self._entries[key] = (now + self.ttl, user)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return copy.copy(user)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(str(user_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = UserCache()
+
+
 class CookieJWTAuthentication(JWTAuthentication):
+    """Authenticates from the ``access_token`` cookie.
+
+    The token is decoded once per request and the user comes from
+    ``user_cache``. An invalid token leaves the request anonymous and keeps
+    the reason in ``request.auth_error`` for ``cookie_user``.
+    """
+
     def authenticate(self, request):
         access_token = request.COOKIES.get('access_token')
         if not access_token:
-            logger.warning("No access token in cookies")
             return None
         try:
             validated_token = self.get_validated_token(access_token)
             user = self.get_user(validated_token)
             return (user, validated_token)
-        except Exception as e:
-            logger.error(f"Token validation failed: {str(e)}")
-            raise AuthenticationFailed(f'Invalid token: {str(e)}')
\ No newline at end of file
+        except get_user_model().DoesNotExist as e:
+            request.auth_error = e
+            return None
+        except (TokenError, InvalidToken) as e:
+            logger.info(f"Token validation failed: {str(e)}")
+            request.auth_error = TokenError(str(e))
+            return None
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('Token contained no recognizable user identification')
+        user = user_cache.get(user_id)
+        if not user.is_active:
+            raise get_user_model().DoesNotExist('User is inactive')
+        return user
+
+
+def cookie_user(request):
+    """The user authenticated from the request's cookie.
+
+    Raises the token or lookup error instead, so views keep their own
+    401 responses for missing and invalid credentials.
+    """
+    user = request.user
+    if user.is_authenticated:
+        return user
+    raise getattr(request, 'auth_error', None) or TokenError('Token is invalid or expired')
@@ -0,0 +1,61 @@
+import hashlib
+from functools import wraps
+
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from rest_framework_simplejwt.exceptions import TokenError
+
+from .authentication import cookie_user
+from .models import CustomUser, ResourceVersion
+
+
+def conditional(*keys, **cache_control):
+    """Validators and 304s for a GET handler.
+
+    ``keys`` name the ResourceVersion rows the response is built from;
+    callables are given the cookie user's id and make the response per-user
+    (``Vary: Cookie``). The ETag hashes those versions with the full path,
+    so every query string gets its own. Matching ``If-None-Match`` or
+    ``If-Modified-Since`` headers are answered with a 304 before the
+    handler runs. ``cache_control`` goes to ``patch_cache_control``.
+    The versions read are left on ``request.resource_versions`` for
+    handlers that cache parts of the body (see ``cached_count``).
+    Without a valid cookie for a per-user resource the handler runs
+    unchanged and answers for itself.
+    """
+    per_user = any(callable(key) for key in keys)
+
+    def decorator(handler):
+        @wraps(handler)
+        def wrapper(view, request, *args, **kwargs):
+            names = list(keys)
+            if per_user:
+                try:
+                    user = cookie_user(request)
+                except (TokenError, CustomUser.DoesNotExist):
+                    return handler(view, request, *args, **kwargs)
+                names = [key(user.pk) if callable(key) else key for key in names]
+
+            # Read before the handler so a concurrent write can only make
+            # the validators older than the body, never newer.
+            rows = ResourceVersion.current(names)
+            request.resource_versions = {row.key: row.version for row in rows}
+            digest = hashlib.sha256(request.get_full_path().encode())
+            for row in rows:
+                digest.update(f'|{row.key}={row.version}'.encode())
+            etag = quote_etag(digest.hexdigest()[:32])
+            last_modified = int(max(row.updated_at for row in rows).timestamp())
+
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is None:
+                response = handler(view, request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+            response.headers.setdefault('ETag', etag)
+            response.headers.setdefault('Last-Modified', http_date(last_modified))
+            patch_cache_control(response, **cache_control)
+            if per_user:
+                patch_vary_headers(response, ['Cookie'])
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,106 @@
+import asyncio
+import logging
+import threading
+import time
+
+from django.db import close_old_connections, transaction
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = 5
+
+_lock = threading.Lock()
+_subscriptions = {}
+_poller = None
+
+
+class Subscription:
+    """Registers an open notification stream to be woken up when the
+    user's notifications may have changed."""
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.event = asyncio.Event()
+
+    def __enter__(self):
+        with _lock:
+            _subscriptions.setdefault(self.user_id, set()).add(self)
+        _start_poller()
+        return self
+
+    def __exit__(self, *exc_info):
+        with _lock:
+            subscriptions = _subscriptions.get(self.user_id, set())
+            subscriptions.discard(self)
+            if not subscriptions:
+                _subscriptions.pop(self.user_id, None)
+
+    def notify(self):
+        try:
+            self.loop.call_soon_threadsafe(self.event.set)
+        except RuntimeError:
+            pass
+
+    async def wait(self, timeout):
+        """Wait for a notify(); returns False if ``timeout`` passed first."""
+        try:
+            await asyncio.wait_for(self.event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        self.event.clear()
+        return True
+
+
+def publish(user_ids=None):
+    """Wake the streams of ``user_ids`` in this process (all streams for None)."""
+    with _lock:
+        if user_ids is None:
+            targets = [s for subscriptions in _subscriptions.values() for s in subscriptions]
+        else:
+            targets = [s for user_id in user_ids for s in _subscriptions.get(user_id, ())]
+    for subscription in targets:
+        subscription.notify()
+
+
+def publish_on_commit(user_ids=None):
+    user_ids = None if user_ids is None else list(user_ids)
+    transaction.on_commit(lambda: publish(user_ids))
+
+
+def _start_poller():
+    global _poller
+    with _lock:
+        if _poller is None:
+            _poller = threading.Thread(target=_poll, name='notification-poller', daemon=True)
+            _poller.start()
+
+
+def _poll():
+    # Changes made by other worker processes never reach publish() here, so
+    # one thread per process compares the unread counters of every
+    # subscribed user and the newest broadcast id every POLL_INTERVAL.
+    from .models import Broadcast, NotificationCounter
+
+    counters = {}
+    latest_broadcast = None
+    polled = False
+    while True:
+        time.sleep(POLL_INTERVAL)
+        with _lock:
+            user_ids = list(_subscriptions)
+        if not user_ids:
+            continue
+        try:
+            close_old_connections()
+            current = dict(NotificationCounter.objects.filter(pk__in=user_ids).values_list('pk', 'unread'))
+            newest = Broadcast.objects.order_by('-id').values_list('id', flat=True).first()
+        except Exception:
+            logger.exception("Notification poll failed")
+            continue
+
+        if polled and newest != latest_broadcast:
+            publish()
+        else:
+            publish([user_id for user_id, unread in current.items() if counters.get(user_id, unread) != unread])
+        counters, latest_broadcast, polled = current, newest, True
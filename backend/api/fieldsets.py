@@ -0,0 +1,121 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+
+def _split(raw):
+    return {name.strip() for name in (raw or '').split(',') if name.strip()}
+
+
+class Fieldset:
+    """The ``?fields=`` and ``?expand=`` of a request.
+
+    ``fields`` lists the fields to return, with dotted paths for nested
+    ones (``id,date,teacher.name``); a relation with no listed subfields
+    keeps all of them. ``expand`` names the relations to embed. A relation
+    that is neither expanded nor has a listed subfield collapses to its id.
+    """
+
+    def __init__(self, fields=(), expand=()):
+        self.fields = _split(fields) if isinstance(fields, str) else set(fields)
+        self.expand = _split(expand) if isinstance(expand, str) else set(expand)
+
+    @classmethod
+    def from_request(cls, request):
+        params = request.query_params
+        if 'fields' not in params and 'expand' not in params:
+            return None
+        return cls(params.get('fields', ''), params.get('expand', ''))
+
+    def selected(self, path):
+        """Names of the fields to keep under ``path``, or None for all."""
+        prefix = f'{path}.' if path else ''
+        names = {field[len(prefix):].split('.')[0] for field in self.fields if field.startswith(prefix)}
+        return names or None
+
+    def expanded(self, path, name):
+        full = f'{path}.{name}' if path else name
+        return full in self.expand or any(field.startswith(f'{full}.') for field in self.fields)
+
+
+def fieldset_context(request, /, **context):
+    return {**context, 'fieldset': Fieldset.from_request(request)}
+
+
+def _path(serializer):
+    names = []
+    while serializer.parent is not None:
+        if serializer.field_name:
+            names.append(serializer.field_name)
+        serializer = serializer.parent
+    return '.'.join(reversed(names))
+
+
+class FieldsetMixin:
+    """Applies the ``fieldset`` in the serializer context.
+
+    ``Meta.expandable`` maps relations to the serializer they are embedded
+    with. Without a fieldset the declared fields are returned unchanged.
+    ``Meta.field_sources`` names the model columns behind fields that are
+    not columns themselves, for ``select_fields``.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        fieldset = self.context.get('fieldset')
+        if fieldset is None:
+            return fields
+
+        path = _path(self)
+        selected = fieldset.selected(path)
+        if selected is not None:
+            fields = {name: field for name, field in fields.items() if name in selected}
+        for name, serializer_class in getattr(self.Meta, 'expandable', {}).items():
+            if name not in fields:
+                continue
+            if not fieldset.expanded(path, name):
+                fields[name] = serializers.PrimaryKeyRelatedField(read_only=True)
+            elif not isinstance(fields[name], serializers.BaseSerializer):
+                fields[name] = serializer_class(read_only=True)
+        return fields
+
+
+def _columns(serializer, model, prefix, related, columns):
+    """Collect the joins and columns ``serializer`` reads; False when some
+    field cannot be traced to a column."""
+    sources = getattr(serializer.Meta, 'field_sources', {})
+    traced = True
+    columns.append(prefix + model._meta.pk.name)
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if name in sources:
+            columns.extend(prefix + source for source in sources[name])
+            continue
+        try:
+            model_field = model._meta.get_field(field.source_attrs[0])
+        except (FieldDoesNotExist, IndexError):
+            traced = False
+            continue
+        if isinstance(field, serializers.ListSerializer):
+            traced = False
+        elif isinstance(field, serializers.BaseSerializer):
+            related.append(prefix + model_field.name)
+            traced &= _columns(field, model_field.related_model, f'{prefix}{model_field.name}__', related, columns)
+        elif len(field.source_attrs) > 1:
+            traced = False
+        else:
+            columns.append(prefix + model_field.name)
+    return traced
+
+
+def select_fields(queryset, serializer_class, context, extra=()):
+    """``queryset`` joined to the embedded relations only, and loading only
+    the columns the serializer reads plus ``extra`` (e.g. the ordering
+    columns a paginator reads). Falls back to loading every column when a
+    field cannot be traced to one."""
+    related, columns = [], []
+    serializer = serializer_class(context=context)
+    if _columns(serializer, queryset.model, '', related, columns):
+        queryset = queryset.only(*columns, *(name.lstrip('-') for name in extra))
+    # select_related() with no arguments would follow every foreign key.
+    return queryset.select_related(*related) if related else queryset
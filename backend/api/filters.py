@@ -0,0 +1,209 @@
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Q
+from django.db.models.functions import Lower
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .models import Booking, TeacherGrade
+
+TEACHER_ORDERINGS = {
+    'rating': ('-is_top_rated', '-rating_sum', 'id'),
+    'price': ('price_per_session', 'id'),
+    '-price': ('-price_per_session', '-id'),
+    'name': ('name', 'id'),
+    '-name': ('-name', '-id'),
+}
+DEFAULT_TEACHER_ORDERING = ('id',)
+BOOKING_ORDERING = ('-created_at', '-id')
+BOOKING_STATUSES = [value for value, _ in Booking._meta.get_field('status').choices]
+USER_ORDERING = ('-date_joined', '-id')
+
+TRUE_VALUES = {'1', 'true', 'yes'}
+
+
+def _decimal_param(params, name):
+    raw = params.get(name)
+    if raw in (None, ''):
+        return None
+    try:
+        value = Decimal(raw)
+    except InvalidOperation:
+        raise ValidationError({name: 'Must be a number.'})
+    # Decimal also parses NaN and Infinity, which the database cannot compare.
+    if not value.is_finite():
+        raise ValidationError({name: 'Must be a number.'})
+    return value
+
+
+def _int_param(params, name):
+    raw = params.get(name)
+    if raw in (None, ''):
+        return None
+    try:
+        return int(raw)
+    except ValueError:
+        raise ValidationError({name: 'Must be an integer.'})
+
+
+def _date_param(params, name):
+    raw = params.get(name)
+    if raw in (None, ''):
+        return None
+    try:
+        return date.fromisoformat(raw)
+    except ValueError:
+        raise ValidationError({name: "Must be in 'YYYY-MM-DD' format."})
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _prefix(field, prefix):
+    # LIKE 'x%' only uses an index for case-sensitive matches on SQLite, so
+    # prefixes are matched as a range over the indexed expression instead.
+    return Q(**{f'{field}__gte': prefix, f'{field}__lt': prefix + '\U0010ffff'})
+
+
+def filter_teachers(queryset, params):
+    status = params.get('status', 'active')
+    if status != 'all':
+        queryset = queryset.filter(status=status)
+
+    governorate = params.get('governorate')
+    if governorate:
+        queryset = queryset.filter(governorate=governorate)
+
+    subject = params.get('subject')
+    if subject:
+        queryset = queryset.filter(subject=subject)
+
+    grade = params.get('grade')
+    if grade:
+        grades = TeacherGrade.objects.filter(grade=grade)
+        if subject:
+            grades = grades.filter(subject=subject)
+        if governorate:
+            grades = grades.filter(governorate=governorate)
+        queryset = queryset.filter(pk__in=grades.values('teacher_id'))
+
+    min_price = _decimal_param(params, 'min_price')
+    if min_price is not None:
+        queryset = queryset.filter(price_per_session__gte=min_price)
+
+    max_price = _decimal_param(params, 'max_price')
+    if max_price is not None:
+        queryset = queryset.filter(price_per_session__lte=max_price)
+
+    if params.get('top_rated', '').lower() in TRUE_VALUES:
+        queryset = queryset.filter(is_top_rated=True)
+
+    search = params.get('q', '').strip()
+    if search:
+        queryset = queryset.filter(Q(name__icontains=search) | Q(subject__icontains=search))
+
+    return queryset
+
+
+def teacher_ordering(params):
+    sort = params.get('sort')
+    if not sort:
+        return DEFAULT_TEACHER_ORDERING
+    if sort not in TEACHER_ORDERINGS:
+        raise ValidationError({'sort': f'Must be one of: {", ".join(TEACHER_ORDERINGS)}.'})
+    return TEACHER_ORDERINGS[sort]
+
+
+def filter_bookings(queryset, params):
+    status = params.get('status')
+    if status and status != 'all':
+        statuses = status.split(',')
+        if not set(statuses) <= set(BOOKING_STATUSES):
+            raise ValidationError({'status': f'Must be one of: {", ".join(BOOKING_STATUSES)}.'})
+        queryset = queryset.filter(status__in=statuses)
+
+    teacher = _int_param(params, 'teacher')
+    if teacher is not None:
+        queryset = queryset.filter(teacher_id=teacher)
+
+    user = _int_param(params, 'user')
+    if user is not None:
+        queryset = queryset.filter(user_id=user)
+
+    date_from = _date_param(params, 'date_from')
+    if date_from:
+        queryset = queryset.filter(date__gte=date_from)
+
+    date_to = _date_param(params, 'date_to')
+    if date_to:
+        queryset = queryset.filter(date__lte=date_to)
+
+    search = params.get('q', '').strip()
+    if search:
+        queryset = queryset.filter(
+            Q(user__first_name__icontains=search)
+            | Q(user__last_name__icontains=search)
+            | Q(user__username__icontains=search)
+            | Q(teacher__name__icontains=search)
+        )
+
+    return queryset
+
+
+def filter_notifications(queryset, params):
+    user = _int_param(params, 'user')
+    if user is not None:
+        queryset = queryset.filter(user_id=user)
+
+    is_read = params.get('is_read')
+    if is_read:
+        queryset = queryset.filter(is_read=is_read.lower() in TRUE_VALUES)
+
+    return queryset
+
+
+def search_users(queryset, search):
+    """Case-insensitive prefix match on username, email, name or phone
+    number. "first last" matches the first name exactly and the last name
+    by prefix."""
+    prefix = search.lower()
+    queryset = queryset.alias(
+        username_lower=Lower('username'),
+        email_lower=Lower('email'),
+        first_name_lower=Lower('first_name'),
+        last_name_lower=Lower('last_name'),
+    )
+    condition = (
+        _prefix('username_lower', prefix)
+        | _prefix('email_lower', prefix)
+        | _prefix('first_name_lower', prefix)
+        | _prefix('last_name_lower', prefix)
+    )
+    first, _, last = prefix.partition(' ')
+    if last.strip():
+        condition |= Q(first_name_lower=first) & _prefix('last_name_lower', last.strip())
+    if prefix.isdigit():
+        condition |= _prefix('phone_number', prefix)
+    return queryset.filter(condition)
+
+
+def filter_users(queryset, params):
+    is_staff = params.get('is_staff')
+    if is_staff:
+        queryset = queryset.filter(is_staff=is_staff.lower() in TRUE_VALUES)
+
+    for field, name in (('date_joined', 'joined'), ('last_activity', 'active')):
+        start = _date_param(params, f'{name}_from')
+        if start:
+            queryset = queryset.filter(**{f'{field}__gte': _day_start(start)})
+        end = _date_param(params, f'{name}_to')
+        if end:
+            queryset = queryset.filter(**{f'{field}__lt': _day_start(end + timedelta(days=1))})
+
+    search = params.get('q', '').strip()
+    if search:
+        queryset = search_users(queryset, search)
+
+    return queryset
@@ -0,0 +1,302 @@
+import json
+import logging
+import math
+import platform
+import subprocess
+import time
+from collections import Counter
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import URLPattern
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api import urls as api_urls
+from api.authentication import user_cache
+from api.middleware import QueryStats
+from api.models import Booking, CustomUser, Notification, PasswordResetToken, Teacher, TeacherSlot
+from api.utils.activity import activity_buffer
+from api.utils.synthetic import PASSWORD, SyntheticData
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[max(math.ceil(pct / 100 * len(ordered)), 1) - 1]
+
+
+class Dataset:
+    """The seeded synthetic data plus the rows the cases are aimed at."""
+
+    def __init__(self, seed, **scale):
+        data = SyntheticData(seed=seed, **scale).load()
+        self.admin = data.admin
+        self.users = data.user_ids
+        self.teachers = data.teacher_ids
+        self.student = CustomUser.objects.get(pk=data.user_ids[0])
+        self.booking = Booking.objects.filter(user=self.student).order_by('id').first()
+        slot = TeacherSlot.objects.filter(date__gt=timezone.localdate(), teacher__status='active').select_related(
+            'teacher'
+        ).order_by('teacher_id', 'date', 'start_time').first()
+        self.teacher = slot.teacher
+        self.slot = (slot.date, slot.time, slot.place)
+
+    def spare_user(self, label):
+        return CustomUser.objects.create(
+            username=f'spare_{label}', email=f'spare_{label}@example.com', password=self.admin.password,
+            first_name='Spare', last_name='Bench',
+        )
+
+    def spare_teacher(self, i):
+        return Teacher.objects.create(name=f'Spare Teacher {i}', governorate='Cairo', subject='Mathematics')
+
+
+class Case:
+    """One benchmarked request.
+
+    ``path``, ``data`` and ``user`` may be callables of the iteration
+    number; they are evaluated before the timed request, so they can set
+    up the rows a destructive request consumes.
+    """
+
+    def __init__(self, name, method, path, data=None, user='student'):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.data = data
+        self.user = user
+
+    @property
+    def route(self):
+        # Case names are the URL name, optionally followed by ":variant".
+        return self.name.split(':')[0]
+
+    def resolve(self, value, i):
+        return value(i) if callable(value) else value
+
+
+def build_cases(ds):
+    teacher = ds.teacher
+    slot_date, slot_time, place = ds.slot
+    booking_ids = list(Booking.objects.filter(teacher=teacher).values_list('id', flat=True)[:5])
+
+    def reset_password(i):
+        token = PasswordResetToken.objects.create(user_id=ds.users[-1])
+        return {'token': str(token.token), 'new_password': f'Bench#Reset{i}'}
+
+    def notification_path(i):
+        notification = Notification.objects.create(user=ds.student, title='Bench', message='Bench')
+        return f'/api/notifications/delete/{notification.pk}/'
+
+    return [
+        # Synthetic users number their phones from 0, so these start far above.
+        Case('register', 'POST', '/api/register/', user=None, data=lambda i: {
+            'first_name': 'Bench', 'last_name': f'User{i}', 'email': f'register{i}@example.com',
+            'phone_number': f'015{90000000 + i:08d}', 'password': PASSWORD,
+        }),
+        Case('login', 'POST', '/api/login/', user=None, data={'email': ds.student.email, 'password': PASSWORD}),
+        Case('forgot_password', 'POST', '/api/forgot-password/', user=None, data={'email': ds.student.email}),
+        Case('reset_password', 'POST', '/api/reset-password/', user=None, data=reset_password),
+        Case('auth-check', 'GET', '/api/auth/check/'),
+        Case('logout', 'POST', '/api/auth/logout/'),
+        Case('token-refresh', 'POST', '/api/auth/refresh/'),
+        Case('teachers-list', 'GET', '/api/teachers/'),
+        Case('teachers-list:page', 'GET', '/api/teachers/?page_size=20'),
+        Case('teachers-list:fields', 'GET', '/api/teachers/?fields=id,name,subject,rating'),
+        Case('teacher-search', 'GET', f'/api/teachers/search/?q={teacher.subject}'),
+        Case('teacher-detail', 'GET', f'/api/teachers/{teacher.pk}/'),
+        Case('teacher-detail:patch', 'PATCH', f'/api/teachers/{teacher.pk}/', user='admin',
+             data={'price_per_session': '300.00'}),
+        Case('teacher-detail:delete', 'DELETE', lambda i: f'/api/teachers/{ds.spare_teacher(i).pk}/', user='admin'),
+        Case('ratings', 'GET', '/api/ratings/'),
+        Case('ratings:post', 'POST', '/api/ratings/', data=lambda i: {
+            'teacher': ds.teachers[i % len(ds.teachers)], 'rating': 4,
+        }),
+        Case('bookings', 'GET', '/api/bookings/'),
+        Case('bookings:fields', 'GET', '/api/bookings/?fields=id,date,time,place,status,subject,teacher.name'),
+        Case('bookings:post', 'POST', '/api/bookings/', user=lambda i: ds.spare_user(f'booking{i}'), data={
+            'teacher_id': teacher.pk, 'subject': teacher.subject, 'date': slot_date.isoformat(),
+            'time': slot_time, 'place': place,
+        }),
+        Case('booking-detail', 'PATCH', f'/api/bookings/{ds.booking.pk}/', data={'action': 'close_popup'}),
+        Case('rated-teachers', 'GET', '/api/rated-teachers/'),
+        Case('rated-teachers:post', 'POST', '/api/rated-teachers/', user=lambda i: ds.spare_user(f'rated{i}'),
+             data={'teacher': teacher.pk}),
+        Case('profile', 'GET', '/api/profile/'),
+        Case('profile:put', 'PUT', '/api/profile/', data={'bio': 'Benchmark student'}),
+        Case('settings', 'GET', '/api/settings/'),
+        Case('settings:put', 'PUT', '/api/settings/', user=lambda i: ds.spare_user(f'settings{i}'), data=lambda i: {
+            'bio': 'Benchmark student', 'password': f'Bench#New{i}',
+        }),
+        Case('settings:delete', 'DELETE', '/api/settings/', user=lambda i: ds.spare_user(f'deleted{i}')),
+        Case('check-schedule-changes', 'POST', f'/api/teachers/{teacher.pk}/check-schedule-changes/', user='admin',
+             data={
+                 'old_schedule': teacher.schedule, 'new_schedule': teacher.schedule,
+                 'new_slot': {'date': slot_date.isoformat(), 'time': slot_time, 'place': place},
+             }),
+        Case('notify-students', 'POST', f'/api/teachers/{teacher.pk}/notify-students/', user='admin', data={
+            'booking_ids': booking_ids, 'message': 'Benchmark',
+            'new_slot': {'date': slot_date.isoformat(), 'time': slot_time, 'place': place},
+        }),
+        Case('notification-list', 'GET', '/api/notifications/'),
+        Case('notification-list:page', 'GET', '/api/notifications/?page_size=20'),
+        Case('unread-count', 'GET', '/api/notifications/unread-count/'),
+        Case('notification-stream', 'GET', '/api/notifications/stream/'),
+        Case('create-notification', 'POST', '/api/notifications/create/', user='admin', data={
+            'title': 'Benchmark', 'message': 'Benchmark', 'user_id': ds.student.pk,
+        }),
+        Case('create-notification:all', 'POST', '/api/notifications/create/', user='admin', data={
+            'title': 'Benchmark', 'message': 'Benchmark', 'send_to_all': True,
+        }),
+        Case('mark-notifications-read', 'POST', '/api/notifications/mark-read/', data={}),
+        Case('delete-notification', 'DELETE', notification_path),
+        Case('all-bookings', 'GET', '/api/bookings/all/', user='admin'),
+        Case('bookings-by-slot', 'GET', (
+            f'/api/teachers/{teacher.pk}/bookings-by-slot/'
+            f'?date={slot_date.isoformat()}&time={slot_time}&place={place}'
+        )),
+        Case('available-slots', 'GET', f'/api/slots/?date={slot_date.isoformat()}'),
+        Case('user-detail', 'DELETE', lambda i: f'/api/users/{ds.spare_user(f"removed{i}").pk}/', user='admin'),
+        Case('all-users', 'GET', '/api/users/all/', user='admin'),
+        Case('all-users:search', 'GET', '/api/users/all/?q=student1&is_staff=false', user='admin'),
+        Case('admin-export', 'GET', '/api/admin/export/bookings.csv', user='admin'),
+        Case('admin-export:ndjson', 'GET', '/api/admin/export/notifications.ndjson', user='admin'),
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        'Builds a throwaway database at the given scale, drives every API route through the test client '
+        'and reports latency percentiles, query counts and response sizes as JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--teachers', type=int, default=200)
+        parser.add_argument('--users', type=int, default=2000)
+        parser.add_argument('--bookings', type=int, default=10000)
+        parser.add_argument('--ratings', type=int, default=2000)
+        parser.add_argument('--notifications', type=int, default=10000)
+        parser.add_argument('--days', type=int, default=28, help='Days of schedule per teacher, centred on today')
+        parser.add_argument('--iterations', type=int, default=30)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--only', nargs='+', help='Route or case names to run')
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError('--iterations must be at least 1.')
+
+        scale = {key: options[key] for key in ('teachers', 'users', 'bookings', 'ratings', 'notifications', 'days')}
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            started = time.perf_counter()
+            ds = Dataset(options['seed'], **scale)
+            self.stderr.write(f'Built dataset in {time.perf_counter() - started:.1f}s.')
+            # Error responses are counted in the report instead of logged.
+            logging.disable(logging.WARNING)
+            report = self.run(ds, options)
+        finally:
+            logging.disable(logging.NOTSET)
+            # Pending activity and cached users belong to the throwaway
+            # database; neither may reach the real one.
+            activity_buffer.flush()
+            user_cache.clear()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        report['meta'] = {
+            'commit': self.git_commit(),
+            'scale': scale,
+            'iterations': options['iterations'],
+            'warmup': options['warmup'],
+            'seed': options['seed'],
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+        }
+        output = json.dumps(report, indent=2, sort_keys=True)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                f.write(output + '\n')
+            self.stderr.write(self.style.SUCCESS(f'Wrote {options["output"]}.'))
+        else:
+            self.stdout.write(output)
+
+    def run(self, ds, options):
+        tokens = {}
+
+        def client_for(user):
+            client = Client(raise_request_exception=False)
+            if user is not None:
+                if user.pk not in tokens:
+                    refresh = RefreshToken.for_user(user)
+                    tokens[user.pk] = (str(refresh.access_token), str(refresh))
+                client.cookies['access_token'], client.cookies['refresh_token'] = tokens[user.pk]
+            return client
+
+        users = {'student': ds.student, 'admin': ds.admin, None: None}
+        cases = build_cases(ds)
+        only = set(options['only'] or ())
+        endpoints = [
+            self.measure(case, users, client_for, options)
+            for case in cases
+            if not only or case.name in only or case.route in only
+        ]
+        routes = {p.name for p in api_urls.urlpatterns if isinstance(p, URLPattern) and p.name}
+        return {'endpoints': endpoints, 'uncovered': sorted(routes - {case.route for case in cases})}
+
+    def measure(self, case, users, client_for, options):
+        latencies, queries, sizes, statuses = [], [], [], Counter()
+        path = None
+        for i in range(options['warmup'] + options['iterations']):
+            path = case.resolve(case.path, i)
+            data = case.resolve(case.data, i)
+            user = case.resolve(case.user, i)
+            client = client_for(users[user] if isinstance(user, str) or user is None else user)
+            kwargs = {'data': json.dumps(data), 'content_type': 'application/json'} if data is not None else {}
+
+            # QueryStats counts through an execute_wrapper, so unlike the
+            # debug query log it has no cap on queries per request.
+            stats = QueryStats(slow_ms=float('inf'))
+            with connection.execute_wrapper(stats):
+                start = time.perf_counter()
+                response = client.generic(case.method, path, **kwargs)
+                body = response.getvalue()
+                elapsed = (time.perf_counter() - start) * 1000
+            if i < options['warmup']:
+                continue
+            latencies.append(elapsed)
+            queries.append(stats.count)
+            sizes.append(len(body))
+            statuses[str(response.status_code)] += 1
+
+        self.stderr.write(f'{case.name}: p50 {percentile(latencies, 50):.1f}ms, {percentile(queries, 50)} queries')
+        return {
+            'name': case.name,
+            'route': case.route,
+            'method': case.method,
+            'path': path,
+            'status': dict(statuses),
+            'latency_ms': {
+                'p50': round(percentile(latencies, 50), 3),
+                'p95': round(percentile(latencies, 95), 3),
+                'p99': round(percentile(latencies, 99), 3),
+                'mean': round(sum(latencies) / len(latencies), 3),
+                'max': round(max(latencies), 3),
+            },
+            'queries': {'p50': percentile(queries, 50), 'max': max(queries)},
+            'bytes': {'p50': percentile(sizes, 50), 'max': max(sizes)},
+        }
+
+    def git_commit(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
@@ -0,0 +1,142 @@
+import json
+import logging
+import platform
+import time
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from rest_framework.renderers import JSONRenderer
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api import renderers
+from api.authentication import user_cache
+from api.utils.activity import activity_buffer
+
+from .bench_api import Dataset, build_cases, percentile
+
+
+class Command(BaseCommand):
+    help = (
+        'Builds a throwaway database at the given scale and, for every GET route, reports the response size '
+        'with and without gzip and the render time of the stdlib and the fast JSON renderer as JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--teachers', type=int, default=200)
+        parser.add_argument('--users', type=int, default=2000)
+        parser.add_argument('--bookings', type=int, default=10000)
+        parser.add_argument('--ratings', type=int, default=2000)
+        parser.add_argument('--notifications', type=int, default=10000)
+        parser.add_argument('--days', type=int, default=28, help='Days of schedule per teacher, centred on today')
+        parser.add_argument('--iterations', type=int, default=30)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--only', nargs='+', help='Route or case names to run')
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError('--iterations must be at least 1.')
+
+        scale = {key: options[key] for key in ('teachers', 'users', 'bookings', 'ratings', 'notifications', 'days')}
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            started = time.perf_counter()
+            ds = Dataset(options['seed'], **scale)
+            self.stderr.write(f'Built dataset in {time.perf_counter() - started:.1f}s.')
+            logging.disable(logging.WARNING)
+            report = self.run(ds, options)
+        finally:
+            logging.disable(logging.NOTSET)
+            activity_buffer.flush()
+            user_cache.clear()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        report['meta'] = {
+            'scale': scale,
+            'iterations': options['iterations'],
+            'warmup': options['warmup'],
+            'seed': options['seed'],
+            'orjson': renderers.orjson.__version__ if renderers.orjson else None,
+            'compression_min_length': getattr(settings, 'COMPRESSION_MIN_LENGTH', None),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+        }
+        output = json.dumps(report, indent=2, sort_keys=True)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                f.write(output + '\n')
+            self.stderr.write(self.style.SUCCESS(f'Wrote {options["output"]}.'))
+        else:
+            self.stdout.write(output)
+
+    def run(self, ds, options):
+        tokens = {}
+        for name, user in (('student', ds.student), ('admin', ds.admin)):
+            refresh = RefreshToken.for_user(user)
+            tokens[name] = (str(refresh.access_token), str(refresh))
+
+        def client_for(name):
+            # A fresh client per request: some responses delete the cookies.
+            client = Client(raise_request_exception=False)
+            if name is not None:
+                client.cookies['access_token'], client.cookies['refresh_token'] = tokens[name]
+            return client
+
+        only = set(options['only'] or ())
+        endpoints = [
+            self.measure(case, client_for, options)
+            for case in build_cases(ds)
+            # Only the read-only cases: the others need a fresh row per request.
+            if case.method == 'GET' and isinstance(case.user, str | None) and not callable(case.path)
+            and (not only or case.name in only or case.route in only)
+        ]
+        totals = {
+            key: sum(endpoint['bytes'][key] for endpoint in endpoints) for key in ('identity', 'gzip')
+        }
+        rendered = [endpoint['render_ms'] for endpoint in endpoints if endpoint['render_ms']]
+        totals['render_ms'] = {
+            key: round(sum(render[key] for render in rendered), 3) for key in ('stdlib', 'fast')
+        }
+        return {'endpoints': endpoints, 'totals': totals}
+
+    def measure(self, case, client_for, options):
+        identity = client_for(case.user).get(case.path)
+        compressed = client_for(case.user).get(case.path, HTTP_ACCEPT_ENCODING='gzip')
+        result = {
+            'name': case.name,
+            'path': case.path,
+            'status': identity.status_code,
+            'content_type': identity.get('Content-Type'),
+            'bytes': {'identity': len(identity.getvalue()), 'gzip': len(compressed.getvalue())},
+            'content_encoding': compressed.get('Content-Encoding'),
+            'render_ms': None,
+        }
+        # Streamed and non-DRF responses have no data to render again.
+        data = getattr(identity, 'data', None)
+        if data is not None:
+            result['render_ms'] = {
+                'stdlib': self.time_render(JSONRenderer(), data, options),
+                'fast': self.time_render(renderers.FastJSONRenderer(), data, options),
+            }
+        self.stderr.write(
+            f'{case.name}: {result["bytes"]["identity"]} -> {result["bytes"]["gzip"]} bytes'
+            + (f', render {result["render_ms"]["stdlib"]} -> {result["render_ms"]["fast"]}ms'
+               if result['render_ms'] else '')
+        )
+        return result
+
+    def time_render(self, renderer, data, options):
+        timings = []
+        for i in range(options['warmup'] + options['iterations']):
+            start = time.perf_counter()
+            renderer.render(data, 'application/json', {})
+            if i >= options['warmup']:
+                timings.append((time.perf_counter() - start) * 1000)
+        return round(percentile(timings, 50), 3)
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from api.models import CustomUser, Teacher
+from api.utils.images import build_derivatives, derivatives_field
+
+IMAGES = ((Teacher, 'image'), (CustomUser, 'profile_picture'))
+
+
+class Command(BaseCommand):
+    help = 'Builds the missing thumbnail and card images of teacher images and profile pictures'
+
+    def handle(self, *args, **options):
+        for model, field_name in IMAGES:
+            built = failed = 0
+            rows = model.objects.exclude(**{field_name: ''}).exclude(**{f'{field_name}__isnull': True})
+            for pk, image, derivatives in rows.values_list('pk', field_name, derivatives_field(field_name)):
+                if derivatives.get('source') == image:
+                    continue
+                try:
+                    built += build_derivatives(model, pk, field_name)
+                except Exception as exc:
+                    failed += 1
+                    self.stderr.write(f'{model.__name__} {pk}: {exc}')
+            self.stdout.write(self.style.SUCCESS(
+                f'{model.__name__}.{field_name}: built {built}, failed {failed}.'
+            ))
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+from api.utils.email_utils import MAX_ATTEMPTS, deliver_outbox
+
+
+class Command(BaseCommand):
+    help = 'Delivers queued EmailOutbox rows in batches over a single mail connection'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--max-attempts', type=int, default=MAX_ATTEMPTS)
+        parser.add_argument('--loop', action='store_true', help='Keep polling for new messages')
+        parser.add_argument('--interval', type=float, default=5.0, help='Seconds to sleep when the outbox is empty')
+
+    def handle(self, *args, **options):
+        totals = [0, 0, 0]
+        while True:
+            counts = deliver_outbox(options['batch_size'], options['max_attempts'])
+            totals = [total + count for total, count in zip(totals, counts)]
+            if any(counts):
+                self.stdout.write(f'Sent {counts[0]}, retrying {counts[1]}, failed {counts[2]}.')
+            if sum(counts) == options['batch_size']:
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Outbox drained: {totals[0]} sent, {totals[1]} scheduled for retry, {totals[2]} failed.'
+        ))
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Sum
+from api.models import Rating, ResourceVersion, Teacher
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the denormalized rating_sum/rating_count/rating_avg columns on Teacher from Rating'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        totals = {
+            row['teacher_id']: (row['total'] or 0.0, row['count'])
+            for row in Rating.objects.values('teacher_id').annotate(total=Sum('rating'), count=Count('id'))
+        }
+
+        changed = []
+        with transaction.atomic():
+            teachers = Teacher.objects.only(
+                'id', 'rating_sum', 'rating_count', 'rating_avg', 'is_top_rated', 'manually_set_top_rated'
+            )
+            for teacher in teachers.iterator(chunk_size=batch_size):
+                total, count = totals.get(teacher.pk, (0.0, 0))
+                before = (teacher.rating_sum, teacher.rating_count, teacher.is_top_rated)
+                teacher.rating_sum = total
+                teacher.rating_count = count
+                teacher.rating_avg = total / count if count else 0.0
+                teacher.sync_top_rated()
+                if before != (teacher.rating_sum, teacher.rating_count, teacher.is_top_rated):
+                    changed.append(teacher)
+            Teacher.objects.bulk_update(
+                changed, ['rating_sum', 'rating_count', 'rating_avg', 'is_top_rated'], batch_size=batch_size
+            )
+            if changed:
+                ResourceVersion.bump(ResourceVersion.TEACHERS)
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt rating aggregates: {len(changed)} teachers updated.'))
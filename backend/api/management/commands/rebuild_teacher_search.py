@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from api import search
+from api.models import Teacher
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the FTS5 teacher search index from the Teacher table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if not search.fts_enabled():
+            self.stdout.write(self.style.WARNING('Full-text search needs SQLite FTS5; nothing to rebuild.'))
+            return
+        search.create_index(connection)
+        total = search.rebuild_index(Teacher.objects.all(), batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Indexed {total} teachers.'))
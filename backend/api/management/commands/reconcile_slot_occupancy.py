@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Q
+from api.models import ACTIVE_BOOKING_STATUSES, Booking, SlotOccupancy
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the SlotOccupancy counters from the Booking table'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            totals = Booking.objects.values('teacher_id', 'date', 'time', 'place').annotate(
+                confirmed=Count('id', filter=Q(status__in=ACTIVE_BOOKING_STATUSES)),
+                pending=Count('id', filter=Q(status='pending')),
+            )
+            expected = {
+                (row['teacher_id'], row['date'], row['time'], row['place']): (row['confirmed'], row['pending'])
+                for row in totals
+            }
+            current = {
+                (row.teacher_id, row.date, row.time, row.place): (row.confirmed_count, row.pending_count)
+                for row in SlotOccupancy.objects.all()
+            }
+            drifted = sum(1 for key in expected.keys() | current.keys() if expected.get(key) != current.get(key))
+
+            SlotOccupancy.objects.all().delete()
+            SlotOccupancy.objects.bulk_create([
+                SlotOccupancy(
+                    teacher_id=teacher_id,
+                    date=date,
+                    time=time,
+                    place=place,
+                    confirmed_count=confirmed,
+                    pending_count=pending,
+                )
+                for (teacher_id, date, time, place), (confirmed, pending) in expected.items()
+            ], batch_size=1000)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt occupancy for {len(expected)} slots ({drifted} were out of sync).'
+        ))
@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from api.models import Booking, CustomUser, Teacher
+from api.utils.synthetic import PASSWORD, SyntheticData
+
+
+class Command(BaseCommand):
+    help = 'Generates a deterministic production-sized dataset (users, teachers, bookings, ratings, notifications)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100_000)
+        parser.add_argument('--teachers', type=int, default=10_000)
+        parser.add_argument('--bookings', type=int, default=2_000_000)
+        parser.add_argument('--ratings', type=int, default=200_000)
+        parser.add_argument('--notifications', type=int, default=1_000_000)
+        parser.add_argument('--days', type=int, default=28, help='Days of schedule per teacher, centred on today')
+        parser.add_argument('--scale', type=float, default=1.0, help='Multiplier applied to every row count')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        if any(model.objects.exists() for model in (CustomUser, Teacher, Booking)):
+            raise CommandError('The database already has data; run "manage.py flush" first.')
+
+        counts = {
+            key: int(options[key] * options['scale'])
+            for key in ('users', 'teachers', 'bookings', 'ratings', 'notifications')
+        }
+        started = time.perf_counter()
+        SyntheticData(
+            seed=options['seed'],
+            days=options['days'],
+            batch_size=options['batch_size'],
+            log=self.stdout.write,
+            **counts,
+        ).load()
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded in {time.perf_counter() - started:.1f}s. '
+            f'Log in as admin@example.com or studentN@example.com with password {PASSWORD}.'
+        ))
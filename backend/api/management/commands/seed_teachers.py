@@ -1,5 +1,8 @@
 # api/management/commands/seed_teachers.py
+from datetime import timedelta
+
 from django.core.management.base import BaseCommand
+from django.utils import timezone
 from api.models import Teacher
 
 class Command(BaseCommand):
@@ -70,6 +73,11 @@ class Command(BaseCommand):
         Teacher.objects.all().delete()
         self.stdout.write(self.style.WARNING('Deleted all existing teachers.'))
 
+        # The daily "time -> place" plans are repeated over the next week in
+        # the dated shape bookings are validated against.
+        today = timezone.localdate()
+        dates = [(today + timedelta(days=offset)).isoformat() for offset in range(1, 8)]
+
         # إضافة المعلمين
         for teacher_data in teachers_data["teachers"]:
             teacher = Teacher.objects.create(
@@ -79,10 +87,12 @@ class Command(BaseCommand):
                 subject=teacher_data["subject"],
                 price_per_session=teacher_data["price_per_session"],
                 max_students_per_group=teacher_data["max_students_per_group"],
-                schedule=teacher_data["schedule"],
+                schedule={date: teacher_data["schedule"] for date in dates},
                 promotional_videos=teacher_data["promotional_videos"],
                 image=teacher_data["image"]
             )
+            teacher.sync_grades()
+            teacher.sync_slots()
             self.stdout.write(self.style.SUCCESS(f'Added teacher: {teacher.name}'))
 
         # التحقق من عدد السجلات
@@ -0,0 +1,107 @@
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.middleware.gzip import GZipMiddleware
+
+logger = logging.getLogger('api.sql')
+
+_IN_LIST = re.compile(r'\(\s*%s(?:\s*,\s*%s)*\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def query_shape(sql):
+    """SQL with IN (...) lists collapsed, so the same query with a
+    different number of ids counts as one shape."""
+    return _WHITESPACE.sub(' ', _IN_LIST.sub('(%s, ...)', sql)).strip()
+
+
+class QueryStats:
+    def __init__(self, slow_ms):
+        self.slow_ms = slow_ms
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+        self.slow = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            self.count += 1
+            self.duration += elapsed
+            self.shapes[query_shape(sql)] += 1
+            if elapsed >= self.slow_ms:
+                self.slow.append((elapsed, sql, params))
+
+    def repeated(self, threshold):
+        return [(shape, count) for shape, count in self.shapes.most_common() if count > threshold]
+
+
+class QueryInstrumentationMiddleware:
+    """Counts the queries each request runs.
+
+    Enabled with ``SQL_INSTRUMENTATION = True``; otherwise Django drops it
+    at startup. Adds a ``Server-Timing: db`` header and logs to ``api.sql``:
+    one line per request, a warning for every query shape run more than
+    ``SQL_N_PLUS_ONE_THRESHOLD`` times, and every query slower than
+    ``SQL_SLOW_QUERY_MS``. It is sync-only so the wrapper sits on the
+    connection of the thread the view runs in, under WSGI and ASGI alike.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'SQL_INSTRUMENTATION', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.threshold = getattr(settings, 'SQL_N_PLUS_ONE_THRESHOLD', 10)
+        self.slow_ms = getattr(settings, 'SQL_SLOW_QUERY_MS', 100)
+
+    def __call__(self, request):
+        stats = QueryStats(self.slow_ms)
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(stats))
+            response = self.get_response(request)
+
+        self.report(request, response, stats)
+        return response
+
+    def report(self, request, response, stats):
+        repeated = stats.repeated(self.threshold)
+        response['Server-Timing'] = f'db;dur={stats.duration:.1f};desc="{stats.count} queries"'
+        logger.info(
+            f'{request.method} {request.path} {response.status_code}: '
+            f'{stats.count} queries in {stats.duration:.1f}ms'
+        )
+        for shape, count in repeated:
+            logger.warning(f'Possible N+1 on {request.method} {request.path}: {count}x {shape}')
+        for elapsed, sql, params in stats.slow:
+            logger.warning(f'Slow query ({elapsed:.1f}ms) on {request.method} {request.path}: {sql} {params}')
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """GZipMiddleware with a configurable size threshold.
+
+    Bodies shorter than ``COMPRESSION_MIN_LENGTH`` bytes are sent as they
+    are: below about one packet gzip costs CPU and saves no round trip.
+    Event streams are never compressed, as gzip would hold every event in
+    its buffer instead of sending it.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.min_length = getattr(settings, 'COMPRESSION_MIN_LENGTH', 1024)
+
+    def process_response(self, request, response):
+        if response.get('Content-Type', '').startswith('text/event-stream'):
+            return response
+        if not response.streaming and len(response.content) < self.min_length:
+            return response
+        return super().process_response(request, response)
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:48
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_rating_aggregates(apps, schema_editor):
+    Teacher = apps.get_model('api', 'Teacher')
+    Rating = apps.get_model('api', 'Rating')
+    totals = {
+        row['teacher_id']: row
+        for row in Rating.objects.values('teacher_id').annotate(total=Sum('rating'), count=Count('id'))
+    }
+    teachers = []
+    for teacher in Teacher.objects.filter(pk__in=totals.keys()):
+        row = totals[teacher.pk]
+        teacher.rating_sum = row['total'] or 0.0
+        teacher.rating_count = row['count']
+        teacher.rating_avg = teacher.rating_sum / teacher.rating_count
+        if not teacher.manually_set_top_rated:
+            teacher.is_top_rated = round(teacher.rating_sum, 1) >= 5.0
+        teachers.append(teacher)
+    Teacher.objects.bulk_update(
+        teachers, ['rating_sum', 'rating_count', 'rating_avg', 'is_top_rated'], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0060_teacher_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='teacher',
+            name='rating_avg',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.AddField(
+            model_name='teacher',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='teacher',
+            name='rating_sum',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.RunPython(backfill_rating_aggregates, migrations.RunPython.noop),
+    ]
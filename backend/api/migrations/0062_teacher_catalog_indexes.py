@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0061_teacher_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='teacher',
+            index=models.Index(fields=['status', 'governorate', 'subject'], name='teacher_status_location_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='teacher',
+            index=models.Index(fields=['status', 'price_per_session', 'id'], name='teacher_status_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='teacher',
+            index=models.Index(fields=['status', '-is_top_rated', '-rating_sum', 'id'], name='teacher_status_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='teacher',
+            index=models.Index(fields=['status', 'name', 'id'], name='teacher_status_name_idx'),
+        ),
+    ]
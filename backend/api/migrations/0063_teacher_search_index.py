@@ -0,0 +1,94 @@
+import re
+import unicodedata
+
+from django.db import migrations
+
+# A frozen copy of the api.search index as it was when this migration was
+# written, so later changes to that module do not change what it builds.
+# The rebuild_teacher_search command brings the index up to date.
+FTS_TABLE = 'api_teacher_fts'
+FTS_COLUMNS = ('name', 'subject', 'governorate', 'skeleton')
+
+ARABIC_DIACRITICS = re.compile('[\u0610-\u061a\u0640\u064b-\u065f\u0670\u06d6-\u06ed]')
+ARABIC_FOLDING = str.maketrans({
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا',
+    'ى': 'ي', 'ئ': 'ي', 'ؤ': 'و', 'ة': 'ه',
+})
+TOKEN_RE = re.compile(r'\w+')
+ARABIC_SKELETON = {
+    'ب': 'b', 'ت': 't', 'ث': 'th', 'ج': 'g', 'ح': 'h', 'خ': 'kh', 'د': 'd', 'ذ': 'z',
+    'ر': 'r', 'ز': 'z', 'س': 's', 'ش': 'sh', 'ص': 's', 'ض': 'd', 'ط': 't', 'ظ': 'z',
+    'غ': 'gh', 'ف': 'f', 'ق': 'k', 'ك': 'k', 'ل': 'l', 'م': 'm', 'ن': 'n', 'ه': 'h',
+}
+LATIN_SKELETON = (('ch', 'sh'), ('q', 'k'), ('c', 'k'), ('j', 'g'), ('x', 'ks'), ('p', 'b'), ('v', 'f'))
+LATIN_VOWELS = re.compile('[aeiouyw]')
+REPEATS = re.compile(r'(.)\1+')
+
+
+def normalize_text(text):
+    text = unicodedata.normalize('NFKC', text or '').lower()
+    text = ARABIC_DIACRITICS.sub('', text).translate(ARABIC_FOLDING)
+    text = ''.join(ch for ch in unicodedata.normalize('NFKD', text) if not unicodedata.combining(ch))
+    return unicodedata.normalize('NFC', text)
+
+
+def skeleton(token):
+    if any('\u0600' <= ch <= '\u06ff' for ch in token):
+        if token.startswith('ال') and len(token) > 3:
+            token = token[2:]
+        result = ''.join(ARABIC_SKELETON.get(ch, '') for ch in token)
+        if token.endswith('ه'):
+            result = result[:-1]
+    else:
+        for source, target in LATIN_SKELETON:
+            token = token.replace(source, target)
+        result = LATIN_VOWELS.sub('', token)
+    return REPEATS.sub(r'\1', result)
+
+
+def teacher_document(teacher):
+    tokens = TOKEN_RE.findall(normalize_text(f'{teacher.name} {teacher.subject} {teacher.governorate}'))
+    return (
+        normalize_text(teacher.name),
+        normalize_text(teacher.subject),
+        normalize_text(teacher.governorate),
+        ' '.join(filter(None, (skeleton(token) for token in tokens))),
+    )
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+    Teacher = apps.get_model('api', 'Teacher')
+    rows = [
+        (teacher.pk, *teacher_document(teacher))
+        for teacher in Teacher.objects.using(connection.alias).only('id', 'name', 'subject', 'governorate').iterator()
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            f"{', '.join(FTS_COLUMNS)}, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.executemany(
+            f"INSERT INTO {FTS_TABLE} (rowid, {', '.join(FTS_COLUMNS)}) VALUES (%s, %s, %s, %s, %s)",
+            rows,
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0062_teacher_catalog_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
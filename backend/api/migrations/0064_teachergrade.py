@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_teacher_grades(apps, schema_editor):
+    Teacher = apps.get_model('api', 'Teacher')
+    TeacherGrade = apps.get_model('api', 'TeacherGrade')
+    rows = []
+    for teacher in Teacher.objects.only('id', 'grade', 'subject', 'governorate').iterator(chunk_size=1000):
+        grades = dict.fromkeys(str(grade) for grade in (teacher.grade or []) if grade not in (None, ''))
+        rows.extend(
+            TeacherGrade(teacher_id=teacher.id, grade=grade, subject=teacher.subject, governorate=teacher.governorate)
+            for grade in grades
+        )
+    TeacherGrade.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0063_teacher_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TeacherGrade',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('grade', models.CharField(max_length=50)),
+                ('subject', models.CharField(max_length=50)),
+                ('governorate', models.CharField(max_length=50)),
+                ('teacher', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='grade_set', to='api.teacher')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['grade', 'subject', 'governorate'], name='teachergrade_lookup_idx')],
+                'unique_together': {('teacher', 'grade')},
+            },
+        ),
+        migrations.RunPython(populate_teacher_grades, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:57
+
+from datetime import date, datetime
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Frozen copies of api.utils.schedule as it was when this migration was
+# written, so later changes to that module do not change what it builds.
+SLOT_TIME_FORMATS = ["%I:%M %p", "%H:%M", "%H:%M:%S"]
+
+
+def parse_slot_time(value):
+    value = (value or '').strip()
+    for fmt in SLOT_TIME_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).time()
+        except ValueError:
+            continue
+    return None
+
+
+def iter_schedule(schedule):
+    if not isinstance(schedule, dict):
+        return
+    for date_str, times in schedule.items():
+        if not isinstance(times, dict):
+            continue
+        try:
+            slot_date = date.fromisoformat(date_str)
+        except (TypeError, ValueError):
+            continue
+        for time, place in times.items():
+            if isinstance(time, str) and isinstance(place, str):
+                yield slot_date, time, place
+
+
+def populate_teacher_slots(apps, schema_editor):
+    Teacher = apps.get_model('api', 'Teacher')
+    TeacherSlot = apps.get_model('api', 'TeacherSlot')
+    rows = []
+    for teacher in Teacher.objects.only('id', 'schedule', 'max_students_per_group').iterator(chunk_size=1000):
+        rows.extend(
+            TeacherSlot(
+                teacher_id=teacher.id,
+                date=slot_date,
+                time=time,
+                start_time=parse_slot_time(time),
+                place=place,
+                capacity=teacher.max_students_per_group,
+            )
+            for slot_date, time, place in iter_schedule(teacher.schedule)
+        )
+    TeacherSlot.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0064_teachergrade'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TeacherSlot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('time', models.CharField(max_length=10)),
+                ('start_time', models.TimeField(blank=True, null=True)),
+                ('place', models.CharField(max_length=100)),
+                ('capacity', models.PositiveIntegerField()),
+                ('teacher', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='slots', to='api.teacher')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['date', 'start_time'], name='teacherslot_date_idx')],
+                'unique_together': {('teacher', 'date', 'time')},
+            },
+        ),
+        migrations.RunPython(populate_teacher_slots, migrations.RunPython.noop),
+    ]
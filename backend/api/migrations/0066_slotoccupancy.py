@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def populate_slot_occupancy(apps, schema_editor):
+    Booking = apps.get_model('api', 'Booking')
+    SlotOccupancy = apps.get_model('api', 'SlotOccupancy')
+    totals = Booking.objects.values('teacher_id', 'date', 'time', 'place').annotate(
+        confirmed=Count('id', filter=Q(status__in=['confirmed', 'modified'])),
+        pending=Count('id', filter=Q(status='pending')),
+    )
+    SlotOccupancy.objects.bulk_create([
+        SlotOccupancy(
+            teacher_id=row['teacher_id'],
+            date=row['date'],
+            time=row['time'],
+            place=row['place'],
+            confirmed_count=row['confirmed'],
+            pending_count=row['pending'],
+        )
+        for row in totals
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0065_teacherslot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlotOccupancy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('time', models.CharField(max_length=10)),
+                ('place', models.CharField(max_length=100)),
+                ('confirmed_count', models.PositiveIntegerField(default=0)),
+                ('pending_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['teacher', 'date', 'time', 'place', 'status', 'created_at'], name='booking_slot_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['user', 'teacher', 'date', 'time'], name='booking_user_slot_idx'),
+        ),
+        migrations.AddField(
+            model_name='slotoccupancy',
+            name='teacher',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='occupancy', to='api.teacher'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='slotoccupancy',
+            unique_together={('teacher', 'date', 'time', 'place')},
+        ),
+        migrations.RunPython(populate_slot_occupancy, migrations.RunPython.noop),
+    ]
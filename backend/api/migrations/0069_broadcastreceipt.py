@@ -0,0 +1,75 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def collapse_broadcast_copies(apps, schema_editor):
+    Broadcast = apps.get_model('api', 'Broadcast')
+    BroadcastReceipt = apps.get_model('api', 'BroadcastReceipt')
+    CustomUser = apps.get_model('api', 'CustomUser')
+    Notification = apps.get_model('api', 'Notification')
+    for broadcast in Broadcast.objects.iterator():
+        copies = dict(Notification.objects.filter(broadcast=broadcast).values_list('user_id', 'is_read'))
+        eligible = CustomUser.objects.filter(date_joined__lte=broadcast.created_at).values_list('id', flat=True)
+        if broadcast.status != 'sent':
+            # Users the interrupted fan-out never reached keep seeing it.
+            eligible = eligible.filter(id__lte=broadcast.last_user_id)
+        receipts = []
+        for user_id in eligible.iterator(chunk_size=1000):
+            if user_id not in copies:
+                receipts.append(BroadcastReceipt(broadcast=broadcast, user_id=user_id, is_dismissed=True))
+            elif copies[user_id]:
+                receipts.append(BroadcastReceipt(broadcast=broadcast, user_id=user_id, is_read=True))
+        BroadcastReceipt.objects.bulk_create(receipts, batch_size=1000)
+        Notification.objects.filter(broadcast=broadcast).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0068_broadcast'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BroadcastReceipt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_read', models.BooleanField(default=False)),
+                ('is_dismissed', models.BooleanField(default=False)),
+                ('broadcast', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='receipts', to='api.broadcast')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='broadcast_receipts', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'broadcast')},
+            },
+        ),
+        migrations.RunPython(collapse_broadcast_copies, migrations.RunPython.noop),
+        migrations.AlterModelOptions(
+            name='broadcast',
+            options={'ordering': ['-created_at']},
+        ),
+        migrations.RemoveField(
+            model_name='broadcast',
+            name='completed_at',
+        ),
+        migrations.RemoveField(
+            model_name='broadcast',
+            name='last_user_id',
+        ),
+        migrations.RemoveField(
+            model_name='broadcast',
+            name='status',
+        ),
+        migrations.RemoveField(
+            model_name='notification',
+            name='broadcast',
+        ),
+        migrations.AlterField(
+            model_name='broadcast',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+    ]
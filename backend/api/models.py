@@ -1,10 +1,18 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import RegexValidator
 import uuid
 from django.utils import timezone
 from datetime import timedelta
-from django.db.models import Avg
+from django.db.models import Case, ExpressionWrapper, F, FloatField, Value, When
+from django.db.models.functions import Greatest, Lower, Round
+from django.db.models.lookups import GreaterThanOrEqual
+from .events import publish_on_commit
+from .utils.schedule import iter_schedule, parse_slot_time
+
+TOP_RATED_THRESHOLD = 5.0
+# Booking statuses that hold a seat in the group.
+ACTIVE_BOOKING_STATUSES = ('confirmed', 'modified')
 
 class CustomUser(AbstractUser):
     phone_number = models.CharField(
@@ -20,8 +28,21 @@ class CustomUser(AbstractUser):
     email = models.EmailField(unique=True)
     bio = models.TextField(max_length=500, blank=True, null=True)
     profile_picture = models.ImageField(upload_to='profile_pics/', blank=True, null=True)
+    # {'source': the profile_picture name they were built from, size: file name}; see utils/images.py.
+    profile_picture_derivatives = models.JSONField(default=dict, blank=True)
     last_activity = models.DateTimeField(null=True, blank=True , default=timezone.now)
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            models.Index(fields=['-date_joined', '-id'], name='user_joined_idx'),
+            models.Index(fields=['last_activity'], name='user_last_activity_idx'),
+            # Prefix search compares the lowercased columns as ranges.
+            models.Index(Lower('username'), name='user_username_lower_idx'),
+            models.Index(Lower('email'), name='user_email_lower_idx'),
+            models.Index(Lower('first_name'), Lower('last_name'), name='user_name_lower_idx'),
+            models.Index(Lower('last_name'), name='user_last_name_lower_idx'),
+        ]
+
     def set_password(self, raw_password):
         super().set_password(raw_password)
 
@@ -38,6 +59,7 @@ class Teacher(models.Model):
     schedule = models.JSONField(default=dict)
     promotional_videos = models.URLField(max_length=200, blank=True, null=True)
     image = models.ImageField(upload_to='teacher_images/', blank=True, null=True)
+    image_derivatives = models.JSONField(default=dict, blank=True)
     is_top_rated = models.BooleanField(default=False)
     manually_set_top_rated = models.BooleanField(default=False)
     status = models.CharField(  # New field
@@ -48,27 +70,127 @@ class Teacher(models.Model):
         ],
         default='active'
     )
+    # Denormalized from Rating; maintained by Rating.save and the post_delete
+    # signal, rebuilt by the rebuild_rating_aggregates command.
+    rating_sum = models.FloatField(default=0.0)
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_avg = models.FloatField(default=0.0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'governorate', 'subject'], name='teacher_status_location_idx'),
+            models.Index(fields=['status', 'price_per_session', 'id'], name='teacher_status_price_idx'),
+            models.Index(fields=['status', '-is_top_rated', '-rating_sum', 'id'], name='teacher_status_rating_idx'),
+            models.Index(fields=['status', 'name', 'id'], name='teacher_status_name_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
-    
     @property
     def rating(self):
-        ratings = self.rating_set.all()
-        total_rating = sum(rating.rating for rating in ratings)
-        total_rating = round(float(total_rating), 1) if total_rating else 0.0
-        if not self.manually_set_top_rated:
-            self.is_top_rated = total_rating >= 5.0
-            self.save()
-        if self.is_top_rated and not ratings:
+        total_rating = round(float(self.rating_sum), 1) if self.rating_sum else 0.0
+        if self.is_top_rated and not self.rating_count:
             return 5.0
         return min(total_rating, 5.0)
 
-    @property
-    def rating_count(self):
-        return self.rating_set.count()
-    
+    def sync_grades(self):
+        grades = dict.fromkeys(str(grade) for grade in (self.grade or []) if grade not in (None, ''))
+        TeacherGrade.objects.filter(teacher=self).delete()
+        TeacherGrade.objects.bulk_create([
+            TeacherGrade(teacher=self, grade=grade, subject=self.subject, governorate=self.governorate)
+            for grade in grades
+        ])
+
+    def sync_slots(self):
+        wanted = {(slot_date, time): place for slot_date, time, place in iter_schedule(self.schedule)}
+        existing = {(slot.date, slot.time): slot for slot in TeacherSlot.objects.filter(teacher=self)}
+
+        stale = [slot.pk for key, slot in existing.items() if key not in wanted]
+        if stale:
+            TeacherSlot.objects.filter(pk__in=stale).delete()
+
+        changed = []
+        for key, slot in existing.items():
+            if key in wanted and (slot.place != wanted[key] or slot.capacity != self.max_students_per_group):
+                slot.place = wanted[key]
+                slot.capacity = self.max_students_per_group
+                changed.append(slot)
+        TeacherSlot.objects.bulk_update(changed, ['place', 'capacity'])
+
+        TeacherSlot.objects.bulk_create([
+            TeacherSlot(
+                teacher=self,
+                date=slot_date,
+                time=time,
+                start_time=parse_slot_time(time),
+                place=place,
+                capacity=self.max_students_per_group,
+            )
+            for (slot_date, time), place in wanted.items()
+            if (slot_date, time) not in existing
+        ])
+
+    def sync_top_rated(self):
+        if not self.manually_set_top_rated:
+            self.is_top_rated = round(float(self.rating_sum), 1) >= TOP_RATED_THRESHOLD
+
+    @classmethod
+    def apply_rating_delta(cls, teacher_id, rating_delta, count_delta):
+        ResourceVersion.bump(ResourceVersion.TEACHERS)
+        new_sum = F('rating_sum') + rating_delta
+        new_count = F('rating_count') + count_delta
+        cls.objects.filter(pk=teacher_id).update(
+            rating_sum=new_sum,
+            rating_count=new_count,
+            rating_avg=Case(
+                When(rating_count__gt=-count_delta, then=ExpressionWrapper(new_sum / new_count, output_field=FloatField())),
+                default=Value(0.0),
+            ),
+            is_top_rated=Case(
+                When(manually_set_top_rated=True, then=F('is_top_rated')),
+                When(GreaterThanOrEqual(Round(new_sum, 1), TOP_RATED_THRESHOLD), then=Value(True)),
+                default=Value(False),
+            ),
+        )
+
+
+
+class TeacherGrade(models.Model):
+    # Normalized copy of Teacher.grade (plus the columns it is filtered with)
+    # so grade lookups can seek an index instead of decoding JSON per row.
+    teacher = models.ForeignKey(Teacher, on_delete=models.CASCADE, related_name='grade_set')
+    grade = models.CharField(max_length=50)
+    subject = models.CharField(max_length=50)
+    governorate = models.CharField(max_length=50)
+
+    class Meta:
+        unique_together = ["teacher", "grade"]
+        indexes = [
+            models.Index(fields=['grade', 'subject', 'governorate'], name='teachergrade_lookup_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.teacher_id} teaches {self.grade}"
+
+
+class TeacherSlot(models.Model):
+    # Relational copy of Teacher.schedule, rebuilt by Teacher.sync_slots.
+    teacher = models.ForeignKey(Teacher, on_delete=models.CASCADE, related_name='slots')
+    date = models.DateField()
+    time = models.CharField(max_length=10)
+    start_time = models.TimeField(null=True, blank=True)
+    place = models.CharField(max_length=100)
+    capacity = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = ["teacher", "date", "time"]
+        indexes = [
+            models.Index(fields=['date', 'start_time'], name='teacherslot_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.teacher_id} on {self.date} at {self.time} ({self.place})"
 
 
 class RatedTeacher(models.Model):
@@ -92,9 +214,19 @@ class Rating(models.Model):
         return f"Rating {self.rating} by {self.user} for {self.teacher}"
 
     def save(self, *args, **kwargs):
+        previous = None
+        if not self._state.adding:
+            previous = Rating.objects.filter(pk=self.pk).values('teacher_id', 'rating').first()
         self.rating = self.rating / 10.0
-        super(Rating, self).save(*args, **kwargs)
-        self.teacher.save()
+        with transaction.atomic():
+            super(Rating, self).save(*args, **kwargs)
+            if previous is None:
+                Teacher.apply_rating_delta(self.teacher_id, self.rating, 1)
+            elif previous['teacher_id'] != self.teacher_id:
+                Teacher.apply_rating_delta(previous['teacher_id'], -previous['rating'], -1)
+                Teacher.apply_rating_delta(self.teacher_id, self.rating, 1)
+            else:
+                Teacher.apply_rating_delta(self.teacher_id, self.rating - previous['rating'], 0)
 
 class Booking(models.Model):
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
@@ -113,9 +245,131 @@ class Booking(models.Model):
     rated = models.BooleanField(default=False)
     closed_time = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['teacher', 'date', 'time', 'place', 'status', 'created_at'], name='booking_slot_status_idx'),
+            models.Index(fields=['user', 'teacher', 'date', 'time'], name='booking_user_slot_idx'),
+            models.Index(fields=['-created_at', '-id'], name='booking_created_idx'),
+        ]
+
     def __str__(self):
         return f"Booking for {self.teacher.name} by {self.user.username} on {self.day} at {self.time}"
 
+    def change_status(self, new_status, capacity):
+        """Move the booking to ``new_status`` and its seat between the slot
+        counters.
+
+        The row is only updated while it still has the status it was loaded
+        with, so of two concurrent changes (a double-clicked cancel) only one
+        moves the counters. A move into a confirmed status has to take a
+        free seat out of ``capacity``. Returns False, changing nothing, when
+        the status was changed meanwhile or the slot is full.
+        """
+        old_status = self.status
+        if new_status == old_status:
+            return True
+        with transaction.atomic():
+            if not Booking.objects.filter(pk=self.pk, status=old_status).update(status=new_status):
+                return False
+            if not SlotOccupancy.apply_transition(
+                self.teacher_id, self.date, self.time, self.place, old_status, new_status, capacity
+            ):
+                transaction.set_rollback(True)
+                return False
+            # update() skips post_save, which bumps the bookings version.
+            ResourceVersion.bump(ResourceVersion.bookings(self.user_id))
+        self.status = new_status
+        return True
+
+
+class SlotOccupancy(models.Model):
+    # Per-slot booking counters so admission does not COUNT Booking rows.
+    # confirmed_count covers ACTIVE_BOOKING_STATUSES; both are rebuilt from
+    # Booking by the reconcile_slot_occupancy command.
+    teacher = models.ForeignKey(Teacher, on_delete=models.CASCADE, related_name='occupancy')
+    date = models.DateField()
+    time = models.CharField(max_length=10)
+    place = models.CharField(max_length=100)
+    confirmed_count = models.PositiveIntegerField(default=0)
+    pending_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ["teacher", "date", "time", "place"]
+
+    def __str__(self):
+        return f"{self.teacher_id} {self.date} {self.time} ({self.place}): {self.confirmed_count}+{self.pending_count}"
+
+    @staticmethod
+    def counter_field(status):
+        if status in ACTIVE_BOOKING_STATUSES:
+            return 'confirmed_count'
+        if status == 'pending':
+            return 'pending_count'
+        return None
+
+    @classmethod
+    def confirmed_for(cls, teacher_id, date, time, place):
+        counts = cls.objects.filter(teacher_id=teacher_id, date=date, time=time, place=place)
+        return counts.values_list('confirmed_count', flat=True).first() or 0
+
+    @classmethod
+    def admit(cls, teacher_id, date, time, place, capacity):
+        """Take a seat in the slot if one is free, otherwise join the waitlist.
+
+        The capacity check and the increment are one conditional UPDATE, so
+        concurrent admissions to the same slot cannot both take the last
+        seat, and admissions to other slots never touch this row. Call it
+        first inside the transaction that creates the booking: the UPDATE
+        then takes SQLite's write lock before anything is read, so
+        concurrent admissions wait on the busy timeout instead of failing
+        on a read-to-write upgrade.
+        """
+        if cls.take_seat(teacher_id, date, time, place, capacity):
+            return 'confirmed'
+        # take_seat has created the row if it was missing.
+        cls.objects.filter(teacher_id=teacher_id, date=date, time=time, place=place).update(
+            pending_count=F('pending_count') + 1
+        )
+        return 'pending'
+
+    @classmethod
+    def take_seat(cls, teacher_id, date, time, place, capacity):
+        """Count one more confirmed booking if fewer than ``capacity`` are;
+        the check and the increment are one conditional UPDATE."""
+        slot = cls.objects.filter(teacher_id=teacher_id, date=date, time=time, place=place)
+        if slot.filter(confirmed_count__lt=capacity).update(confirmed_count=F('confirmed_count') + 1):
+            return True
+        if slot.exists():
+            return False
+        cls.objects.get_or_create(teacher_id=teacher_id, date=date, time=time, place=place)
+        return cls.take_seat(teacher_id, date, time, place, capacity)
+
+    @classmethod
+    def apply_transition(cls, teacher_id, date, time, place, old_status, new_status, capacity=None):
+        """Move one booking between the counters of its slot.
+
+        With ``capacity`` a move into confirmed_count goes through
+        ``take_seat``; False means the slot is full and nothing was changed.
+        """
+        old_field = cls.counter_field(old_status)
+        new_field = cls.counter_field(new_status)
+        if old_field == new_field:
+            return True
+        if new_field == 'confirmed_count' and capacity is not None:
+            if not cls.take_seat(teacher_id, date, time, place, capacity):
+                return False
+            new_field = None
+        updates = {}
+        if old_field:
+            updates[old_field] = Greatest(F(old_field) - 1, 0)
+        if new_field:
+            updates[new_field] = F(new_field) + 1
+        slot = cls.objects.filter(teacher_id=teacher_id, date=date, time=time, place=place)
+        if updates and not slot.update(**updates) and new_field:
+            cls.objects.get_or_create(teacher_id=teacher_id, date=date, time=time, place=place)
+            slot.update(**updates)
+        return True
+
 
 class PasswordResetToken(models.Model):
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
@@ -134,6 +388,63 @@ class PasswordResetToken(models.Model):
     
 
 
+class Broadcast(models.Model):
+    title = models.CharField(max_length=255)
+    message = models.TextField()
+    created_by = models.ForeignKey(
+        CustomUser, on_delete=models.SET_NULL, null=True, blank=True, related_name="broadcasts"
+    )
+    recipient_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.title} ({self.recipient_count} recipients)"
+
+
+class BroadcastReceipt(models.Model):
+    broadcast = models.ForeignKey(Broadcast, on_delete=models.CASCADE, related_name="receipts")
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name="broadcast_receipts")
+    is_read = models.BooleanField(default=False)
+    is_dismissed = models.BooleanField(default=False)
+
+    class Meta:
+        unique_together = ["user", "broadcast"]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.broadcast.title}"
+
+
+class NotificationCounter(models.Model):
+    user = models.OneToOneField(
+        CustomUser, on_delete=models.CASCADE, primary_key=True, related_name="notification_counter"
+    )
+    unread = models.PositiveIntegerField(default=0)
+    broadcast_mark = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user.username}: {self.unread} unread"
+
+    @classmethod
+    def adjust(cls, deltas):
+        """Apply ``{user_id: delta}`` to the unread counters in one UPDATE.
+
+        Users without a counter row are skipped; their row is built from
+        scratch on the next read.
+        """
+        deltas = {user_id: delta for user_id, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        change = Case(
+            *[When(pk=user_id, then=Value(delta)) for user_id, delta in deltas.items()],
+            default=Value(0),
+        )
+        cls.objects.filter(pk__in=deltas).update(unread=Greatest(F('unread') + change, Value(0)))
+        publish_on_commit(deltas)
+
+
 class Notification(models.Model):
     title = models.CharField(max_length=255)
     message = models.TextField()
@@ -143,6 +454,86 @@ class Notification(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id'], name='notification_feed_idx'),
+        ]
+
+    def __str__(self):
+        return self.title
+
+
+class EmailOutbox(models.Model):
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254)
+    to = models.JSONField(default=list)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claim_token = models.UUIDField(null=True, blank=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='emailoutbox_due_idx'),
+        ]
 
     def __str__(self):
-        return self.title
\ No newline at end of file
+        return f"{self.subject} -> {', '.join(self.to)} ({self.status})"
+
+
+class ResourceVersion(models.Model):
+    """Validators for conditional GETs (see api/conditional.py).
+
+    ``version`` is replaced with a fresh random token, in the writer's
+    transaction, whenever the resource named by ``key`` changes: the
+    teacher catalog, the broadcasts, and each user's bookings and
+    notifications.
+    """
+    TEACHERS = 'teachers'
+    BROADCASTS = 'broadcasts'
+
+    key = models.CharField(max_length=64, primary_key=True)
+    version = models.CharField(max_length=32)
+    updated_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.key}: {self.version}"
+
+    @staticmethod
+    def bookings(user_id):
+        return f'bookings:{user_id}'
+
+    @staticmethod
+    def notifications(user_id):
+        return f'notifications:{user_id}'
+
+    @classmethod
+    def bump(cls, *keys):
+        now = timezone.now()
+        return cls.objects.bulk_create(
+            [cls(key=key, version=uuid.uuid4().hex, updated_at=now) for key in sorted(set(keys))],
+            update_conflicts=True,
+            unique_fields=['key'],
+            update_fields=['version', 'updated_at'],
+        )
+
+    @classmethod
+    def current(cls, keys):
+        """The rows for ``keys``, creating missing ones so a resource that
+        was never bumped (or was wiped) still gets a version of its own."""
+        rows = {row.key: row for row in cls.objects.filter(key__in=keys)}
+        missing = [key for key in keys if key not in rows]
+        if missing:
+            rows.update((row.key, row) for row in cls.bump(*missing))
+        return [rows[key] for key in keys]
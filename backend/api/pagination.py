@@ -0,0 +1,163 @@
+import base64
+import binascii
+import hashlib
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from heapq import merge
+from itertools import islice
+
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+COUNT_CACHE_TIMEOUT = 60
+
+
+def cached_count(queryset, timeout=COUNT_CACHE_TIMEOUT, version=None):
+    """``queryset.count()``, cached for ``timeout`` seconds under a key
+    derived from the query, so each filter combination is counted at most
+    once per timeout however many pages are read.
+
+    A response validated by ``conditional`` must pass the ResourceVersion
+    it was built from as ``version``: a write then starts a new count
+    instead of pairing the new ETag with the old total.
+    """
+    sql, params = queryset.query.sql_with_params()
+    key = 'count:' + hashlib.sha256(f'{sql}|{params}|{version}'.encode()).hexdigest()
+    return cache.get_or_set(key, queryset.count, timeout)
+
+
+class KeysetPagination:
+    """Cursor pagination over a fixed composite ordering.
+
+    The ordering must end in a unique column (normally ``id``) so that every
+    row has a distinct position. The cursor is the ordering key of the last
+    row on the page, so fetching the next page is an index range scan rather
+    than an OFFSET.
+    """
+    page_size = 20
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+
+    def __init__(self, ordering, page_size=None, max_page_size=None):
+        self.ordering = tuple(ordering)
+        if page_size is not None:
+            self.page_size = page_size
+        if max_page_size is not None:
+            self.max_page_size = max_page_size
+        self.page = []
+        self.has_next = False
+
+    @classmethod
+    def requested(cls, request):
+        params = request.query_params
+        return cls.cursor_query_param in params or cls.page_size_query_param in params
+
+    def get_page_size(self, request):
+        raw = request.query_params.get(self.page_size_query_param)
+        if raw is None:
+            return self.page_size
+        try:
+            size = int(raw)
+        except ValueError:
+            raise ValidationError({self.page_size_query_param: 'Must be an integer.'})
+        if size < 1:
+            raise ValidationError({self.page_size_query_param: 'Must be a positive integer.'})
+        return min(size, self.max_page_size)
+
+    def paginate_queryset(self, queryset, request):
+        page_size = self.get_page_size(request)
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            queryset = queryset.filter(self.after(self.decode_cursor(cursor, queryset.model)))
+        rows = list(queryset.order_by(*self.ordering)[:page_size + 1])
+        self.has_next = len(rows) > page_size
+        self.page = rows[:page_size]
+        return self.page
+
+    def paginate_querysets(self, querysets, request):
+        """Paginate the merge of several querysets that share ``ordering``.
+
+        Every ordering column must sort in the same direction. Each source
+        is cut at the cursor and the page size before merging, so a page
+        costs one bounded index scan per source.
+        """
+        page_size = self.get_page_size(request)
+        cursor = request.query_params.get(self.cursor_query_param)
+        sources = []
+        for queryset in querysets:
+            if cursor:
+                queryset = queryset.filter(self.after(self.decode_cursor(cursor, queryset.model)))
+            sources.append(queryset.order_by(*self.ordering)[:page_size + 1])
+        descending = self.ordering[0].startswith('-')
+        rows = list(islice(merge(*sources, key=self.row_key, reverse=descending), page_size + 1))
+        self.has_next = len(rows) > page_size
+        self.page = rows[:page_size]
+        return self.page
+
+    def after(self, values):
+        condition = Q()
+        equal = Q()
+        for name, value in zip(self.ordering, values):
+            field = name.lstrip('-')
+            lookup = 'lt' if name.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{field}__{lookup}': value})
+            equal &= Q(**{field: value})
+        return condition
+
+    def through(self, values):
+        """Rows at or after the position ``values``."""
+        equal = Q(**{name.lstrip('-'): value for name, value in zip(self.ordering, values)})
+        return self.after(values) | equal
+
+    def row_key(self, row):
+        names = [name.lstrip('-') for name in self.ordering]
+        if isinstance(row, dict):
+            return [row[name] for name in names]
+        return [getattr(row, name) for name in names]
+
+    def get_next_cursor(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.row_key(self.page[-1]))
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_cursor(), 'results': data})
+
+    @staticmethod
+    def _to_json(value):
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+        if isinstance(value, Decimal):
+            return str(value)
+        return value
+
+    def encode_cursor(self, values):
+        raw = json.dumps([self._to_json(value) for value in values], separators=(',', ':'))
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor, model):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        except (binascii.Error, ValueError, UnicodeDecodeError):
+            raise ValidationError({self.cursor_query_param: 'Invalid cursor.'})
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise ValidationError({self.cursor_query_param: 'Invalid cursor.'})
+
+        decoded = []
+        for name, value in zip(self.ordering, values):
+            try:
+                field = model._meta.get_field(name.lstrip('-'))
+            except FieldDoesNotExist:
+                decoded.append(value)
+                continue
+            try:
+                decoded.append(field.to_python(value))
+            except Exception:
+                raise ValidationError({self.cursor_query_param: 'Invalid cursor.'})
+        return decoded
@@ -0,0 +1,169 @@
+import re
+import unicodedata
+
+from django.db import connection, transaction
+from django.db.models import Q
+
+FTS_TABLE = 'api_teacher_fts'
+FTS_COLUMNS = ('name', 'subject', 'governorate', 'skeleton')
+# bm25 weights, one per column in FTS_COLUMNS.
+FTS_WEIGHTS = (10.0, 4.0, 2.0, 1.0)
+
+ARABIC_DIACRITICS = re.compile('[\u0610-\u061a\u0640\u064b-\u065f\u0670\u06d6-\u06ed]')
+ARABIC_FOLDING = str.maketrans({
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا',
+    'ى': 'ي', 'ئ': 'ي', 'ؤ': 'و', 'ة': 'ه',
+})
+TOKEN_RE = re.compile(r'\w+')
+
+# Consonant skeletons let "Mohamed", "Mohammed" and "محمد" meet on "mhmd".
+ARABIC_SKELETON = {
+    'ب': 'b', 'ت': 't', 'ث': 'th', 'ج': 'g', 'ح': 'h', 'خ': 'kh', 'د': 'd', 'ذ': 'z',
+    'ر': 'r', 'ز': 'z', 'س': 's', 'ش': 'sh', 'ص': 's', 'ض': 'd', 'ط': 't', 'ظ': 'z',
+    'غ': 'gh', 'ف': 'f', 'ق': 'k', 'ك': 'k', 'ل': 'l', 'م': 'm', 'ن': 'n', 'ه': 'h',
+}
+LATIN_SKELETON = (('ch', 'sh'), ('q', 'k'), ('c', 'k'), ('j', 'g'), ('x', 'ks'), ('p', 'b'), ('v', 'f'))
+LATIN_VOWELS = re.compile('[aeiouyw]')
+REPEATS = re.compile(r'(.)\1+')
+
+
+def normalize_text(text):
+    text = unicodedata.normalize('NFKC', text or '').lower()
+    text = ARABIC_DIACRITICS.sub('', text).translate(ARABIC_FOLDING)
+    text = ''.join(ch for ch in unicodedata.normalize('NFKD', text) if not unicodedata.combining(ch))
+    return unicodedata.normalize('NFC', text)
+
+
+def skeleton(token):
+    if any('\u0600' <= ch <= '\u06ff' for ch in token):
+        if token.startswith('ال') and len(token) > 3:
+            token = token[2:]
+        # Letters not in the table (alef, waw, ya, ain, hamza) are vowels here.
+        result = ''.join(ARABIC_SKELETON.get(ch, '') for ch in token)
+        # A trailing ha is almost always a folded ta marbuta.
+        if token.endswith('ه'):
+            result = result[:-1]
+    else:
+        for source, target in LATIN_SKELETON:
+            token = token.replace(source, target)
+        result = LATIN_VOWELS.sub('', token)
+    return REPEATS.sub(r'\1', result)
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(normalize_text(text))
+
+
+def teacher_document(teacher):
+    tokens = tokenize(f'{teacher.name} {teacher.subject} {teacher.governorate}')
+    return (
+        normalize_text(teacher.name),
+        normalize_text(teacher.subject),
+        normalize_text(teacher.governorate),
+        ' '.join(filter(None, (skeleton(token) for token in tokens))),
+    )
+
+
+def build_match_query(query):
+    clauses = []
+    for token in tokenize(query):
+        term = '"{}"*'.format(token.replace('"', '""'))
+        token_skeleton = skeleton(token)
+        if len(token_skeleton) >= 2:
+            term = f'({term} OR skeleton : "{token_skeleton}"*)'
+        clauses.append(term)
+    return ' AND '.join(clauses)
+
+
+def fts_enabled(conn=None):
+    return (conn or connection).vendor == 'sqlite'
+
+
+def create_index(conn):
+    with conn.cursor() as cursor:
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            f"{', '.join(FTS_COLUMNS)}, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+
+
+def drop_index(conn):
+    with conn.cursor() as cursor:
+        cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+def index_teachers(teachers, conn=None, replace=True):
+    conn = conn or connection
+    if not fts_enabled(conn):
+        return
+    rows = [(teacher.pk, *teacher_document(teacher)) for teacher in teachers]
+    if not rows:
+        return
+    with conn.cursor() as cursor:
+        if replace:
+            cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [(row[0],) for row in rows])
+        cursor.executemany(
+            f"INSERT INTO {FTS_TABLE} (rowid, {', '.join(FTS_COLUMNS)}) VALUES (%s, %s, %s, %s, %s)",
+            rows,
+        )
+
+
+def unindex_teacher(teacher_id, conn=None):
+    conn = conn or connection
+    if not fts_enabled(conn):
+        return
+    with conn.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [teacher_id])
+
+
+def rebuild_index(teachers, conn=None, batch_size=1000):
+    conn = conn or connection
+    if not fts_enabled(conn):
+        return 0
+    total = 0
+    batch = []
+    with transaction.atomic(using=conn.alias):
+        with conn.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        for teacher in teachers.only('id', 'name', 'subject', 'governorate').iterator(chunk_size=batch_size):
+            batch.append(teacher)
+            if len(batch) >= batch_size:
+                index_teachers(batch, conn, replace=False)
+                total += len(batch)
+                batch = []
+        index_teachers(batch, conn, replace=False)
+        total += len(batch)
+    with conn.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+    return total
+
+
+def search_teacher_ids(query, limit, status='active'):
+    match = build_match_query(query)
+    if not match:
+        return []
+    if not fts_enabled():
+        from .models import Teacher
+        term = query.strip()
+        teachers = Teacher.objects.filter(
+            Q(name__icontains=term) | Q(subject__icontains=term) | Q(governorate__icontains=term)
+        )
+        if status != 'all':
+            teachers = teachers.filter(status=status)
+        return list(teachers.order_by('name', 'id').values_list('id', flat=True)[:limit])
+
+    sql = (
+        f'SELECT {FTS_TABLE}.rowid FROM {FTS_TABLE} '
+        f'JOIN api_teacher ON api_teacher.id = {FTS_TABLE}.rowid '
+        f'WHERE {FTS_TABLE} MATCH %s'
+    )
+    params = [match]
+    if status != 'all':
+        sql += ' AND api_teacher.status = %s'
+        params.append(status)
+    weights = ', '.join(str(weight) for weight in FTS_WEIGHTS)
+    sql += f' ORDER BY bm25({FTS_TABLE}, {weights}) LIMIT %s'
+    params.append(limit)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
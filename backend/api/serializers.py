@@ -1,5 +1,10 @@
 from rest_framework import serializers
-from .models import CustomUser, Teacher, Booking, Rating,Notification,RatedTeacher
+from .fieldsets import FieldsetMixin
+from .models import CustomUser, Teacher, Booking, Rating,Notification,RatedTeacher,TeacherSlot,SlotOccupancy
+from django.db import transaction
+from .utils.images import derivatives_field, has_derivatives
+from .utils.notifications import send_to_all as send_to_all_users
+from .utils.waitlist import promote_waitlist
 from django.utils import timezone
 import random
 from datetime import datetime
@@ -10,23 +15,51 @@ import logging
 
 logger = logging.getLogger(__name__)
 
-class UserSerializer(serializers.ModelSerializer):
+
+class ImageDerivativeField(serializers.Field):
+    """URL of the ``size`` derivative of an image field, or of the original
+    until the derivative is built (see utils/images.py)."""
+
+    def __init__(self, image_field, size, **kwargs):
+        self.image_field = image_field
+        self.size = size
+        super().__init__(source='*', read_only=True, **kwargs)
+
+    def to_representation(self, instance):
+        image = getattr(instance, self.image_field)
+        if not image:
+            return None
+        derivatives = getattr(instance, derivatives_field(self.image_field))
+        url = image.storage.url(derivatives[self.size]) if has_derivatives(image, derivatives) else image.url
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+class UserSerializer(FieldsetMixin, serializers.ModelSerializer):
     first_name = serializers.CharField(required=True)
     last_name = serializers.CharField(required=True)
     phone_number = serializers.CharField(required=True)
     password = serializers.CharField(write_only=True, required=True)
     bio = serializers.CharField(max_length=500, required=False, allow_blank=True, allow_null=True)
     profile_picture = serializers.ImageField(required=False, allow_null=True)
+    profile_picture_thumbnail = ImageDerivativeField('profile_picture', 'thumbnail')
+    profile_picture_card = ImageDerivativeField('profile_picture', 'card')
 
     class Meta:
         model = CustomUser
         fields = ['id', 'first_name', 'last_name', 'phone_number', 'email', 'password', 'is_superuser',
-                'is_staff', 'date_joined', 'bio', 'profile_picture', 'username']
+                'is_staff', 'date_joined', 'bio', 'profile_picture', 'profile_picture_thumbnail',
+                'profile_picture_card', 'username']
         read_only_fields = ['id', 'date_joined', 'is_superuser', 'is_staff', 'username']
+        field_sources = {
+            'profile_picture_thumbnail': ['profile_picture', 'profile_picture_derivatives'],
+            'profile_picture_card': ['profile_picture', 'profile_picture_derivatives'],
+        }
 
 
     def to_representation(self, instance):
         ret = super().to_representation(instance)
+        if 'profile_picture' not in ret:
+            return ret
         if instance.profile_picture:
             request = self.context.get('request')
             ret['profile_picture'] = (
@@ -95,77 +128,82 @@ class UserSerializer(serializers.ModelSerializer):
         instance.first_name = validated_data.get('first_name', instance.first_name)
         instance.last_name = validated_data.get('last_name', instance.last_name)
         instance.bio = validated_data.get('bio', instance.bio)
+        # Only the edited columns are written: the instance may be a cached
+        # user whose activity stamp or picture derivatives are out of date.
+        update_fields = ['first_name', 'last_name', 'bio']
         if 'profile_picture' in validated_data:
             instance.profile_picture = validated_data['profile_picture']
+            update_fields.append('profile_picture')
         if 'password' in validated_data and validated_data['password']:
             instance.set_password(validated_data['password'])
-        instance.save()
+            update_fields.append('password')
+        instance.save(update_fields=update_fields)
         return instance
+
+
+class AdminUserSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = CustomUser
+        fields = ['id', 'username', 'email', 'first_name', 'last_name', 'phone_number', 'is_staff',
+                  'is_superuser', 'date_joined', 'last_activity']
+        read_only_fields = fields
     
 
-class TeacherSerializer(serializers.ModelSerializer):
+class TeacherSerializer(FieldsetMixin, serializers.ModelSerializer):
     rating = serializers.ReadOnlyField()
     rating_count = serializers.ReadOnlyField()
+    image_thumbnail = ImageDerivativeField('image', 'thumbnail')
+    image_card = ImageDerivativeField('image', 'card')
 
     class Meta:
         model = Teacher
         fields = ['id', 'name', 'governorate', 'grade', 'subject', 'price_per_session', 
-                  'max_students_per_group', 'schedule', 'promotional_videos', 'image', 
-                  'is_top_rated', 'rating', 'rating_count', 'manually_set_top_rated', 'status']
+                  'max_students_per_group', 'schedule', 'promotional_videos', 'image', 'image_thumbnail',
+                  'image_card', 'is_top_rated', 'rating', 'rating_count', 'manually_set_top_rated', 'status']
+        field_sources = {
+            'rating': ['rating_sum', 'rating_count', 'is_top_rated'],
+            'image_thumbnail': ['image', 'image_derivatives'],
+            'image_card': ['image', 'image_derivatives'],
+        }
 
     def create(self, validated_data):
-        instance = super(TeacherSerializer, self).create(validated_data)
         if validated_data.get('is_top_rated', False):
-            instance.manually_set_top_rated = True
-        instance.save()
+            validated_data['manually_set_top_rated'] = True
+        instance = super(TeacherSerializer, self).create(validated_data)
+        instance.sync_grades()
+        instance.sync_slots()
         return instance
 
     def update(self, instance, validated_data):
         old_max_students = instance.max_students_per_group
-        instance = super(TeacherSerializer, self).update(instance, validated_data)
         new_max_students = validated_data.get('max_students_per_group', old_max_students)
-        if new_max_students > old_max_students:
-            for date, times in instance.schedule.items():
-                for time, place in times.items():
-                    current_bookings = Booking.objects.filter(
-                        teacher=instance,
-                        date=date,
-                        time=time,
-                        place=place,
-                        status__in=['confirmed', 'modified']
-                    ).count()
-                    available_slots = new_max_students - current_bookings
-                    
-                    if available_slots > 0:
-                        pending_bookings = Booking.objects.filter(
-                            teacher=instance,
-                            date=date,
-                            time=time,
-                            place=place,
-                            status='pending'
-                        ).order_by('created_at')[:available_slots]
-                        
-                        for booking in pending_bookings:
-                            booking.status = 'confirmed'
-                            booking.save()
-                            Notification.objects.create(
-                                user=booking.user,
-                                title=_('تم تأكيد حجزك'),
-                                message=_(
-                                    f'حجزك مع {booking.teacher.name} لمادة {booking.subject} في {booking.date} الساعة {booking.time} ({booking.place}) تم تأكيده.'
-                                ),
-                                is_read=False
-                            )
+        update_fields = set(validated_data)
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
 
         if 'is_top_rated' in validated_data:
             instance.manually_set_top_rated = validated_data['is_top_rated']
-        instance.save()
+            # sync_top_rated reads rating_sum, which Rating keeps current in the row.
+            instance.refresh_from_db(fields=['rating_sum', 'rating_count', 'rating_avg'])
+            instance.sync_top_rated()
+            update_fields |= {'manually_set_top_rated', 'is_top_rated'}
+        # One save of the edited columns only: the rating aggregates and the
+        # image derivatives are maintained by other writers and must not be
+        # written back from this instance.
+        if update_fields:
+            instance.save(update_fields=sorted(update_fields))
+        if {'grade', 'subject', 'governorate'} & validated_data.keys():
+            instance.sync_grades()
+        if {'schedule', 'max_students_per_group'} & validated_data.keys():
+            instance.sync_slots()
+        if new_max_students > old_max_students:
+            promote_waitlist(instance)
         return instance
 
 
 
 
-class BookingSerializer(serializers.ModelSerializer):
+class BookingSerializer(FieldsetMixin, serializers.ModelSerializer):
     teacher = TeacherSerializer(read_only=True)
     subject = serializers.CharField()
     teacher_id = serializers.PrimaryKeyRelatedField(
@@ -189,6 +227,7 @@ class BookingSerializer(serializers.ModelSerializer):
         model = Booking
         fields = ['id', 'user', 'teacher', 'teacher_id', 'subject', 'date', 'time', 'place', 'status', 'rated', 'closed_time']
         read_only_fields = ['id', 'user', 'teacher', 'rated', 'closed_time']
+        expandable = {'teacher': TeacherSerializer, 'user': UserSerializer}
 
     def validate(self, data):
         teacher = data.get('teacher')
@@ -235,28 +274,16 @@ class BookingSerializer(serializers.ModelSerializer):
             if not date or not time or not place or not teacher:
                 raise serializers.ValidationError(_("التاريخ، الوقت، المكان، والمعلم مطلوبون."))
 
-            try:
-                date_str = date.strftime('%Y-%m-%d')
-            except AttributeError:
-                raise serializers.ValidationError(_("تنسيق التاريخ غير صالح. استخدم 'YYYY-MM-DD' (مثال: '2025-05-19')."))
-
-            if date_str not in teacher.schedule or time not in teacher.schedule[date_str]:
+            slot = TeacherSlot.objects.filter(teacher=teacher, date=date, time=time).only('place').first()
+            if slot is None:
                 raise serializers.ValidationError(_("الفتحة الزمنية المختارة غير متوفرة في جدول المعلم."))
             
-            if place != teacher.schedule[date_str][time]:
+            if place != slot.place:
                 raise serializers.ValidationError(_("المكان المختار لا يتطابق مع جدول المعلم."))
             
             if data.get('subject') != teacher.subject:
                 raise serializers.ValidationError(_("المادة لا تتطابق مع مادة المعلم."))
 
-            current_bookings = Booking.objects.filter(
-                teacher=teacher,
-                date=date,
-                time=time,
-                place=place,
-                status__in=['confirmed', 'modified']
-            ).count()
-           
             if Booking.objects.filter(
                 teacher=teacher,
                 user=self.context.get('user'),
@@ -266,11 +293,9 @@ class BookingSerializer(serializers.ModelSerializer):
                 status__in=['confirmed', 'modified']
             ).exists():
                 raise serializers.ValidationError(_("لقد حجزت هذه الفتحة بالفعل."))
-            
-            if current_bookings >= teacher.max_students_per_group:
-                data['status'] = 'pending'
-            else:
-                data['status'] = 'confirmed'
+
+            # The status is decided atomically in create(), not from a count here.
+            data.pop('status', None)
 
         return data
 
@@ -279,22 +304,47 @@ class BookingSerializer(serializers.ModelSerializer):
         if not user:
             raise serializers.ValidationError(_("المستخدم مطلوب."))
         validated_data['user'] = user
-        booking = Booking.objects.create(**validated_data)
+        teacher = validated_data['teacher']
+        with transaction.atomic():
+            validated_data['status'] = SlotOccupancy.admit(
+                teacher.id,
+                validated_data['date'],
+                validated_data['time'],
+                validated_data['place'],
+                teacher.max_students_per_group,
+            )
+            booking = Booking.objects.create(**validated_data)
         return booking
 
     def update(self, instance, validated_data):
-        instance.status = validated_data.get('status', instance.status)
-        instance.save()
+        # Only the status of an existing booking changes; see Booking.change_status.
+        new_status = validated_data.get('status', instance.status)
+        if not instance.change_status(new_status, instance.teacher.max_students_per_group):
+            raise serializers.ValidationError(_("تعذر تغيير حالة الحجز: تم تغييرها بالفعل أو لا توجد مقاعد متاحة."))
         return instance
     
 
     
 
-class RatingSerializer(serializers.ModelSerializer):
+class TeacherSlotSerializer(serializers.ModelSerializer):
+    teacher_name = serializers.CharField(source='teacher.name', read_only=True)
+    available_seats = serializers.SerializerMethodField()
+
+    class Meta:
+        model = TeacherSlot
+        fields = ['id', 'teacher', 'teacher_name', 'date', 'time', 'place', 'capacity', 'available_seats']
+        read_only_fields = fields
+
+    def get_available_seats(self, obj):
+        return max(obj.capacity - getattr(obj, 'booked', 0), 0)
+
+
+class RatingSerializer(FieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Rating
         fields = ['id', 'user', 'teacher', 'rating', 'created_at']
         read_only_fields = ['id', 'user', 'created_at']
+        expandable = {'teacher': TeacherSerializer}
     
     def validate_rating(self, value):
         if not isinstance(value, (int, float)) or value < 1 or value > 5:
@@ -316,7 +366,7 @@ class RatedTeacherSerializer(serializers.ModelSerializer):
         return RatedTeacher.objects.create(**validated_data)
 
 
-class NotificationSerializer(serializers.ModelSerializer):
+class NotificationSerializer(FieldsetMixin, serializers.ModelSerializer):
     user_id = serializers.IntegerField(write_only=True, required=False)
     send_to_all = serializers.BooleanField(write_only=True, default=False)
 
@@ -339,11 +389,7 @@ class NotificationSerializer(serializers.ModelSerializer):
         send_to_all = validated_data.pop("send_to_all", False)
 
         if send_to_all:
-            notifications = [
-                Notification(**validated_data, user=user)
-                for user in CustomUser.objects.all()
-            ]
-            return Notification.objects.bulk_create(notifications)
+            return send_to_all_users(validated_data["title"], validated_data["message"])
         else:
             user = CustomUser.objects.get(id=user_id)
             return Notification.objects.create(**validated_data, user=user)
\ No newline at end of file
@@ -0,0 +1,79 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from . import search
+from .authentication import user_cache
+from .models import (
+    Booking, Broadcast, CustomUser, Notification, NotificationCounter, Rating, ResourceVersion, SlotOccupancy, Teacher,
+)
+from .utils.images import schedule_derivatives
+
+
+@receiver(post_delete, sender=Rating)
+def rating_deleted(sender, instance, **kwargs):
+    Teacher.apply_rating_delta(instance.teacher_id, -instance.rating, -1)
+
+
+@receiver(post_save, sender=Teacher)
+def teacher_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.index_teachers([instance])
+        ResourceVersion.bump(ResourceVersion.TEACHERS)
+        schedule_derivatives(instance, 'image')
+
+
+@receiver(post_delete, sender=Teacher)
+def teacher_deleted(sender, instance, **kwargs):
+    search.unindex_teacher(instance.pk)
+    ResourceVersion.bump(ResourceVersion.TEACHERS)
+
+
+@receiver(post_save, sender=Booking)
+def booking_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        ResourceVersion.bump(ResourceVersion.bookings(instance.user_id))
+
+
+@receiver(post_delete, sender=Booking)
+def booking_deleted(sender, instance, **kwargs):
+    SlotOccupancy.apply_transition(
+        instance.teacher_id, instance.date, instance.time, instance.place, instance.status, None
+    )
+    ResourceVersion.bump(ResourceVersion.bookings(instance.user_id))
+
+
+
+@receiver(post_save, sender=Notification)
+def notification_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created and not instance.is_read:
+        NotificationCounter.adjust({instance.user_id: 1})
+    ResourceVersion.bump(ResourceVersion.notifications(instance.user_id))
+
+
+@receiver(post_delete, sender=Notification)
+def notification_deleted(sender, instance, **kwargs):
+    if not instance.is_read:
+        NotificationCounter.adjust({instance.user_id: -1})
+    ResourceVersion.bump(ResourceVersion.notifications(instance.user_id))
+
+
+@receiver(post_save, sender=Broadcast)
+def broadcast_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        ResourceVersion.bump(ResourceVersion.BROADCASTS)
+
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def user_changed(sender, instance, **kwargs):
+    user_cache.invalidate(instance.pk)
+
+
+@receiver(post_save, sender=CustomUser)
+def user_saved(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Bookings embed the user; activity stamps are not part of it.
+    if not raw and not (update_fields and set(update_fields) <= {'last_activity', 'last_login'}):
+        ResourceVersion.bump(ResourceVersion.bookings(instance.pk))
+        schedule_derivatives(instance, 'profile_picture')
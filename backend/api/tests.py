@@ -1,3 +1,1248 @@
-from django.test import TestCase
+import csv
+import gzip
+import io
+import json
+import tempfile
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, time as datetime_time, timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.http import HttpResponse
+from django.test import AsyncClient, Client, RequestFactory, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from PIL import Image
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .authentication import user_cache
+from .management.commands import bench_api
+from .middleware import CompressionMiddleware, QueryInstrumentationMiddleware
+from .models import (
+    Booking, BroadcastReceipt, CustomUser, EmailOutbox, Notification, NotificationCounter, Rating, SlotOccupancy,
+    Teacher, TeacherGrade, TeacherSlot,
+)
+from .pagination import cached_count
+from .renderers import FastJSONParser, FastJSONRenderer
+from .serializers import TeacherSerializer
+from .utils.activity import activity_buffer
+from .utils.email_utils import deliver_outbox, queue_email
+from .utils.images import build_derivatives
+from .utils.synthetic import SyntheticData
+from .utils.waitlist import promote_waitlist
+from .utils.notifications import send_to_all
+
+
+class ConcurrentBookingAdmissionTests(TransactionTestCase):
+    capacity = 5
+    booking_requests = 200
+    workers = 16
+
+    def setUp(self):
+        self.teacher = Teacher.objects.create(
+            name='Capacity Teacher',
+            governorate='Cairo',
+            subject='Math',
+            max_students_per_group=self.capacity,
+            schedule={'2030-01-05': {'9:00 AM': 'Nasr City', '1:00 PM': 'Heliopolis'}},
+        )
+        self.teacher.sync_slots()
+        self.users = CustomUser.objects.bulk_create([
+            CustomUser(username=f'student{i}', email=f'student{i}@example.com')
+            for i in range(self.booking_requests)
+        ])
+
+    def book_concurrently(self, slots):
+        barrier = threading.Barrier(self.workers)
+
+        def book(args):
+            index, user = args
+            time, place = slots[index % len(slots)]
+            client = Client()
+            client.cookies['access_token'] = str(AccessToken.for_user(user))
+            try:
+                if index < self.workers:
+                    barrier.wait()
+                return client.post('/api/bookings/', {
+                    'teacher_id': self.teacher.id,
+                    'subject': 'Math',
+                    'date': '2030-01-05',
+                    'time': time,
+                    'place': place,
+                }, content_type='application/json').status_code
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            return list(pool.map(book, enumerate(self.users)))
+
+    def assert_slot_invariant(self, time, place, expected_requests):
+        bookings = Booking.objects.filter(teacher=self.teacher, time=time, place=place)
+        confirmed = bookings.filter(status='confirmed').count()
+        pending = bookings.filter(status='pending').count()
+        self.assertEqual(confirmed, self.capacity)
+        self.assertEqual(pending, expected_requests - self.capacity)
+
+        occupancy = SlotOccupancy.objects.get(teacher=self.teacher, time=time, place=place)
+        self.assertEqual(occupancy.confirmed_count, confirmed)
+        self.assertEqual(occupancy.pending_count, pending)
+
+    def test_capacity_holds_under_concurrent_bookings(self):
+        codes = self.book_concurrently([('9:00 AM', 'Nasr City')])
+
+        self.assertEqual(codes, [201] * self.booking_requests)
+        self.assert_slot_invariant('9:00 AM', 'Nasr City', self.booking_requests)
+
+    def test_each_slot_keeps_its_own_capacity(self):
+        slots = [('9:00 AM', 'Nasr City'), ('1:00 PM', 'Heliopolis')]
+        codes = self.book_concurrently(slots)
+
+        self.assertEqual(codes, [201] * self.booking_requests)
+        for time, place in slots:
+            self.assert_slot_invariant(time, place, self.booking_requests // len(slots))
+
+
+class FailingConnection:
+    def __init__(self, fail_for):
+        self.fail_for = fail_for
+        self.sent = []
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def send_messages(self, messages):
+        for message in messages:
+            if self.fail_for in message.to:
+                raise ConnectionError('mailbox unavailable')
+            self.sent.append(message)
+        return len(messages)
+
+
+class EmailOutboxTests(TestCase):
+    def test_request_only_queues_the_email(self):
+        CustomUser.objects.create(username='forgetful', email='forgetful@example.com')
+
+        response = Client().post('/api/forgot-password/', {'email': 'forgetful@example.com'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(EmailOutbox.objects.get().to, ['forgetful@example.com'])
+
+    def test_batch_is_delivered_over_one_connection(self):
+        for i in range(5):
+            queue_email(f'Subject {i}', 'Body', [f'student{i}@example.com'])
+
+        self.assertEqual(deliver_outbox(batch_size=3), (3, 0, 0))
+        self.assertEqual(deliver_outbox(batch_size=3), (2, 0, 0))
+        self.assertEqual(deliver_outbox(batch_size=3), (0, 0, 0))
+
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertFalse(EmailOutbox.objects.exclude(status='sent').exists())
+
+    def test_failed_message_backs_off_without_blocking_the_batch(self):
+        queue_email('Hello', 'Body', ['ok@example.com'])
+        bad = queue_email('Hello', 'Body', ['bad@example.com'])
+        connection = FailingConnection(fail_for='bad@example.com')
+
+        self.assertEqual(deliver_outbox(connection=connection, max_attempts=2), (1, 1, 0))
+        bad.refresh_from_db()
+        self.assertEqual(bad.status, 'queued')
+        self.assertEqual(bad.attempts, 1)
+        self.assertGreater(bad.next_attempt_at, timezone.now())
+        self.assertEqual(deliver_outbox(connection=connection, max_attempts=2), (0, 0, 0))
+
+        EmailOutbox.objects.filter(pk=bad.pk).update(next_attempt_at=timezone.now())
+        self.assertEqual(deliver_outbox(connection=connection, max_attempts=2), (0, 0, 1))
+        bad.refresh_from_db()
+        self.assertEqual(bad.status, 'failed')
+        self.assertEqual(bad.last_error, 'mailbox unavailable')
+
+
+class BroadcastNotificationTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create(username='reader', email='reader@example.com')
+        self.client = Client()
+        self.client.cookies['access_token'] = str(AccessToken.for_user(self.user))
+
+    def test_broadcast_is_one_row_merged_into_each_inbox(self):
+        Notification.objects.create(user=self.user, title='Personal', message='Hi')
+        broadcast = send_to_all('Holiday', 'No classes on Friday')
+
+        notifications = self.client.get('/api/notifications/').json()
+        self.assertEqual([n['title'] for n in notifications], ['Holiday', 'Personal'])
+        self.assertEqual(notifications[0]['id'], -broadcast.id)
+        self.assertEqual(self.client.get('/api/notifications/unread-count/').json(), {'unread_count': 2})
+        self.assertFalse(BroadcastReceipt.objects.exists())
+
+        self.client.post('/api/notifications/mark-read/')
+        self.assertEqual(self.client.get('/api/notifications/unread-count/').json(), {'unread_count': 0})
+
+        response = self.client.delete(f'/api/notifications/delete/{-broadcast.id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([n['title'] for n in self.client.get('/api/notifications/').json()], ['Personal'])
+
+    def test_users_joining_later_do_not_see_old_broadcasts(self):
+        broadcast = send_to_all('Welcome week', 'Details inside')
+        newcomer = CustomUser.objects.create(username='newcomer', email='newcomer@example.com')
+        client = Client()
+        client.cookies['access_token'] = str(AccessToken.for_user(newcomer))
+
+        self.assertEqual(client.get('/api/notifications/').json(), [])
+        self.assertEqual(client.delete(f'/api/notifications/delete/{-broadcast.id}/').status_code, 404)
+
+    def test_feed_pages_by_cursor_and_counter_tracks_reads(self):
+        for i in range(3):
+            Notification.objects.create(user=self.user, title=f'Personal {i}', message='Hi')
+            send_to_all(f'Broadcast {i}', 'Hello')
+        self.assertEqual(self.client.get('/api/notifications/unread-count/').json(), {'unread_count': 6})
+
+        first = self.client.get('/api/notifications/?page_size=4').json()
+        second = self.client.get(f"/api/notifications/?page_size=4&cursor={first['next']}").json()
+        titles = [n['title'] for n in first['results'] + second['results']]
+        self.assertEqual(titles, [n['title'] for n in self.client.get('/api/notifications/').json()])
+        self.assertIsNone(second['next'])
+
+        response = self.client.post(
+            '/api/notifications/mark-read/', {'ids': [n['id'] for n in first['results'][:2]]},
+            content_type='application/json',
+        )
+        self.assertEqual(response.json()['unread_count'], 4)
+        response = self.client.post(
+            '/api/notifications/mark-read/', {'cursor': first['next']}, content_type='application/json'
+        )
+        self.assertEqual(response.json()['updated'], 3)
+        self.assertEqual(self.client.get('/api/notifications/unread-count/').json(), {'unread_count': 1})
+
+    async def test_stream_pushes_the_unread_count(self):
+        await Notification.objects.acreate(user=self.user, title='Personal', message='Hi')
+        client = AsyncClient()
+        client.cookies['access_token'] = str(AccessToken.for_user(self.user))
+
+        response = await client.get('/api/notifications/stream/')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        events = response.streaming_content.__aiter__()
+        self.assertEqual(await events.__anext__(), b'retry: 5000\n\n')
+        self.assertEqual(await events.__anext__(), b'event: unread_count\ndata: {"unread_count": 1}\n\n')
+        await events.aclose()
+
+        self.assertEqual((await AsyncClient().get('/api/notifications/stream/')).status_code, 401)
+
+
+class CachedCookieAuthenticationTests(TestCase):
+    def setUp(self):
+        user_cache.clear()
+        self.user = CustomUser.objects.create(username='cached', email='cached@example.com')
+        self.client = Client()
+        self.client.cookies['access_token'] = str(AccessToken.for_user(self.user))
+
+    def test_repeat_requests_skip_the_user_lookup(self):
+        self.client.get('/api/bookings/')
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get('/api/bookings/').status_code, 200)
+        self.assertFalse(any('FROM "api_customuser"' in q['sql'] for q in queries.captured_queries))
+
+    def test_saving_or_deleting_the_user_invalidates_the_cache(self):
+        self.client.get('/api/bookings/')
+        CustomUser.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.client.get('/api/bookings/').status_code, 200)
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get('/api/bookings/').status_code, 401)
+
+        self.user.delete()
+        self.assertEqual(self.client.get('/api/bookings/').status_code, 401)
+
+
+class LastActivityTests(TestCase):
+    def setUp(self):
+        user_cache.clear()
+        activity_buffer.clear()
+
+    def login(self, name, last_activity):
+        user = CustomUser.objects.create(username=name, email=f'{name}@example.com', last_activity=last_activity)
+        client = Client()
+        client.cookies['access_token'] = str(AccessToken.for_user(user))
+        return user, client
+
+    def test_check_auth_writes_are_buffered_and_flushed_in_one_update(self):
+        hour_ago = timezone.now() - timedelta(hours=1)
+        sessions = [self.login(f'active{i}', hour_ago) for i in range(3)]
+        for _ in range(3):
+            for user, client in sessions:
+                with CaptureQueriesContext(connection) as queries:
+                    self.assertIsNotNone(client.get('/api/auth/check/').json()['user'])
+                self.assertFalse(any(q['sql'].startswith('UPDATE') for q in queries.captured_queries))
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(activity_buffer.flush(), 3)
+        self.assertEqual(sum(q['sql'].startswith('UPDATE') for q in queries.captured_queries), 1)
+        for user, _ in sessions:
+            user.refresh_from_db()
+            self.assertGreater(user.last_activity, hour_ago)
+
+    def test_flush_drops_the_cached_users(self):
+        hour_ago = timezone.now() - timedelta(hours=1)
+        user, client = self.login('cached', hour_ago)
+        client.get('/api/auth/check/')
+        self.assertEqual(user_cache.get(user.pk).last_activity, hour_ago)
+
+        activity_buffer.flush()
+        # The next lookup reads the row again instead of the stale copy.
+        self.assertGreater(user_cache.get(user.pk).last_activity, hour_ago)
+        # A copy loaded before the flush still reports the written time.
+        self.assertGreater(activity_buffer.last_seen(user), hour_ago)
+
+    def test_inactive_for_four_days_is_logged_out(self):
+        user, client = self.login('idle', timezone.now() - timedelta(days=4, minutes=1))
+        self.assertIsNone(client.get('/api/auth/check/').json()['user'])
+        self.assertEqual(activity_buffer.flush(), 0)
+
+
+class QueryInstrumentationTests(TestCase):
+    def test_disabled_by_default(self):
+        self.assertNotIn('Server-Timing', Client().get('/api/teachers/'))
+
+    @override_settings(SQL_INSTRUMENTATION=True, SQL_N_PLUS_ONE_THRESHOLD=2)
+    def test_reports_counts_and_repeated_queries(self):
+        user = CustomUser.objects.create(username='counted', email='counted@example.com')
+        for i in range(3):
+            teacher = Teacher.objects.create(name=f'Teacher {i}', governorate='Cairo', subject='Math')
+            Booking.objects.create(
+                user=user, teacher=teacher, date='2030-01-05', time='9:00 AM', place='Nasr City', subject='Math'
+            )
+        middleware = QueryInstrumentationMiddleware(
+            lambda request: HttpResponse(','.join(booking.teacher.name for booking in Booking.objects.all()))
+        )
+
+        with self.assertLogs('api.sql', level='INFO') as logs:
+            response = middleware(RequestFactory().get('/api/bookings/'))
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="\d+ queries"$')
+        self.assertTrue(any('Possible N+1' in line and 'api_teacher' in line for line in logs.output))
+
+
+class SyntheticDataTests(TestCase):
+    def test_derived_tables_match_generated_rows(self):
+        data = SyntheticData(users=40, teachers=6, bookings=300, ratings=25, notifications=120, batch_size=50).load()
+
+        self.assertEqual(Booking.objects.count(), 300)
+        self.assertTrue(Booking.objects.filter(user_id=data.user_ids[0]).exists())
+        for teacher in Teacher.objects.all():
+            ratings = list(Rating.objects.filter(teacher=teacher).values_list('rating', flat=True))
+            self.assertEqual(teacher.rating_count, len(ratings))
+            self.assertAlmostEqual(teacher.rating_sum, sum(ratings))
+            self.assertEqual(teacher.slots.count(), sum(len(times) for times in teacher.schedule.values()))
+
+        for booking in Booking.objects.all():
+            self.assertTrue(TeacherSlot.objects.filter(
+                teacher_id=booking.teacher_id, date=booking.date, time=booking.time, place=booking.place
+            ).exists())
+        for slot in SlotOccupancy.objects.all():
+            bookings = Booking.objects.filter(
+                teacher_id=slot.teacher_id, date=slot.date, time=slot.time, place=slot.place
+            )
+            self.assertEqual(slot.confirmed_count, bookings.filter(status__in=['confirmed', 'modified']).count())
+            self.assertEqual(slot.pending_count, bookings.filter(status='pending').count())
+        for counter in NotificationCounter.objects.all():
+            self.assertEqual(counter.unread, Notification.objects.filter(user_id=counter.pk, is_read=False).count())
+
+    def test_bookings_are_admitted_against_capacity(self):
+        # Two days of slots for 300 bookings fills most of them.
+        SyntheticData(users=40, teachers=6, bookings=300, days=2, ratings=0, notifications=0, batch_size=50).load()
+
+        for slot in SlotOccupancy.objects.all():
+            capacity = Teacher.objects.get(pk=slot.teacher_id).max_students_per_group
+            self.assertLessEqual(slot.confirmed_count, capacity)
+            if slot.pending_count:
+                self.assertEqual(slot.confirmed_count, capacity)
+        self.assertTrue(SlotOccupancy.objects.filter(pending_count__gt=0).exists())
+        pairs = list(Booking.objects.values_list('user_id', 'teacher_id', 'date', 'time', 'place'))
+        self.assertEqual(len(pairs), len(set(pairs)))
+
+
+class AdminBookingsListTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = CustomUser.objects.create(username='admin', email='admin@example.com', is_staff=True)
+        self.client.cookies['access_token'] = str(AccessToken.for_user(self.admin))
+
+    def create_bookings(self, count, status='confirmed', date='2030-01-05'):
+        teacher = Teacher.objects.create(name='Listed Teacher', governorate='Cairo', subject='Math')
+        users = CustomUser.objects.bulk_create([
+            CustomUser(username=f'listed{status}{i}', email=f'listed{status}{i}@example.com') for i in range(count)
+        ])
+        return teacher, Booking.objects.bulk_create([
+            Booking(user=user, teacher=teacher, date=date, time='9:00 AM', place='Nasr City',
+                    subject='Math', status=status)
+            for user in users
+        ])
+
+    def test_page_cost_does_not_grow_with_page_size(self):
+        self.create_bookings(30)
+        self.client.get('/api/bookings/all/')
+        cache.clear()
+        with CaptureQueriesContext(connection) as small:
+            self.client.get('/api/bookings/all/', {'page_size': 2})
+        cache.clear()
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get('/api/bookings/all/', {'page_size': 25})
+        self.assertEqual(len(small), len(large))
+        self.assertEqual(len(response.json()['results']), 25)
+
+    def test_filters_cursor_and_count(self):
+        teacher, pending = self.create_bookings(3, status='pending', date='2030-02-01')
+        self.create_bookings(4)
+
+        first = self.client.get('/api/bookings/all/', {'status': 'pending', 'page_size': 2}).json()
+        self.assertEqual(first['count'], 3)
+        second = self.client.get('/api/bookings/all/', {
+            'status': 'pending', 'page_size': 2, 'cursor': first['next'],
+        }).json()
+        self.assertIsNone(second['next'])
+        ids = [row['id'] for row in first['results'] + second['results']]
+        self.assertEqual(sorted(ids), sorted(booking.id for booking in pending))
+
+        dated = self.client.get('/api/bookings/all/', {'date_from': '2030-01-10', 'teacher': teacher.id}).json()
+        self.assertEqual(dated['count'], 3)
+        self.assertEqual(self.client.get('/api/bookings/all/', {'q': 'listedconfirmed1'}).json()['count'], 1)
+        self.assertEqual(self.client.get('/api/bookings/all/', {'status': 'done'}).status_code, 400)
+
+
+class AdminUserDirectoryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = CustomUser.objects.create(
+            username='admin', email='admin@example.com', is_staff=True,
+            date_joined=timezone.now() - timedelta(days=30),
+        )
+        self.client.cookies['access_token'] = str(AccessToken.for_user(self.admin))
+        now = timezone.now()
+        self.users = CustomUser.objects.bulk_create([
+            CustomUser(username='salma.h', email='Salma.Hassan@example.com', first_name='Salma', last_name='Hassan',
+                       phone_number='01012345678', date_joined=now - timedelta(days=2), last_activity=now),
+            CustomUser(username='omar99', email='omar@example.com', first_name='Omar', last_name='Saleh',
+                       phone_number='01298765432', date_joined=now - timedelta(days=1),
+                       last_activity=now - timedelta(days=60)),
+            CustomUser(username='nour', email='nour@example.com', first_name='Nour', last_name='Salem',
+                       date_joined=now, last_activity=now),
+        ])
+
+    def search(self, **params):
+        response = self.client.get('/api/users/all/', params)
+        self.assertEqual(response.status_code, 200)
+        return [row['username'] for row in response.json()['results']]
+
+    def test_compact_rows_newest_first_with_cursor(self):
+        first = self.client.get('/api/users/all/', {'page_size': 2}).json()
+        self.assertEqual(first['count'], 4)
+        self.assertEqual([row['username'] for row in first['results']], ['nour', 'omar99'])
+        self.assertNotIn('bio', first['results'][0])
+        second = self.client.get('/api/users/all/', {'page_size': 2, 'cursor': first['next']}).json()
+        self.assertEqual([row['username'] for row in second['results']], ['salma.h', 'admin'])
+        self.assertIsNone(second['next'])
+
+    def test_prefix_search(self):
+        self.assertEqual(self.search(q='SAL'), ['nour', 'omar99', 'salma.h'])
+        self.assertEqual(self.search(q='salma.hassan@'), ['salma.h'])
+        self.assertEqual(self.search(q='omar s'), ['omar99'])
+        self.assertEqual(self.search(q='01298'), ['omar99'])
+        self.assertEqual(self.search(q='assan'), [])
+
+    def test_filters(self):
+        self.assertEqual(self.search(is_staff='true'), ['admin'])
+        today = timezone.localdate()
+        self.assertEqual(self.search(joined_from=(today - timedelta(days=1)).isoformat(), is_staff='false'),
+                         ['nour', 'omar99'])
+        self.assertEqual(self.search(active_to=(today - timedelta(days=7)).isoformat()), ['omar99'])
+        self.assertEqual(self.client.get('/api/users/all/', {'joined_from': 'May'}).status_code, 400)
+
+
+class SparseFieldsetTests(TestCase):
+    def setUp(self):
+        user_cache.clear()
+        self.user = CustomUser.objects.create(username='sparse', email='sparse@example.com', first_name='Sara')
+        self.teacher = Teacher.objects.create(
+            name='Sparse Teacher', governorate='Cairo', subject='Math', schedule={'2030-01-05': {'9:00 AM': 'Maadi'}},
+        )
+        self.booking = Booking.objects.create(
+            user=self.user, teacher=self.teacher, date='2030-01-05', time='9:00 AM', place='Maadi', subject='Math',
+        )
+        Rating.objects.create(user=self.user, teacher=self.teacher, rating=4)
+        self.client.cookies['access_token'] = str(AccessToken.for_user(self.user))
+        self.client.get('/api/bookings/')
+
+    def get(self, path, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(path, params)
+        self.assertEqual(response.status_code, 200)
+        # Leave out the conditional-GET version lookup.
+        return response.json(), [
+            query['sql'] for query in queries.captured_queries if 'api_resourceversion' not in query['sql']
+        ]
+
+    def test_full_shape_without_parameters(self):
+        (booking,), queries = self.get('/api/bookings/')
+        self.assertEqual(booking['teacher']['schedule'], {'2030-01-05': {'9:00 AM': 'Maadi'}})
+        self.assertEqual(booking['user']['first_name'], 'Sara')
+        self.assertEqual(len(queries), 1)
+
+    def test_fields_trim_nested_objects_and_columns(self):
+        (booking,), (sql,) = self.get('/api/bookings/', fields='id,status,teacher.name')
+        self.assertEqual(booking, {'id': self.booking.id, 'status': 'confirmed', 'teacher': {'name': 'Sparse Teacher'}})
+        self.assertNotIn('api_customuser', sql)
+        self.assertNotIn('schedule', sql)
+
+    def test_unexpanded_relations_collapse_to_ids(self):
+        (booking,), (sql,) = self.get('/api/bookings/', fields='id,teacher,user')
+        self.assertEqual(booking, {'id': self.booking.id, 'teacher': self.teacher.id, 'user': self.user.id})
+        self.assertNotIn('JOIN', sql)
+
+        (booking,), _ = self.get('/api/bookings/', expand='teacher')
+        self.assertEqual(booking['user'], self.user.id)
+        self.assertEqual(booking['teacher']['name'], 'Sparse Teacher')
+
+    def test_ratings_expand_teacher(self):
+        (rating,), _ = self.get('/api/ratings/', fields='rating,teacher.name,teacher.rating')
+        self.assertEqual(rating, {'rating': 0.4, 'teacher': {'name': 'Sparse Teacher', 'rating': 0.4}})
+
+    def test_teacher_pages_load_ordering_columns(self):
+        page, queries = self.get('/api/teachers/', fields='id,name', sort='price', page_size=1)
+        self.assertEqual(page['results'], [{'id': self.teacher.id, 'name': 'Sparse Teacher'}])
+        # The page itself is one query; the total is counted separately.
+        self.assertEqual(len([sql for sql in queries if 'COUNT(' not in sql]), 1)
+        self.assertEqual(self.get('/api/profile/', fields='first_name')[0], {'first_name': 'Sara'})
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        user_cache.clear()
+        self.user = CustomUser.objects.create(username='etag', email='etag@example.com')
+        self.teacher = Teacher.objects.create(name='Cached Teacher', governorate='Cairo', subject='Math')
+        self.client.cookies['access_token'] = str(AccessToken.for_user(self.user))
+
+    def revalidate(self, path, response, **headers):
+        return self.client.get(path, HTTP_IF_NONE_MATCH=response['ETag'], **headers)
+
+    def test_unchanged_catalog_is_answered_without_serializing(self):
+        first = self.client.get('/api/teachers/')
+        self.assertEqual(first['Cache-Control'], 'public, no-cache')
+        with CaptureQueriesContext(connection) as queries:
+            second = self.revalidate('/api/teachers/', first)
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second.content, b'')
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(
+            self.client.get('/api/teachers/', HTTP_IF_MODIFIED_SINCE=first['Last-Modified']).status_code, 304
+        )
+        self.assertNotEqual(self.client.get('/api/teachers/?fields=id')['ETag'], first['ETag'])
+
+        self.teacher.price_per_session = 250
+        self.teacher.save()
+        self.assertEqual(self.revalidate('/api/teachers/', first).status_code, 200)
+        self.assertEqual(self.revalidate(f'/api/teachers/{self.teacher.pk}/', first).status_code, 200)
+
+    def test_cached_counts_follow_the_version(self):
+        cache.clear()
+        teachers = Teacher.objects.all()
+        self.assertEqual(cached_count(teachers, version='a'), 1)
+        Teacher.objects.bulk_create([Teacher(name='Uncounted', governorate='Cairo', subject='Math')])
+        self.assertEqual(cached_count(teachers, version='a'), 1)
+        self.assertEqual(cached_count(teachers, version='b'), 2)
+
+    def test_bookings_are_versioned_per_user(self):
+        first = self.client.get('/api/bookings/')
+        self.assertEqual(first['Cache-Control'], 'private, no-cache')
+        self.assertIn('Cookie', first['Vary'])
+        self.assertEqual(self.revalidate('/api/bookings/', first).status_code, 304)
+
+        other = CustomUser.objects.create(username='other', email='other@example.com')
+        Booking.objects.create(
+            user=other, teacher=self.teacher, date='2030-01-05', time='9:00 AM', place='Maadi', subject='Math'
+        )
+        self.assertEqual(self.revalidate('/api/bookings/', first).status_code, 304)
+
+        booking = Booking.objects.create(
+            user=self.user, teacher=self.teacher, date='2030-01-05', time='9:00 AM', place='Maadi', subject='Math'
+        )
+        second = self.revalidate('/api/bookings/', first)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(len(second.json()), 1)
+
+        Rating.objects.create(user=other, teacher=booking.teacher, rating=5)
+        self.assertEqual(self.revalidate('/api/bookings/', second).status_code, 200)
+        self.assertEqual(Client().get('/api/bookings/').status_code, 401)
+
+    def test_notifications_change_on_reads_and_broadcasts(self):
+        Notification.objects.create(user=self.user, title='Hi', message='Hello')
+        first = self.client.get('/api/notifications/')
+        self.assertEqual(self.revalidate('/api/notifications/', first).status_code, 304)
+
+        self.client.post('/api/notifications/mark-read/')
+        second = self.revalidate('/api/notifications/', first)
+        self.assertEqual(second.status_code, 200)
+        self.assertTrue(second.json()[0]['is_read'])
+
+        send_to_all('Holiday', 'No classes on Friday')
+        self.assertEqual(self.revalidate('/api/notifications/', second).status_code, 200)
+
+
+class AdminExportTests(TestCase):
+    def setUp(self):
+        user_cache.clear()
+        self.admin = CustomUser.objects.create(username='admin', email='admin@example.com', is_staff=True)
+        self.student = CustomUser.objects.create(username='student', email='student@example.com', first_name='سلمى')
+        self.client.cookies['access_token'] = str(AccessToken.for_user(self.admin))
+        teacher = Teacher.objects.create(name='Exported Teacher', governorate='Cairo', subject='Math')
+        Booking.objects.bulk_create([
+            Booking(user=self.student, teacher=teacher, date='2030-01-05', time='9:00 AM', place='Nasr City',
+                    subject='Math', status=status)
+            for status in ['confirmed', 'pending', 'cancelled']
+        ])
+
+    def test_csv_streams_filtered_rows(self):
+        response = self.client.get('/api/admin/export/bookings.csv', {'status': 'confirmed,pending'})
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn('attachment; filename="bookings-', response['Content-Disposition'])
+        rows = list(csv.DictReader(io.StringIO(response.getvalue().decode('utf-8-sig'))))
+        self.assertEqual([row['status'] for row in rows], ['confirmed', 'pending'])
+        self.assertEqual(rows[0]['teacher_name'], 'Exported Teacher')
+        self.assertEqual(rows[0]['user_username'], 'student')
+
+    def test_csv_neutralises_formulas(self):
+        CustomUser.objects.create(username='=HYPERLINK("http://evil")', email='evil@example.com',
+                                  first_name='+1', last_name='@SUM(A1)', phone_number='-2')
+        response = self.client.get('/api/admin/export/users.csv', {'q': 'evil'})
+        rows = list(csv.DictReader(io.StringIO(response.getvalue().decode('utf-8-sig'))))
+        self.assertEqual(
+            [(row['username'], row['first_name'], row['last_name'], row['phone_number']) for row in rows],
+            [('\'=HYPERLINK("http://evil")', "'+1", "'@SUM(A1)", "'-2")],
+        )
+        # Only text is escaped; ndjson is not read by spreadsheets.
+        self.assertEqual(rows[0]['is_staff'], 'False')
+        self.assertIn('"username":"=HYPERLINK', self.client.get('/api/admin/export/users.ndjson').getvalue().decode())
+
+    def test_ndjson_keeps_unicode(self):
+        response = self.client.get('/api/admin/export/users.ndjson')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        body = response.getvalue().decode()
+        self.assertIn('سلمى', body)
+        users = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([user['username'] for user in users], ['admin', 'student'])
+
+    def test_rejects_bad_requests(self):
+        self.assertEqual(self.client.get('/api/admin/export/ratings.csv').status_code, 404)
+        self.assertEqual(self.client.get('/api/admin/export/bookings.xml').status_code, 404)
+        self.assertEqual(self.client.get('/api/admin/export/bookings.csv', {'date_from': 'soon'}).status_code, 400)
+
+        client = Client()
+        self.assertEqual(client.get('/api/admin/export/bookings.csv').status_code, 401)
+        client.cookies['access_token'] = str(AccessToken.for_user(self.student))
+        self.assertEqual(client.get('/api/admin/export/bookings.csv').status_code, 403)
+
+    async def test_asgi_streams_without_buffering(self):
+        client = AsyncClient()
+        client.cookies['access_token'] = str(AccessToken.for_user(self.admin))
+        response = await client.get('/api/admin/export/notifications.csv')
+        self.assertTrue(response.is_async)
+        chunks = [chunk async for chunk in response.streaming_content]
+        self.assertTrue(chunks[0].startswith('\ufeffid,user_id'.encode()))
+
+
+class FastJSONTests(TestCase):
+    def test_renders_what_drf_renders(self):
+        data = {
+            'price': Decimal('250.50'),
+            'created_at': timezone.now(),
+            'date': timezone.localdate(),
+            'token': uuid.uuid4(),
+            'title': gettext_lazy('Notifications'),
+            'name': 'سلمى',
+            'slots': {1: ['9:00 AM', None, True, 1.5]},
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+        indented = FastJSONRenderer().render(data, 'application/json; indent=2')
+        self.assertEqual(indented, JSONRenderer().render(data, 'application/json; indent=2'))
+
+    def test_parses_utf8_and_rejects_malformed_bodies(self):
+        parser = FastJSONParser()
+        self.assertEqual(parser.parse(io.BytesIO('{"name": "سلمى"}'.encode())), {'name': 'سلمى'})
+        with self.assertRaisesMessage(ParseError, 'JSON parse error'):
+            parser.parse(io.BytesIO(b'{"name": '))
+
+        response = self.client.post('/api/login/', '{"email": ', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_compresses_responses_above_the_threshold(self):
+        Teacher.objects.bulk_create(
+            Teacher(name=f'Teacher {i}', governorate='Cairo', subject='Math') for i in range(20)
+        )
+        identity = self.client.get('/api/teachers/')
+        compressed = self.client.get('/api/teachers/', HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(compressed['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', compressed['Vary'])
+        self.assertTrue(compressed['ETag'].startswith('W/'))
+        self.assertEqual(gzip.decompress(compressed.content), identity.content)
+
+        with override_settings(COMPRESSION_MIN_LENGTH=len(identity.content) + 1):
+            response = Client().get('/api/teachers/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_leaves_event_streams_alone(self):
+        body = 'data: {}\n\n' * 500
+        middleware = CompressionMiddleware(lambda request: HttpResponse(body, content_type='text/event-stream'))
+        response = middleware(RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response.content.decode(), body)
+
+
+def jpeg_upload(name, size=(640, 480), orientation=6):
+    # Red on the left, blue on the right as stored.
+    image = Image.new('RGB', size, 'red')
+    image.paste('blue', (size[0] // 2, 0, size[0], size[1]))
+    exif = Image.Exif()
+    exif[0x0112] = orientation
+    exif[0x010F] = 'Test Camera'
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', exif=exif)
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+
+class ImageDerivativeTests(TestCase):
+    def setUp(self):
+        user_cache.clear()
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        media_settings = override_settings(MEDIA_ROOT=media.name)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+
+    def test_builds_webp_derivatives_without_exif(self):
+        teacher = Teacher.objects.create(
+            name='Pictured Teacher', governorate='Cairo', subject='Math', image=jpeg_upload('teacher.jpg')
+        )
+        before = self.client.get(f'/api/teachers/{teacher.pk}/').json()
+        self.assertEqual(before['image_card'], before['image'])
+
+        self.assertTrue(build_derivatives(Teacher, teacher.pk, 'image'))
+        teacher.refresh_from_db()
+        self.assertEqual(teacher.image_derivatives['source'], teacher.image.name)
+        with Image.open(teacher.image.storage.path(teacher.image_derivatives['card'])) as card:
+            self.assertEqual((card.format, card.size), ('WEBP', (300, 300)))
+            self.assertEqual(dict(card.getexif()), {})
+        self.assertFalse(build_derivatives(Teacher, teacher.pk, 'image'))
+
+        after = self.client.get(f'/api/teachers/{teacher.pk}/').json()
+        self.assertEqual(after['image'], before['image'])
+        self.assertTrue(after['image_card'].endswith('-card.webp'))
+        self.assertTrue(after['image_thumbnail'].endswith('-thumbnail.webp'))
+
+    def test_applies_the_exif_orientation(self):
+        user = CustomUser.objects.create(username='pictured', email='pictured@example.com')
+        user.profile_picture = jpeg_upload('avatar.jpg', size=(600, 200))
+        user.save()
+        build_derivatives(CustomUser, user.pk, 'profile_picture')
+        user.refresh_from_db()
+        with Image.open(user.profile_picture.storage.path(user.profile_picture_derivatives['thumbnail'])) as thumbnail:
+            # Orientation 6 turns the stored left half to the top.
+            self.assertEqual(thumbnail.size, (96, 96))
+            top, bottom = thumbnail.convert('RGB').getpixel((48, 10)), thumbnail.convert('RGB').getpixel((48, 86))
+            self.assertGreater(top[0], 200)
+            self.assertGreater(bottom[2], 200)
+
+        self.client.cookies['access_token'] = str(AccessToken.for_user(user))
+        profile = self.client.get('/api/profile/').json()
+        self.assertRegex(profile['profile_picture_thumbnail'], r'^http://testserver/media/derivatives/.+\.webp$')
+
+    def test_schedules_a_build_when_the_image_changes(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            teacher = Teacher.objects.create(name='New Teacher', governorate='Cairo', subject='Math')
+        self.assertEqual(callbacks, [])
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            teacher.image = jpeg_upload('new.jpg')
+            teacher.save()
+        self.assertEqual(len(callbacks), 1)
+
+        build_derivatives(Teacher, teacher.pk, 'image')
+        old_card = Teacher.objects.get(pk=teacher.pk).image_derivatives['card']
+        with self.captureOnCommitCallbacks() as callbacks:
+            Teacher.objects.get(pk=teacher.pk).save()
+        self.assertEqual(callbacks, [])
+
+        teacher.refresh_from_db()
+        teacher.image = jpeg_upload('replaced.jpg')
+        teacher.save()
+        self.assertTrue(build_derivatives(Teacher, teacher.pk, 'image'))
+        self.assertFalse(teacher.image.storage.exists(old_card))
+
+
+class BookingStatusTransitionTests(TestCase):
+    def setUp(self):
+        user_cache.clear()
+        self.teacher = Teacher.objects.create(
+            name='Transition Teacher', governorate='Cairo', subject='Math', max_students_per_group=1,
+            schedule={'2030-01-05': {'9:00 AM': 'Nasr City'}},
+        )
+        self.student = CustomUser.objects.create(username='student', email='student@example.com')
+        self.waiting = CustomUser.objects.create(username='waiting', email='waiting@example.com')
+        self.slot = {'teacher': self.teacher, 'date': '2030-01-05', 'time': '9:00 AM', 'place': 'Nasr City'}
+        self.confirmed = self.book(self.student)
+        self.pending = self.book(self.waiting)
+
+    def book(self, user):
+        status = SlotOccupancy.admit(self.teacher.pk, '2030-01-05', '9:00 AM', 'Nasr City', 1)
+        return Booking.objects.create(user=user, subject='Math', status=status, **self.slot)
+
+    def counts(self):
+        slot = SlotOccupancy.objects.get(teacher=self.teacher)
+        return slot.confirmed_count, slot.pending_count
+
+    def test_same_transition_twice_moves_the_counters_once(self):
+        self.assertEqual((self.confirmed.status, self.pending.status), ('confirmed', 'pending'))
+        first, second = Booking.objects.get(pk=self.confirmed.pk), Booking.objects.get(pk=self.confirmed.pk)
+        self.assertTrue(first.change_status('cancelled', 1))
+        self.assertFalse(second.change_status('cancelled', 1))
+        self.assertEqual(self.counts(), (0, 1))
+
+    def test_confirming_needs_a_free_seat(self):
+        self.assertFalse(self.pending.change_status('confirmed', 1))
+        self.assertEqual(Booking.objects.get(pk=self.pending.pk).status, 'pending')
+        self.assertEqual(self.counts(), (1, 1))
+
+        self.confirmed.change_status('cancelled', 1)
+        self.assertTrue(self.pending.change_status('confirmed', 1))
+        self.assertEqual(self.counts(), (1, 0))
+
+    def test_repeated_cancel_request_is_rejected(self):
+        self.client.cookies['access_token'] = str(AccessToken.for_user(self.student))
+        path = f'/api/bookings/{self.confirmed.pk}/'
+        first = self.client.patch(path, {'action': 'cancel'}, content_type='application/json')
+        second = self.client.patch(path, {'action': 'cancel'}, content_type='application/json')
+        self.assertEqual((first.status_code, second.status_code), (200, 400))
+        self.assertEqual(Notification.objects.filter(user=self.student).count(), 1)
+        # The freed seat went to the waitlisted booking, once.
+        self.assertEqual(Booking.objects.get(pk=self.pending.pk).status, 'confirmed')
+        self.assertEqual(self.counts(), (1, 0))
+
+    def test_reconcile_rebuilds_drifted_counters(self):
+        Booking.objects.filter(pk=self.confirmed.pk).update(status='modified')
+        Booking.objects.create(user=self.student, subject='Math', status='cancelled', **self.slot)
+        SlotOccupancy.objects.filter(teacher=self.teacher).update(confirmed_count=7, pending_count=0)
+        # A counter row with no bookings behind it.
+        SlotOccupancy.objects.create(teacher=self.teacher, date='2030-01-06', time='9:00 AM', place='Nasr City',
+                                     confirmed_count=2)
+
+        out = io.StringIO()
+        call_command('reconcile_slot_occupancy', stdout=out)
+        self.assertEqual(self.counts(), (1, 1))
+        self.assertEqual(SlotOccupancy.objects.count(), 1)
+        self.assertIn('2 were out of sync', out.getvalue())
+
+        out = io.StringIO()
+        call_command('reconcile_slot_occupancy', stdout=out)
+        self.assertEqual(self.counts(), (1, 1))
+        self.assertIn('0 were out of sync', out.getvalue())
+
+
+class RatingAggregateTests(TestCase):
+    def setUp(self):
+        self.teacher = Teacher.objects.create(name='Rated Teacher', governorate='Cairo', subject='Math')
+        self.students = [
+            CustomUser.objects.create(username=f'rater{i}', email=f'rater{i}@example.com') for i in range(3)
+        ]
+
+    def aggregates(self):
+        teacher = Teacher.objects.get(pk=self.teacher.pk)
+        return round(teacher.rating_sum, 3), teacher.rating_count, round(teacher.rating_avg, 3), teacher.is_top_rated
+
+    def test_create_update_and_delete_maintain_the_aggregates(self):
+        # Rating.save stores the 1-5 score divided by ten.
+        first = Rating.objects.create(user=self.students[0], teacher=self.teacher, rating=4)
+        Rating.objects.create(user=self.students[1], teacher=self.teacher, rating=2)
+        self.assertEqual(self.aggregates(), (0.6, 2, 0.3, False))
+
+        first.rating = 5
+        first.save()
+        self.assertEqual(self.aggregates(), (0.7, 2, 0.35, False))
+
+        first.delete()
+        self.assertEqual(self.aggregates(), (0.2, 1, 0.2, False))
+        Rating.objects.get().delete()
+        self.assertEqual(self.aggregates(), (0.0, 0, 0.0, False))
+
+    def test_teacher_edit_keeps_ratings_committed_after_loading(self):
+        loaded = Teacher.objects.get(pk=self.teacher.pk)
+        Rating.objects.create(user=self.students[0], teacher=self.teacher, rating=4)
+
+        serializer = TeacherSerializer(loaded, data={'price_per_session': '300.00'}, partial=True)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        with CaptureQueriesContext(connection) as queries:
+            serializer.save()
+        self.assertEqual(self.aggregates(), (0.4, 1, 0.4, False))
+        updates = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('UPDATE "api_teacher"')]
+        self.assertEqual(len(updates), 1)
+        self.assertNotIn('rating_sum', updates[0])
+
+    def test_rebuild_command_repairs_drifted_aggregates(self):
+        Rating.objects.create(user=self.students[0], teacher=self.teacher, rating=4)
+        Rating.objects.create(user=self.students[1], teacher=self.teacher, rating=3)
+        Teacher.objects.filter(pk=self.teacher.pk).update(rating_sum=9.0, rating_count=7, rating_avg=1.3, is_top_rated=True)
+
+        call_command('rebuild_rating_aggregates', stdout=io.StringIO())
+        self.assertEqual(self.aggregates(), (0.7, 2, 0.35, False))
+
+
+class TeacherCatalogTests(TestCase):
+    def setUp(self):
+        # Counts are cached per query for a minute.
+        cache.clear()
+        rows = [
+            ('Amal', 'Cairo', 'Math', 200, 'active', True),
+            ('Basem', 'Giza', 'Math', 150, 'active', False),
+            ('Dina', 'Cairo', 'Physics', 150, 'active', False),
+            ('Fady', 'Cairo', 'Math', 300, 'suspended', False),
+            ('Gehad', 'Alexandria', 'Arabic', 100, 'active', False),
+        ]
+        self.teachers = {
+            name: Teacher.objects.create(
+                name=name, governorate=governorate, subject=subject, price_per_session=price, status=status,
+                is_top_rated=top_rated, manually_set_top_rated=top_rated,
+            )
+            for name, governorate, subject, price, status, top_rated in rows
+        }
+
+    def names(self, **params):
+        response = self.client.get('/api/teachers/', params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return [teacher['name'] for teacher in response.json()['results']]
+
+    def test_filters(self):
+        self.assertEqual(self.names(), ['Amal', 'Basem', 'Dina', 'Gehad'])
+        self.assertEqual(self.names(status='all', subject='Math'), ['Amal', 'Basem', 'Fady'])
+        self.assertEqual(self.names(governorate='Cairo', subject='Math'), ['Amal'])
+        self.assertEqual(self.names(min_price='150', max_price='199'), ['Basem', 'Dina'])
+        self.assertEqual(self.names(top_rated='true'), ['Amal'])
+        self.assertEqual(self.names(q='phys'), ['Dina'])
+        self.assertEqual(self.client.get('/api/teachers/', {'subject': 'Math'}).json()['count'], 2)
+
+    def test_sort_and_cursor_walk(self):
+        for sort, expected in (
+            ('price', ['Gehad', 'Basem', 'Dina', 'Amal']),
+            ('-price', ['Amal', 'Dina', 'Basem', 'Gehad']),
+            ('-name', ['Gehad', 'Dina', 'Basem', 'Amal']),
+            ('rating', ['Amal', 'Basem', 'Dina', 'Gehad']),
+        ):
+            walked, params = [], {'sort': sort, 'page_size': 1}
+            while True:
+                page = self.client.get('/api/teachers/', params).json()
+                walked.extend(teacher['name'] for teacher in page['results'])
+                if not page['next']:
+                    break
+                params['cursor'] = page['next']
+            self.assertEqual(walked, expected, sort)
+
+    def test_unpaged_request_gets_one_bounded_page(self):
+        Teacher.objects.bulk_create(
+            Teacher(name=f'Extra {i}', governorate='Cairo', subject='Math') for i in range(30)
+        )
+        page = self.client.get('/api/teachers/').json()
+        self.assertEqual((len(page['results']), page['count']), (20, 34))
+        self.assertIsNotNone(page['next'])
+        self.assertEqual(len(self.client.get('/api/teachers/', {'page_size': 1000}).json()['results']), 34)
+
+    def test_count_is_current_after_a_write(self):
+        first = self.client.get('/api/teachers/')
+        self.assertEqual(first.json()['count'], 4)
+        Teacher.objects.create(name='Hana', governorate='Cairo', subject='Math')
+        second = self.client.get('/api/teachers/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.json()['count'], 5)
+        self.assertEqual(self.client.get('/api/teachers/', HTTP_IF_NONE_MATCH=second['ETag']).status_code, 304)
+
+    def test_rejects_bad_parameters(self):
+        for params in (
+            {'sort': 'age'}, {'min_price': 'cheap'}, {'min_price': 'NaN'}, {'min_price': 'sNaN'},
+            {'max_price': 'Infinity'}, {'max_price': '-inf'}, {'page_size': '0'}, {'cursor': 'garbage'},
+        ):
+            self.assertEqual(self.client.get('/api/teachers/', params).status_code, 400, params)
+
+
+class WaitlistPromotionTests(TestCase):
+    def setUp(self):
+        user_cache.clear()
+        self.first = CustomUser.objects.create(username='first', email='first@example.com')
+        self.second = CustomUser.objects.create(username='second', email='second@example.com')
+
+    def waitlisted_teacher(self, slots, waiting=1):
+        """A one-seat teacher with ``slots`` full slots and ``waiting`` pending bookings in each."""
+        schedule = {str(date(2030, 1, 1) + timedelta(days=i)): {'9:00 AM': 'Hall'} for i in range(slots)}
+        teacher = Teacher.objects.create(
+            name=f'Teacher {slots}', governorate='Cairo', subject='Math', max_students_per_group=1, schedule=schedule,
+        )
+        teacher.sync_slots()
+        for slot_date in schedule:
+            for user in [self.first] + [self.second] * waiting:
+                status = SlotOccupancy.admit(teacher.pk, slot_date, '9:00 AM', 'Hall', 1)
+                Booking.objects.create(
+                    user=user, teacher=teacher, subject='Math', date=slot_date, time='9:00 AM', place='Hall',
+                    status=status,
+                )
+        return teacher
+
+    def promoted_notifications(self):
+        return Notification.objects.filter(title='تم تأكيد حجزك')
+
+    def test_query_count_does_not_grow_with_slots(self):
+        captured = {}
+        for slots in (2, 40):
+            teacher = self.waitlisted_teacher(slots)
+            teacher.max_students_per_group = 2
+            teacher.save(update_fields=['max_students_per_group'])
+            with CaptureQueriesContext(connection) as queries:
+                promoted = promote_waitlist(teacher)
+            self.assertEqual(len(promoted), slots)
+            inserts = [q for q in queries.captured_queries if q['sql'].startswith('INSERT INTO "api_notification"')]
+            self.assertEqual(len(inserts), 1)
+            captured[slots] = len(queries)
+        self.assertEqual(captured[2], captured[40])
+        self.assertEqual(self.promoted_notifications().count(), 42)
+
+    def test_promotes_oldest_first(self):
+        teacher = self.waitlisted_teacher(1, waiting=3)
+        first_pending, second_pending, third_pending = Booking.objects.filter(status='pending').order_by('id')
+        # Creation order, not id order, decides.
+        now = timezone.now()
+        Booking.objects.filter(pk=third_pending.pk).update(created_at=now - timedelta(hours=2))
+        Booking.objects.filter(pk=first_pending.pk).update(created_at=now - timedelta(hours=1))
+        Booking.objects.filter(pk=second_pending.pk).update(created_at=now)
+
+        teacher.max_students_per_group = 3
+        teacher.save(update_fields=['max_students_per_group'])
+        promoted = promote_waitlist(teacher, [(date(2030, 1, 1), '9:00 AM', 'Hall')])
+        self.assertEqual([booking.pk for booking in promoted], [third_pending.pk, first_pending.pk])
+        self.assertEqual(Booking.objects.get(pk=second_pending.pk).status, 'pending')
+        slot = SlotOccupancy.objects.get(teacher=teacher)
+        self.assertEqual((slot.confirmed_count, slot.pending_count), (3, 1))
+
+    def test_cancelling_promotes_the_waitlist(self):
+        teacher = self.waitlisted_teacher(1)
+        confirmed = Booking.objects.get(user=self.first)
+        waiting = Booking.objects.get(user=self.second)
+        self.client.cookies['access_token'] = str(AccessToken.for_user(self.first))
+        response = self.client.patch(f'/api/bookings/{confirmed.pk}/', {'action': 'cancel'}, content_type='application/json')
+        self.assertEqual(response.status_code, 200, response.content)
+
+        self.assertEqual(Booking.objects.get(pk=waiting.pk).status, 'confirmed')
+        self.assertEqual(list(self.promoted_notifications().values_list('user', flat=True)), [self.second.pk])
+        slot = SlotOccupancy.objects.get(teacher=teacher)
+        self.assertEqual((slot.confirmed_count, slot.pending_count), (1, 0))
+
+    def test_raising_capacity_promotes_the_waitlist(self):
+        teacher = self.waitlisted_teacher(2, waiting=2)
+        serializer = TeacherSerializer(teacher, data={'max_students_per_group': 2}, partial=True)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        serializer.save()
+
+        self.assertEqual(Booking.objects.filter(teacher=teacher, status='confirmed').count(), 4)
+        self.assertEqual(Booking.objects.filter(teacher=teacher, status='pending').count(), 2)
+        self.assertEqual(self.promoted_notifications().filter(user=self.second).count(), 2)
+        self.assertEqual(
+            sorted(SlotOccupancy.objects.filter(teacher=teacher).values_list('confirmed_count', 'pending_count')),
+            [(2, 1), (2, 1)],
+        )
+
+
+class TeacherSearchTests(TestCase):
+    def setUp(self):
+        for name, status in (
+            ('محمد حسن', 'active'), ('Mohamed Samir', 'active'), ('Mohammed Adel', 'active'),
+            ('Mohamed Suspended', 'suspended'), ('Karim Nabil', 'active'),
+        ):
+            Teacher.objects.create(name=name, governorate='Cairo', subject='Math', status=status)
+
+    def search(self, query, **params):
+        response = self.client.get('/api/teachers/search/', {'q': query, **params})
+        self.assertEqual(response.status_code, 200, response.content)
+        return {teacher['name'] for teacher in response.json()}
+
+    def test_arabic_and_latin_spellings_match_each_other(self):
+        for query in ('محمد', 'Mohamed', 'mohammed'):
+            self.assertEqual(self.search(query), {'محمد حسن', 'Mohamed Samir', 'Mohammed Adel'}, query)
+
+    def test_suspended_teachers_are_not_found(self):
+        self.assertNotIn('Mohamed Suspended', self.search('suspended'))
+
+    def test_rename_refreshes_the_index(self):
+        teacher = Teacher.objects.get(name='Karim Nabil')
+        serializer = TeacherSerializer(teacher, data={'name': 'Yasser Nabil'}, partial=True)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        serializer.save()
+        self.assertEqual(self.search('karim'), set())
+        self.assertEqual(self.search('yasser'), {'Yasser Nabil'})
+
+    def test_rejects_a_bad_limit(self):
+        response = self.client.get('/api/teachers/search/', {'q': 'mohamed', 'limit': 'many'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(len(self.search('mohamed', limit=1)), 1)
+
+
+class TeacherScheduleTests(TestCase):
+    def setUp(self):
+        self.schedule = {
+            '2030-01-05': {'9:00 AM': 'Hall', '1:30 PM': 'Lab'},
+            '2030-01-06': {'9:00 AM': 'Hall'},
+            # Legacy, undated and misdated entries are not slots.
+            '10:00 AM': 'Hall',
+            'someday': {'9:00 AM': 'Hall'},
+            '2030-02-30': {'9:00 AM': 'Hall'},
+        }
+        self.teacher = Teacher.objects.create(
+            name='Schedule Teacher', governorate='Cairo', subject='Math', max_students_per_group=2,
+            schedule=self.schedule,
+        )
+        self.teacher.sync_slots()
+        self.student = CustomUser.objects.create(username='student', email='student@example.com')
+
+    def slots(self):
+        return sorted(TeacherSlot.objects.filter(teacher=self.teacher).values_list(
+            'date', 'time', 'start_time', 'place', 'capacity'
+        ))
+
+    def test_sync_slots_follows_the_schedule(self):
+        self.assertEqual(self.slots(), [
+            (date(2030, 1, 5), '1:30 PM', datetime_time(13, 30), 'Lab', 2),
+            (date(2030, 1, 5), '9:00 AM', datetime_time(9, 0), 'Hall', 2),
+            (date(2030, 1, 6), '9:00 AM', datetime_time(9, 0), 'Hall', 2),
+        ])
+        kept = TeacherSlot.objects.get(teacher=self.teacher, date=date(2030, 1, 5), time='9:00 AM').pk
+
+        self.teacher.schedule = {'2030-01-05': {'9:00 AM': 'Annex'}, '2030-01-07': {'11:00 AM': 'Hall'}}
+        self.teacher.max_students_per_group = 4
+        self.teacher.sync_slots()
+        self.assertEqual(self.slots(), [
+            (date(2030, 1, 5), '9:00 AM', datetime_time(9, 0), 'Annex', 4),
+            (date(2030, 1, 7), '11:00 AM', datetime_time(11, 0), 'Hall', 4),
+        ])
+        self.assertTrue(TeacherSlot.objects.filter(pk=kept).exists())
+
+    def test_available_slots(self):
+        suspended = Teacher.objects.create(name='Away', governorate='Cairo', subject='Math', status='suspended',
+                                           schedule={'2030-01-05': {'8:00 AM': 'Hall'}})
+        suspended.sync_slots()
+        SlotOccupancy.admit(self.teacher.pk, '2030-01-05', '1:30 PM', 'Lab', 2)
+
+        response = self.client.get('/api/slots/', {'date': '2030-01-05'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(slot['time'], slot['place'], slot['available_seats']) for slot in response.json()],
+            [('9:00 AM', 'Hall', 2), ('1:30 PM', 'Lab', 1)],
+        )
+        self.assertEqual(self.client.get('/api/slots/', {'date': '2030-01-05', 'teacher': suspended.pk}).json(), [])
+        self.assertEqual(self.client.get('/api/slots/').status_code, 400)
+        self.assertEqual(self.client.get('/api/slots/', {'date': '05/01/2030'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/slots/', {'date': '2030-01-05', 'teacher': 'abc'}).status_code, 400)
+
+    def check_changes(self, old_schedule, new_schedule):
+        return self.client.post(f'/api/teachers/{self.teacher.pk}/check-schedule-changes/', {
+            'old_schedule': old_schedule,
+            'new_schedule': new_schedule,
+            'new_slot': {'date': '2030-01-08', 'time': '9:00 AM', 'place': 'Hall'},
+        }, content_type='application/json')
+
+    def test_check_schedule_changes_marks_moved_bookings(self):
+        moved = Booking.objects.create(
+            user=self.student, teacher=self.teacher, subject='Math', date='2030-01-05', time='9:00 AM', place='Hall'
+        )
+        kept = Booking.objects.create(
+            user=self.student, teacher=self.teacher, subject='Math', date='2030-01-06', time='9:00 AM', place='Hall'
+        )
+        new_schedule = {'2030-01-05': {'1:30 PM': 'Lab'}, '2030-01-06': {'9:00 AM': 'Hall'}, '9:00 AM': 'Hall'}
+        response = self.check_changes(self.schedule, new_schedule)
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual([booking['id'] for booking in response.json()['affected_bookings']], [moved.pk])
+        self.assertEqual(Booking.objects.get(pk=moved.pk).status, 'modified')
+        self.assertEqual(Booking.objects.get(pk=kept.pk).status, 'confirmed')
+
+    def test_check_schedule_changes_rejects_malformed_input(self):
+        self.assertEqual(self.check_changes(['2030-01-05'], {}).status_code, 400)
+        self.assertEqual(self.check_changes({}, 'none').status_code, 400)
+        response = self.client.post(f'/api/teachers/{self.teacher.pk}/check-schedule-changes/', {
+            'old_schedule': {}, 'new_schedule': {}, 'new_slot': ['2030-01-08'],
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        # Entries that name no slot are skipped rather than failing the request.
+        response = self.check_changes({'9:00 AM': 'Hall', 'later': {'9:00 AM': 'Hall'}, '2030-02-30': {}}, {})
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertNotIn('affected_bookings', response.json())
+
+
+class TeacherGradeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.teacher = self.create(name='Amal', grade=['First', 'Second', 'First', ''])
+        self.create(name='Basem', grade=['Second'], subject='Physics')
+        self.create(name='Dina', grade=['Second'], governorate='Giza')
+
+    def create(self, **data):
+        serializer = TeacherSerializer(data={'governorate': 'Cairo', 'subject': 'Math', **data})
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        return serializer.save()
+
+    def update(self, **data):
+        serializer = TeacherSerializer(self.teacher, data=data, partial=True)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        serializer.save()
+
+    def grade_rows(self):
+        return sorted(TeacherGrade.objects.filter(teacher=self.teacher).values_list('grade', 'subject', 'governorate'))
+
+    def names(self, **params):
+        return [teacher['name'] for teacher in self.client.get('/api/teachers/', params).json()['results']]
+
+    def test_grade_rows_follow_the_teacher(self):
+        self.assertEqual(self.grade_rows(), [('First', 'Math', 'Cairo'), ('Second', 'Math', 'Cairo')])
+        self.update(grade=['Third'])
+        self.assertEqual(self.grade_rows(), [('Third', 'Math', 'Cairo')])
+        self.update(subject='Physics', governorate='Giza')
+        self.assertEqual(self.grade_rows(), [('Third', 'Physics', 'Giza')])
+        self.update(price_per_session='90.00')
+        self.assertEqual(self.grade_rows(), [('Third', 'Physics', 'Giza')])
+
+    def test_grade_filter(self):
+        self.assertEqual(self.names(grade='Second'), ['Amal', 'Basem', 'Dina'])
+        self.assertEqual(self.names(grade='Second', subject='Math'), ['Amal', 'Dina'])
+        self.assertEqual(self.names(grade='Second', subject='Math', governorate='Cairo'), ['Amal'])
+        self.assertEqual(self.names(grade='Third'), [])
+
+        self.update(grade=['Third'])
+        self.assertEqual(self.names(grade='Second'), ['Basem', 'Dina'])
+        self.assertEqual(self.names(grade='Third'), ['Amal'])
+
+
+class BenchApiSmokeTests(TestCase):
+    def test_every_route_is_covered_and_succeeds(self):
+        user_cache.clear()
+        ds = bench_api.Dataset(0, teachers=4, users=6, bookings=12, ratings=4, notifications=6, days=6)
+        command = bench_api.Command(stdout=io.StringIO(), stderr=io.StringIO())
+        report = command.run(ds, {'iterations': 1, 'warmup': 0, 'only': None})
+
+        self.assertEqual(report['uncovered'], [])
+        failed = {
+            endpoint['name']: endpoint['status'] for endpoint in report['endpoints']
+            if any(not code.startswith('2') for code in endpoint['status'])
+        }
+        self.assertEqual(failed, {})
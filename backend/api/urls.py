@@ -1,16 +1,19 @@
-from django.urls import path
+from django.urls import path, register_converter
+from .converters import SignedIntConverter
 from .views import (
     RegisterView, LoginView, CheckAuthView, LogoutView,
     TeachersView, BookingsView, RatingsView,RefreshTokenView,
     ForgotPasswordView, ResetPasswordView,ProfileView,SettingsView,CheckScheduleChangesView,NotifyStudentsView
     ,NotificationListView,unread_count,CreateNotificationView,mark_notifications_read,DeleteNotificationView,RatedTeacherView,AllBookingsView,
-    AllUsersView,GetBookingsBySlotView
+    AllUsersView,GetBookingsBySlotView,TeacherSearchView,AvailableSlotsView,notification_stream,AdminExportView
     
 )
 from . import views
 from django.conf import settings
 from django.conf.urls.static import static
 
+register_converter(SignedIntConverter, 'sint')
+
 urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
     path('login/', LoginView.as_view(), name='login'),
@@ -20,6 +23,7 @@ urlpatterns = [
     path('auth/logout/', LogoutView.as_view(), name='logout'),
     path('auth/refresh/', RefreshTokenView.as_view(), name='token-refresh'),
     path('teachers/', TeachersView.as_view(), name='teachers-list'),
+    path('teachers/search/', TeacherSearchView.as_view(), name='teacher-search'),
     path('teachers/<int:pk>/', TeachersView.as_view(), name='teacher-detail'), 
     path('ratings/', RatingsView.as_view(), name='ratings'),
     path('bookings/', BookingsView.as_view(), name='bookings'),
@@ -31,11 +35,14 @@ urlpatterns = [
     path('teachers/<int:pk>/notify-students/', NotifyStudentsView.as_view(), name='notify-students'),
     path("notifications/", NotificationListView.as_view(), name="notification-list"),
     path("notifications/unread-count/", unread_count, name="unread-count"),
+    path("notifications/stream/", notification_stream, name="notification-stream"),
     path("notifications/create/", CreateNotificationView.as_view(), name="create-notification"),
     path("notifications/mark-read/", mark_notifications_read, name="mark-notifications-read"),
-    path('notifications/delete/<int:notification_id>/', DeleteNotificationView.as_view(), name='delete-notification'),
+    path('notifications/delete/<sint:notification_id>/', DeleteNotificationView.as_view(), name='delete-notification'),
     path('bookings/all/', AllBookingsView.as_view(), name='all-bookings'),
     path('teachers/<int:teacher_id>/bookings-by-slot/', GetBookingsBySlotView.as_view(), name='bookings-by-slot'),
+    path('slots/', AvailableSlotsView.as_view(), name='available-slots'),
     path('users/<int:user_id>/', AllUsersView.as_view(), name='user-detail'),
     path('users/all/', AllUsersView.as_view(), name='all-users'),
+    path('admin/export/<slug:resource>.<slug:export_format>', AdminExportView.as_view(), name='admin-export'),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
@@ -0,0 +1,97 @@
+import atexit
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from ..authentication import user_cache
+from ..models import CustomUser
+
+
+def _write_interval():
+    return timedelta(seconds=getattr(settings, 'LAST_ACTIVITY_WRITE_INTERVAL', 300))
+
+
+def _flush_interval():
+    return getattr(settings, 'LAST_ACTIVITY_FLUSH_INTERVAL', 30)
+
+
+class ActivityBuffer:
+    """Coalesces ``last_activity`` writes.
+
+    A user's activity is written at most once per
+    ``LAST_ACTIVITY_WRITE_INTERVAL``. Pending timestamps are kept in memory
+    and flushed every ``LAST_ACTIVITY_FLUSH_INTERVAL`` seconds as a single
+    ``bulk_update`` (one UPDATE ... CASE). ``last_seen`` merges the pending
+    and recently written values with the stored one, so the stored value is
+    never more than one write interval behind. ``bulk_update`` sends no
+    signals, so ``flush`` drops the written users from ``user_cache`` itself.
+    """
+
+    max_batch = 500
+
+    def __init__(self):
+        self._pending = {}
+        self._written = {}
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def last_seen(self, user):
+        with self._lock:
+            buffered = (self._pending.get(user.pk), self._written.get(user.pk))
+        values = [value for value in (user.last_activity, *buffered) if value]
+        return max(values, default=None)
+
+    def touch(self, user, now=None):
+        now = now or timezone.now()
+        with self._lock:
+            written = [value for value in (user.last_activity, self._written.get(user.pk)) if value]
+            if written and now - max(written) < _write_interval():
+                return
+            self._pending[user.pk] = now
+            flush_now = len(self._pending) >= self.max_batch or _flush_interval() <= 0
+            if not flush_now and self._timer is None:
+                self._timer = threading.Timer(_flush_interval(), self._flush_from_timer)
+                self._timer.daemon = True
+                self._timer.start()
+        if flush_now:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            cutoff = timezone.now() - _write_interval()
+            self._written = {pk: value for pk, value in self._written.items() if value > cutoff}
+            self._written.update(pending)
+        if pending:
+            CustomUser.objects.bulk_update(
+                [CustomUser(pk=pk, last_activity=value) for pk, value in pending.items()],
+                ['last_activity'],
+                batch_size=self.max_batch,
+            )
+            for pk in pending:
+                user_cache.invalidate(pk)
+        return len(pending)
+
+    def clear(self):
+        """Forget pending and recent writes without writing them."""
+        with self._lock:
+            self._pending, self._written = {}, {}
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+    def _flush_from_timer(self):
+        try:
+            self.flush()
+        finally:
+            close_old_connections()
+
+
+activity_buffer = ActivityBuffer()
+atexit.register(activity_buffer.flush)
@@ -0,0 +1,104 @@
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Q
+from django.utils import timezone
+
+from ..models import EmailOutbox
+
+MAX_ATTEMPTS = 5
+BACKOFF_BASE = 30
+BACKOFF_MAX = 3600
+CLAIM_TIMEOUT = timedelta(minutes=10)
+
+
+def queue_email(subject, message, recipient_list, from_email=None):
+    """Queue a message for the ``deliver_outbox`` worker.
+
+    The row is written on the caller's connection, so inside
+    ``transaction.atomic()`` the email is committed (or rolled back)
+    together with the change it describes.
+    """
+    return EmailOutbox.objects.create(
+        subject=subject,
+        body=message,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        to=list(recipient_list),
+    )
+
+
+def backoff_delay(attempts):
+    return timedelta(seconds=min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_MAX))
+
+
+def claim_batch(batch_size):
+    """Mark up to ``batch_size`` due rows as ``sending`` for this worker.
+
+    Rows left in ``sending`` by a worker that died are reclaimed once
+    ``CLAIM_TIMEOUT`` has passed.
+    """
+    now = timezone.now()
+    due = EmailOutbox.objects.filter(
+        Q(status='queued', next_attempt_at__lte=now)
+        | Q(status='sending', claimed_at__lt=now - CLAIM_TIMEOUT)
+    ).order_by('next_attempt_at', 'id')
+    ids = list(due.values_list('id', flat=True)[:batch_size])
+    if not ids:
+        return []
+
+    token = uuid.uuid4()
+    due.filter(id__in=ids).update(status='sending', claim_token=token, claimed_at=now)
+    return list(EmailOutbox.objects.filter(claim_token=token, status='sending').order_by('id'))
+
+
+def _reschedule(row, error, max_attempts):
+    row.attempts += 1
+    row.last_error = str(error)
+    row.claim_token = None
+    if row.attempts >= max_attempts:
+        row.status = 'failed'
+    else:
+        row.status = 'queued'
+        row.next_attempt_at = timezone.now() + backoff_delay(row.attempts)
+    row.save(update_fields=['attempts', 'last_error', 'claim_token', 'status', 'next_attempt_at'])
+    return row.status
+
+
+def deliver_outbox(batch_size=100, max_attempts=MAX_ATTEMPTS, connection=None):
+    """Send one batch of queued emails over a single connection.
+
+    Returns ``(sent, retried, failed)`` counts. A message that raises is
+    rescheduled with exponential backoff and marked ``failed`` after
+    ``max_attempts`` tries; the rest of the batch is still delivered.
+    """
+    rows = claim_batch(batch_size)
+    if not rows:
+        return 0, 0, 0
+
+    connection = connection or get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as e:
+        outcomes = [_reschedule(row, e, max_attempts) for row in rows]
+        return 0, outcomes.count('queued'), outcomes.count('failed')
+
+    sent_ids = []
+    outcomes = []
+    try:
+        for row in rows:
+            message = EmailMessage(row.subject, row.body, row.from_email, row.to, connection=connection)
+            try:
+                connection.send_messages([message])
+            except Exception as e:
+                outcomes.append(_reschedule(row, e, max_attempts))
+            else:
+                sent_ids.append(row.id)
+    finally:
+        connection.close()
+        EmailOutbox.objects.filter(id__in=sent_ids).update(
+            status='sent', sent_at=timezone.now(), claim_token=None, last_error=''
+        )
+
+    return len(sent_ids), outcomes.count('queued'), outcomes.count('failed')
@@ -0,0 +1,110 @@
+import csv
+import io
+import json
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+
+from ..filters import filter_bookings, filter_notifications, filter_users
+from ..models import Booking, CustomUser, Notification
+
+CHUNK_SIZE = 2000
+
+# resource -> (base queryset, exported columns, filter function). Columns are
+# values() arguments; (name, expression) pairs become aliased columns.
+EXPORTS = {
+    'bookings': (
+        lambda: Booking.objects.all(),
+        ['id', 'user_id', ('user_username', F('user__username')), ('user_email', F('user__email')),
+         'teacher_id', ('teacher_name', F('teacher__name')), 'subject', 'date', 'time', 'place', 'status',
+         'rated', 'created_at'],
+        filter_bookings,
+    ),
+    'users': (
+        lambda: CustomUser.objects.all(),
+        ['id', 'username', 'email', 'first_name', 'last_name', 'phone_number', 'is_staff', 'is_superuser',
+         'date_joined', 'last_activity'],
+        filter_users,
+    ),
+    'notifications': (
+        lambda: Notification.objects.all(),
+        ['id', 'user_id', ('user_username', F('user__username')), 'title', 'message', 'is_read', 'created_at'],
+        filter_notifications,
+    ),
+}
+
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def export_rows(resource, params):
+    """(column names, row iterator) for ``resource`` filtered by ``params``.
+
+    Rows are plain dicts read with ``iterator()``, so only one chunk of the
+    result is in memory at a time. Filters raise ValidationError before any
+    row is read.
+    """
+    queryset, columns, filter_queryset = EXPORTS[resource]
+    queryset = filter_queryset(queryset(), params)
+    fields = [column for column in columns if isinstance(column, str)]
+    aliases = dict(column for column in columns if not isinstance(column, str))
+    names = [column if isinstance(column, str) else column[0] for column in columns]
+    rows = queryset.order_by('id').values(*fields, **aliases).iterator(chunk_size=CHUNK_SIZE)
+    return names, rows
+
+
+def _chunks(rows):
+    while chunk := list(islice(rows, CHUNK_SIZE)):
+        yield chunk
+
+
+# Spreadsheet apps run a cell that starts with one of these as a formula.
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def csv_cell(value):
+    """``value`` as a CSV cell a spreadsheet shows as text: user-entered
+    strings that would start a formula get a leading apostrophe."""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def csv_stream(names, rows):
+    # The byte order mark makes spreadsheet apps read the Arabic text as UTF-8.
+    buffer = io.StringIO()
+    buffer.write('﻿')
+    writer = csv.writer(buffer)
+    writer.writerow(names)
+    for chunk in _chunks(rows):
+        writer.writerows([csv_cell(row[name]) for name in names] for row in chunk)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def ndjson_stream(names, rows):
+    encoder = DjangoJSONEncoder(ensure_ascii=False, separators=(',', ':'))
+    for chunk in _chunks(rows):
+        yield ''.join(encoder.encode({name: row[name] for name in names}) + '\n' for row in chunk).encode()
+
+
+STREAMS = {'csv': csv_stream, 'ndjson': ndjson_stream}
+
+
+async def aiter_sync(iterator):
+    """Serve a sync iterator to an ASGI server one chunk at a time.
+
+    Django buffers a sync iterator completely before sending it over ASGI.
+    Here every ``next()`` runs on the thread the view ran on, which also
+    owns the database connection.
+    """
+    done = object()
+    while (chunk := await sync_to_async(next)(iterator, done)) is not done:
+        yield chunk
@@ -0,0 +1,130 @@
+import io
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# size -> (width, height). The images they replace are shown with
+# object-fit: cover, so derivatives are cropped to fill the box, at twice
+# the CSS size for high-density screens.
+SIZES = {'thumbnail': (96, 96), 'card': (300, 300)}
+FORMAT = 'WEBP'
+EXTENSION = 'webp'
+QUALITY = 80
+
+executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'IMAGE_DERIVATIVE_WORKERS', 2), thread_name_prefix='image-derivatives'
+)
+
+
+def derivatives_field(field_name):
+    return f'{field_name}_derivatives'
+
+
+def derivative_name(name, size):
+    return f'derivatives/{os.path.splitext(name)[0]}-{size}.{EXTENSION}'
+
+
+def has_derivatives(image, derivatives):
+    """Whether ``derivatives`` were built from the current ``image`` file."""
+    return bool(image) and derivatives.get('source') == image.name
+
+
+def render_derivatives(file):
+    """{size: encoded bytes} for the image in ``file``.
+
+    JPEGs are decoded at the smallest scale that still covers the largest
+    size. The EXIF orientation is applied to the pixels; EXIF and XMP are
+    not written to the derivatives, the colour profile is.
+    """
+    with Image.open(file) as original:
+        original.draft('RGB', max(SIZES.values()))
+        image = ImageOps.exif_transpose(original)
+        icc_profile = original.info.get('icc_profile')
+    alpha = image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info
+    image = image.convert('RGBA' if alpha else 'RGB')
+
+    rendered = {}
+    for size, box in SIZES.items():
+        buffer = io.BytesIO()
+        ImageOps.fit(image, box, Image.Resampling.LANCZOS).save(
+            buffer, FORMAT, quality=QUALITY, icc_profile=icc_profile
+        )
+        rendered[size] = buffer.getvalue()
+    return rendered
+
+
+def build_derivatives(model, pk, field_name):
+    """Write the derivatives of row ``pk``'s image and record them on it.
+
+    The files are rendered outside any transaction; the row is only
+    updated if its image is still the one they were built from. Saving
+    with ``update_fields`` runs the post_save signals, which bump the
+    resource versions and drop cached users. Returns whether the row was
+    updated.
+    """
+    field = derivatives_field(field_name)
+    instance = model.objects.filter(pk=pk).first()
+    image = getattr(instance, field_name, None)
+    if not image or has_derivatives(image, getattr(instance, field)):
+        return False
+
+    source = image.name
+    storage = image.storage
+    with image.open('rb'):
+        rendered = render_derivatives(image)
+    derivatives = {'source': source}
+    for size, content in rendered.items():
+        name = derivative_name(source, size)
+        storage.delete(name)
+        derivatives[size] = storage.save(name, ContentFile(content))
+
+    with transaction.atomic():
+        instance = model.objects.select_for_update().filter(pk=pk).first()
+        current = instance is not None and getattr(instance, field_name).name == source
+        if current:
+            stale = getattr(instance, field)
+            setattr(instance, field, derivatives)
+            instance.save(update_fields=[field])
+
+    if current:
+        for size in SIZES:
+            if stale.get(size) not in (None, derivatives[size]):
+                storage.delete(stale[size])
+    else:
+        # Replaced or deleted meanwhile; the new image has its own job.
+        for size in SIZES:
+            storage.delete(derivatives[size])
+    return current
+
+
+def _build_in_worker(model, pk, field_name):
+    try:
+        build_derivatives(model, pk, field_name)
+    except Exception:
+        logger.exception(f'Building {field_name} derivatives failed for {model.__name__} {pk}')
+    finally:
+        close_old_connections()
+
+
+def schedule_derivatives(instance, field_name):
+    """Queue a derivative build for ``instance`` if its image has none.
+
+    The job is handed to the worker pool once the current transaction
+    commits, so the worker reads the saved row.
+    """
+    field = derivatives_field(field_name)
+    # A deferred image was not loaded, so it cannot have been replaced.
+    if {field_name, field} & instance.get_deferred_fields():
+        return
+    image = getattr(instance, field_name)
+    if not image or has_derivatives(image, getattr(instance, field)):
+        return
+    model, pk = type(instance), instance.pk
+    transaction.on_commit(lambda: executor.submit(_build_in_worker, model, pk, field_name))
@@ -0,0 +1,201 @@
+from collections import Counter
+from heapq import merge
+
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from ..events import publish_on_commit
+from ..models import Broadcast, BroadcastReceipt, CustomUser, Notification, NotificationCounter, ResourceVersion
+
+# Broadcasts share the notification id space with negative ids, so the feed
+# is ordered on (created_at, feed_id) and the delete endpoint can address
+# either kind of row.
+FEED_ORDERING = ('-created_at', '-feed_id')
+
+
+def send_to_all(title, message, created_by=None, audience=None):
+    """Store a notification for every user as a single Broadcast row."""
+    if audience is None:
+        audience = CustomUser.objects.count()
+    broadcast = Broadcast.objects.create(
+        title=title, message=message, created_by=created_by, recipient_count=audience
+    )
+    publish_on_commit()
+    return broadcast
+
+
+def visible_broadcasts(user):
+    """Broadcasts sent since ``user`` joined that they have not dismissed,
+    annotated with their ``is_read`` state."""
+    receipts = BroadcastReceipt.objects.filter(broadcast=OuterRef('pk'), user=user)
+    return Broadcast.objects.filter(created_at__gte=user.date_joined).exclude(
+        Exists(receipts.filter(is_dismissed=True))
+    ).annotate(is_read=Exists(receipts.filter(is_read=True)))
+
+
+def personal_feed(user):
+    return Notification.objects.filter(user=user).annotate(feed_id=F('id'))
+
+
+def broadcast_feed(user):
+    return visible_broadcasts(user).annotate(feed_id=-F('id'))
+
+
+def feed_item(row):
+    if isinstance(row, Notification):
+        return row
+    return Notification(
+        id=row.feed_id,
+        title=row.title,
+        message=row.message,
+        created_at=row.created_at,
+        is_read=row.is_read,
+    )
+
+
+def notifications_for(user):
+    """Personal notifications and broadcasts for ``user``, newest first."""
+    rows = merge(
+        personal_feed(user).order_by(*FEED_ORDERING),
+        broadcast_feed(user).order_by(*FEED_ORDERING),
+        key=lambda row: (row.created_at, row.feed_id),
+        reverse=True,
+    )
+    return [feed_item(row) for row in rows]
+
+
+def feed_position(user):
+    """The (created_at, feed_id) key of the newest item in the feed."""
+    newest = [
+        source.order_by(*FEED_ORDERING).values_list('created_at', 'feed_id').first()
+        for source in (personal_feed(user), broadcast_feed(user))
+    ]
+    return max(filter(None, newest), default=None)
+
+
+def notifications_after(user, position, limit=50):
+    """Feed items newer than ``position``, oldest first, and the position
+    of the last one returned."""
+    sources = [personal_feed(user), broadcast_feed(user)]
+    if position is not None:
+        created_at, feed_id = position
+        newer = Q(created_at__gt=created_at) | Q(created_at=created_at, feed_id__gt=feed_id)
+        sources = [source.filter(newer) for source in sources]
+    rows = list(merge(
+        *(source.order_by('created_at', 'feed_id')[:limit] for source in sources),
+        key=lambda row: (row.created_at, row.feed_id),
+    ))[:limit]
+    if rows:
+        position = (rows[-1].created_at, rows[-1].feed_id)
+    return [feed_item(row) for row in rows], position
+
+
+def _latest_broadcast_id():
+    return Broadcast.objects.order_by('-id').values('id')[:1]
+
+
+def _rebuild_counter(user):
+    with transaction.atomic():
+        latest = Broadcast.objects.order_by('-id').values_list('id', flat=True).first() or 0
+        unread = (
+            Notification.objects.filter(user=user, is_read=False).count()
+            + visible_broadcasts(user).filter(id__lte=latest, is_read=False).count()
+        )
+        NotificationCounter.objects.update_or_create(
+            user=user, defaults={'unread': unread, 'broadcast_mark': latest}
+        )
+    return unread
+
+
+def unread_count_for(user):
+    """Read the user's unread counter.
+
+    A normal poll is a single primary-key read. Broadcasts sent since the
+    last poll are folded into the counter once, and a missing counter row
+    is rebuilt from the tables.
+    """
+    row = NotificationCounter.objects.filter(pk=user.pk).annotate(
+        latest_broadcast=Coalesce(Subquery(_latest_broadcast_id()), 0)
+    ).values_list('unread', 'broadcast_mark', 'latest_broadcast').first()
+    if row is None:
+        return _rebuild_counter(user)
+
+    unread, mark, latest = row
+    if latest > mark:
+        added = visible_broadcasts(user).filter(id__gt=mark, id__lte=latest, is_read=False).count()
+        NotificationCounter.objects.filter(pk=user.pk, broadcast_mark=mark).update(
+            unread=F('unread') + added, broadcast_mark=latest
+        )
+        unread += added
+    return unread
+
+
+def _read_broadcasts(user, broadcast_ids):
+    """Write read receipts for ``broadcast_ids`` and take the ones already
+    counted (at or below the counter's mark) off the unread counter."""
+    broadcast_ids = list(broadcast_ids)
+    if not broadcast_ids:
+        return
+    BroadcastReceipt.objects.bulk_create(
+        [BroadcastReceipt(broadcast_id=broadcast_id, user=user, is_read=True) for broadcast_id in broadcast_ids],
+        update_conflicts=True,
+        unique_fields=['user', 'broadcast'],
+        update_fields=['is_read'],
+    )
+    mark = NotificationCounter.objects.filter(pk=user.pk).values_list('broadcast_mark', flat=True).first()
+    if mark is not None:
+        NotificationCounter.adjust({user.pk: -sum(1 for broadcast_id in broadcast_ids if broadcast_id <= mark)})
+
+
+def mark_read(user, ids=None, through=None):
+    """Mark notifications read: every one, the ``ids`` given (negative for
+    broadcasts), or everything at and after the feed position ``through``
+    (a Q built by ``KeysetPagination.through``). Returns how many changed."""
+    personal = personal_feed(user).filter(is_read=False)
+    broadcasts = broadcast_feed(user).filter(is_read=False)
+    if ids is not None:
+        personal = personal.filter(id__in=[i for i in ids if i > 0])
+        broadcasts = broadcasts.filter(id__in=[-i for i in ids if i < 0])
+    elif through is not None:
+        personal = personal.filter(through)
+        broadcasts = broadcasts.filter(through)
+
+    with transaction.atomic():
+        updated = personal.update(is_read=True)
+        NotificationCounter.adjust({user.pk: -updated})
+        broadcast_ids = list(broadcasts.values_list('id', flat=True))
+        _read_broadcasts(user, broadcast_ids)
+        if updated or broadcast_ids:
+            ResourceVersion.bump(ResourceVersion.notifications(user.pk))
+    return updated + len(broadcast_ids)
+
+
+def dismiss(user, notification_id):
+    """Delete a personal notification or hide a broadcast (negative id).
+    Returns False when ``user`` cannot see the notification."""
+    if notification_id > 0:
+        return Notification.objects.filter(id=notification_id, user=user).delete()[0] > 0
+
+    broadcast_id = -notification_id
+    is_read = visible_broadcasts(user).filter(id=broadcast_id).values_list('is_read', flat=True).first()
+    if is_read is None:
+        return False
+    with transaction.atomic():
+        BroadcastReceipt.objects.update_or_create(
+            broadcast_id=broadcast_id, user=user, defaults={'is_dismissed': True}
+        )
+        ResourceVersion.bump(ResourceVersion.notifications(user.pk))
+        if not is_read:
+            NotificationCounter.objects.filter(pk=user.pk, broadcast_mark__gte=broadcast_id).update(
+                unread=Greatest(F('unread') - 1, Value(0))
+            )
+            publish_on_commit([user.pk])
+    return True
+
+
+def notify_created(notifications):
+    """Count unread notifications inserted with ``bulk_create``, which
+    skips the post_save signal."""
+    NotificationCounter.adjust(Counter(n.user_id for n in notifications if not n.is_read))
+    ResourceVersion.bump(*(ResourceVersion.notifications(n.user_id) for n in notifications))
@@ -0,0 +1,34 @@
+from datetime import date, datetime
+
+SLOT_TIME_FORMATS = ["%I:%M %p", "%H:%M", "%H:%M:%S"]
+
+
+def parse_slot_time(value):
+    value = (value or '').strip()
+    for fmt in SLOT_TIME_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).time()
+        except ValueError:
+            continue
+    return None
+
+
+def iter_schedule(schedule):
+    """Yield (date, time, place) for each slot in a Teacher.schedule dict.
+
+    The schedule is shaped ``{"YYYY-MM-DD": {"9:00 AM": "place"}}``. Entries
+    in any other shape (such as the undated ``{"9:00 AM": "place"}`` left by
+    older seed data) are skipped.
+    """
+    if not isinstance(schedule, dict):
+        return
+    for date_str, times in schedule.items():
+        if not isinstance(times, dict):
+            continue
+        try:
+            slot_date = date.fromisoformat(date_str)
+        except (TypeError, ValueError):
+            continue
+        for time, place in times.items():
+            if isinstance(time, str) and isinstance(place, str):
+                yield slot_date, time, place
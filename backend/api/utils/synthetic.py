@@ -0,0 +1,288 @@
+import random
+import time
+from collections import Counter, defaultdict
+from datetime import timedelta
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.db import reset_queries, transaction
+from django.utils import timezone
+
+from .. import search
+from ..models import (
+    Booking, CustomUser, Notification, NotificationCounter, RatedTeacher, Rating, SlotOccupancy, Teacher,
+    TeacherGrade, TeacherSlot,
+)
+from .schedule import iter_schedule, parse_slot_time
+
+# Every generated account logs in with this password.
+PASSWORD = 'Seed#Pass1'
+
+FIRST_NAMES = [
+    'Ahmed', 'Mohamed', 'Mahmoud', 'Omar', 'Youssef', 'Mostafa', 'Khaled', 'Hassan', 'Ali', 'Karim',
+    'Mariam', 'Nour', 'Salma', 'Aya', 'Fatma', 'Habiba', 'Rawda', 'Maryam', 'Yasmin', 'Hana',
+]
+LAST_NAMES = [
+    'Hassan', 'Ibrahim', 'Abdelrahman', 'Saleh', 'Mansour', 'Fathy', 'Shawky', 'Nasser', 'Gamal', 'Fouad',
+]
+ARABIC_NAMES = ['محمد', 'أحمد', 'محمود', 'مصطفى', 'خالد', 'مريم', 'فاطمة', 'نور', 'سلمى', 'هبة']
+GOVERNORATES = ['Cairo', 'Giza', 'Alexandria', 'Dakahlia', 'Sharqia', 'Qalyubia', 'Gharbia', 'Monufia']
+SUBJECTS = ['Arabic', 'Mathematics', 'English', 'Physics', 'Chemistry', 'Biology', 'French', 'History']
+PLACES = [
+    'Nasr City', 'Heliopolis', 'Maadi', 'Dokki', 'Giza Square', 'Sheikh Zayed', 'Tahrir Street', 'Smouha',
+    'Ramses Square', 'Pyramids', 'Mohandessin', 'Shubra',
+]
+TIMES = ['9:00 AM', '12:00 PM', '3:00 PM', '6:00 PM', '8:00 PM']
+GRADES = ['1', '2', '3', '4', '5', '6', '7', '8', '9', '10', '11', '12']
+# Statuses bookings are drawn with; an active booking that finds its slot
+# full joins the waitlist as pending instead, as SlotOccupancy.admit does.
+BOOKING_STATUSES = (('confirmed', 70), ('cancelled', 17), ('modified', 5))
+# Draws allowed per booking to find a user who has not booked the slot.
+BOOKING_ATTEMPTS = 20
+NOTIFICATION_TEMPLATES = [
+    ('تم تأكيد الحجز', 'تم تأكيد حجزك مع {teacher} لمادة {subject}.'),
+    ('تم إلغاء الحجز', 'تم إلغاء حجزك مع {teacher} لمادة {subject}.'),
+    ('تغيير في الموعد', 'تم تغيير موعد حصتك مع {teacher}.'),
+]
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class SyntheticData:
+    """Deterministic bulk loader for production-sized data.
+
+    All rows come from one seeded RNG and are written with ``bulk_create``
+    in batches, so nothing is held in memory but ids, per-slot counters
+    and the booked (user, slot) pairs. ``bulk_create`` skips ``save()`` and the signals, so the
+    derived rows (grades, slots, occupancy, rating aggregates, unread
+    counters, search index) are written here too. Schedules span ``days``
+    days centred on today, in the ``{date: {time: place}}`` shape that
+    ``BookingSerializer.validate`` checks.
+
+    The first user always has a booking and every 50th notification, so
+    benchmarks have an account with a populated history.
+    """
+
+    def __init__(self, seed=0, users=100_000, teachers=10_000, bookings=2_000_000, ratings=200_000,
+                 notifications=1_000_000, days=28, batch_size=2000, log=None):
+        self.rng = random.Random(seed)
+        self.counts = {'users': max(users, 1), 'teachers': max(teachers, 1), 'bookings': bookings,
+                       'ratings': ratings, 'notifications': notifications}
+        self.days = max(days, 1)
+        self.batch_size = batch_size
+        self.log = log or (lambda message: None)
+        self.today = timezone.localdate()
+        self.password = make_password(PASSWORD)
+        self.admin = None
+        self.user_ids = []
+        self.teacher_ids = []
+        self.slots = []
+        self.ratings = []
+
+    def load(self):
+        with transaction.atomic():
+            self.step('users', self.load_users)
+            self.step('teachers', self.load_teachers)
+            self.step('bookings', self.load_bookings)
+            self.step('ratings', self.load_ratings)
+            self.step('notifications', self.load_notifications)
+        self.step('search index', lambda: search.rebuild_index(Teacher.objects.all(), batch_size=self.batch_size))
+        return self
+
+    def step(self, name, load):
+        started = time.perf_counter()
+        count = load()
+        self.log(f'{name}: {count} rows in {time.perf_counter() - started:.1f}s')
+
+    def insert(self, model, rows):
+        """bulk_create ``rows`` batch by batch; returns the new pks."""
+        pks = []
+        for batch in batched(rows, self.batch_size):
+            pks.extend(obj.pk for obj in model.objects.bulk_create(batch))
+            # Under DEBUG every multi-row INSERT would stay in connection.queries.
+            reset_queries()
+        return pks
+
+    def load_users(self):
+        rng = self.rng
+        now = timezone.now()
+        self.admin = CustomUser.objects.create(
+            username='admin', email='admin@example.com', password=self.password,
+            first_name='Admin', last_name='EduBridge', is_staff=True, is_superuser=True,
+        )
+
+        def users():
+            for i in range(self.counts['users']):
+                first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+                joined = now - timedelta(days=rng.random() * 365)
+                yield CustomUser(
+                    username=f'{first}{last}{i}'.lower(),
+                    email=f'student{i}@example.com',
+                    phone_number=f'01{rng.choice("0125")}{i:08d}',
+                    first_name=first,
+                    last_name=last,
+                    password=self.password,
+                    date_joined=joined,
+                    last_activity=joined + (now - joined) * rng.random(),
+                )
+
+        self.user_ids = self.insert(CustomUser, users())
+        return len(self.user_ids) + 1
+
+    def make_schedule(self):
+        rng = self.rng
+        places = rng.sample(PLACES, 3)
+        first_day = self.today - timedelta(days=self.days // 2)
+        schedule = {}
+        for offset in range(self.days):
+            if schedule and rng.random() < 0.4:
+                continue
+            times = sorted(rng.sample(TIMES, rng.randint(1, 3)), key=TIMES.index)
+            schedule[(first_day + timedelta(days=offset)).isoformat()] = {t: rng.choice(places) for t in times}
+        return schedule
+
+    def load_teachers(self):
+        rng = self.rng
+        count = self.counts['teachers']
+        # Ratings are drawn before the teachers are written so the
+        # aggregates go in with the rows instead of a second pass.
+        pairs = set()
+        while len(pairs) < min(self.counts['ratings'], count * len(self.user_ids)):
+            pairs.add((rng.randrange(len(self.user_ids)), rng.randrange(count)))
+        self.ratings = sorted((user, teacher, rng.randint(1, 5) / 10.0) for user, teacher in pairs)
+        totals = defaultdict(lambda: [0.0, 0])
+        for _, teacher, rating in self.ratings:
+            totals[teacher][0] += rating
+            totals[teacher][1] += 1
+
+        def teachers():
+            for i in range(count):
+                rating_sum, rating_count = totals.get(i, (0.0, 0))
+                name = (
+                    f'{rng.choice(ARABIC_NAMES)} {rng.choice(ARABIC_NAMES)}' if rng.random() < 0.3
+                    else f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}'
+                )
+                teacher = Teacher(
+                    name=name,
+                    governorate=rng.choice(GOVERNORATES),
+                    subject=rng.choice(SUBJECTS),
+                    grade=sorted(rng.sample(GRADES, rng.randint(1, 4)), key=int),
+                    price_per_session=rng.randrange(100, 500, 25),
+                    max_students_per_group=rng.choice([8, 10, 12, 15]),
+                    schedule=self.make_schedule(),
+                    status='suspended' if rng.random() < 0.05 else 'active',
+                    rating_sum=rating_sum,
+                    rating_count=rating_count,
+                    rating_avg=rating_sum / rating_count if rating_count else 0.0,
+                )
+                teacher.sync_top_rated()
+                yield teacher
+
+        grades = []
+        slots = []
+        for batch in batched(teachers(), self.batch_size):
+            Teacher.objects.bulk_create(batch)
+            for teacher in batch:
+                self.teacher_ids.append(teacher.pk)
+                schedule = list(iter_schedule(teacher.schedule))
+                self.slots.append((teacher.pk, teacher.subject, teacher.max_students_per_group, schedule))
+                grades.extend(
+                    TeacherGrade(teacher=teacher, grade=grade, subject=teacher.subject, governorate=teacher.governorate)
+                    for grade in teacher.grade
+                )
+                slots.extend(
+                    TeacherSlot(
+                        teacher=teacher, date=slot_date, time=slot_time, start_time=parse_slot_time(slot_time),
+                        place=place, capacity=teacher.max_students_per_group,
+                    )
+                    for slot_date, slot_time, place in schedule
+                )
+            self.insert(TeacherGrade, grades)
+            self.insert(TeacherSlot, slots)
+            grades, slots = [], []
+        return len(self.teacher_ids)
+
+    def load_bookings(self):
+        rng = self.rng
+        statuses, weights = zip(*BOOKING_STATUSES)
+        occupancy = defaultdict(Counter)
+
+        booked = set()
+
+        def draw(i):
+            # A user books a slot at most once, as BookingSerializer requires.
+            for attempt in range(BOOKING_ATTEMPTS):
+                user_id = self.user_ids[0] if i == 0 and attempt == 0 else rng.choice(self.user_ids)
+                teacher_id, subject, capacity, schedule = rng.choice(self.slots)
+                slot = rng.choice(schedule)
+                if (user_id, teacher_id, *slot) not in booked:
+                    booked.add((user_id, teacher_id, *slot))
+                    return user_id, teacher_id, subject, capacity, slot
+            return None
+
+        def bookings():
+            for i in range(self.counts['bookings']):
+                drawn = draw(i)
+                if drawn is None:
+                    continue
+                user_id, teacher_id, subject, capacity, slot = drawn
+                status = rng.choices(statuses, weights)[0]
+                # Touch the slot even for cancellations, as reconcile_slot_occupancy does.
+                counts = occupancy[(teacher_id, *slot)]
+                if status != 'cancelled' and counts['confirmed_count'] >= capacity:
+                    status = 'pending'
+                field = SlotOccupancy.counter_field(status)
+                if field:
+                    counts[field] += 1
+                slot_date, slot_time, place = slot
+                yield Booking(
+                    user_id=user_id, teacher_id=teacher_id, date=slot_date, time=slot_time, place=place,
+                    subject=subject, status=status,
+                    rated=status == 'confirmed' and slot_date < self.today and rng.random() < 0.3,
+                )
+
+        total = len(self.insert(Booking, bookings()))
+        self.insert(SlotOccupancy, (
+            SlotOccupancy(teacher_id=teacher_id, date=slot_date, time=slot_time, place=place, **counts)
+            for (teacher_id, slot_date, slot_time, place), counts in occupancy.items()
+        ))
+        return total
+
+    def load_ratings(self):
+        self.insert(Rating, (
+            Rating(user_id=self.user_ids[user], teacher_id=self.teacher_ids[teacher], rating=rating)
+            for user, teacher, rating in self.ratings
+        ))
+        self.insert(RatedTeacher, (
+            RatedTeacher(user_id=self.user_ids[user], teacher_id=self.teacher_ids[teacher])
+            for user, teacher, _ in self.ratings
+        ))
+        return len(self.ratings)
+
+    def load_notifications(self):
+        rng = self.rng
+        unread = Counter()
+
+        def notifications():
+            for i in range(self.counts['notifications']):
+                user_id = self.user_ids[0] if i % 50 == 0 else rng.choice(self.user_ids)
+                title, message = rng.choice(NOTIFICATION_TEMPLATES)
+                is_read = rng.random() < 0.6
+                if not is_read:
+                    unread[user_id] += 1
+                yield Notification(
+                    user_id=user_id,
+                    title=title,
+                    message=message.format(teacher=rng.choice(FIRST_NAMES), subject=rng.choice(SUBJECTS)),
+                    is_read=is_read,
+                )
+
+        total = len(self.insert(Notification, notifications()))
+        self.insert(NotificationCounter, (
+            NotificationCounter(user_id=user_id, unread=count) for user_id, count in unread.items()
+        ))
+        return total
@@ -0,0 +1,91 @@
+from collections import Counter
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Case, Exists, F, IntegerField, OuterRef, Q, Value, When, Window
+from django.db.models.functions import RowNumber
+from django.utils.translation import gettext as _
+
+from ..models import Booking, Notification, ResourceVersion, SlotOccupancy, TeacherSlot
+from .notifications import notify_created
+
+
+def _slot_filter(slots):
+    return reduce(or_, (Q(date=date, time=time, place=place) for date, time, place in slots))
+
+
+def promote_waitlist(teacher, slots=None):
+    """Move pending bookings into free seats, oldest first.
+
+    ``slots`` is an iterable of ``(date, time, place)`` keys; ``None`` means
+    every slot in the teacher's current schedule. The number of queries does not depend on how
+    many slots or bookings are involved: one read of the occupancy counters,
+    one read of the head of each waitlist, then one bulk update per table
+    and one bulk insert of notifications. Returns the promoted bookings.
+    """
+    capacity = teacher.max_students_per_group
+    with transaction.atomic():
+        occupancy = SlotOccupancy.objects.select_for_update().filter(
+            teacher=teacher, pending_count__gt=0, confirmed_count__lt=capacity
+        )
+        if slots is None:
+            occupancy = occupancy.filter(Exists(TeacherSlot.objects.filter(
+                teacher_id=OuterRef('teacher_id'), date=OuterRef('date'), time=OuterRef('time'), place=OuterRef('place')
+            )))
+        else:
+            slots = list(slots)
+            if not slots:
+                return []
+            occupancy = occupancy.filter(_slot_filter(slots))
+        free_seats = {(row.date, row.time, row.place): (row.pk, capacity - row.confirmed_count) for row in occupancy}
+        if not free_seats:
+            return []
+
+        open_slots = SlotOccupancy.objects.filter(
+            pk__in=[pk for pk, _seats in free_seats.values()],
+            date=OuterRef('date'), time=OuterRef('time'), place=OuterRef('place'),
+        )
+        queue = Booking.objects.filter(Exists(open_slots), teacher=teacher, status='pending').annotate(
+            position=Window(
+                RowNumber(),
+                partition_by=[F('date'), F('time'), F('place')],
+                order_by=[F('created_at').asc(), F('id').asc()],
+            )
+        ).filter(position__lte=max(seats for _pk, seats in free_seats.values()))
+
+        promoted = []
+        taken = Counter()
+        for booking in queue.order_by('created_at', 'id'):
+            key = (booking.date, booking.time, booking.place)
+            if taken[key] < free_seats[key][1]:
+                booking.status = 'confirmed'
+                promoted.append(booking)
+                taken[key] += 1
+        if not promoted:
+            return []
+
+        Booking.objects.bulk_update(promoted, ['status'], batch_size=500)
+        ResourceVersion.bump(*(ResourceVersion.bookings(booking.user_id) for booking in promoted))
+        moved = Case(
+            *[When(pk=free_seats[key][0], then=Value(count)) for key, count in taken.items()],
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+        SlotOccupancy.objects.filter(pk__in=[free_seats[key][0] for key in taken]).update(
+            confirmed_count=F('confirmed_count') + moved,
+            pending_count=F('pending_count') - moved,
+        )
+        notifications = Notification.objects.bulk_create([
+            Notification(
+                user_id=booking.user_id,
+                title=_('تم تأكيد حجزك'),
+                message=_(
+                    f'حجزك مع {teacher.name} لمادة {booking.subject} في {booking.date} الساعة {booking.time} ({booking.place}) تم تأكيده.'
+                ),
+                is_read=False,
+            )
+            for booking in promoted
+        ], batch_size=500)
+        notify_created(notifications)
+    return promoted
@@ -1,26 +1,53 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework_simplejwt.tokens import RefreshToken, AccessToken
-from .models import CustomUser, Teacher, Booking, Rating,Notification,RatedTeacher
+from rest_framework_simplejwt.tokens import RefreshToken
+from .models import CustomUser, Teacher, Booking, Rating,Notification,RatedTeacher,TeacherSlot,SlotOccupancy,ResourceVersion
 from rest_framework_simplejwt.exceptions import TokenError
-from .serializers import UserSerializer, TeacherSerializer, BookingSerializer, RatingSerializer,NotificationSerializer,RatedTeacherSerializer
+from rest_framework.exceptions import ValidationError
+from .serializers import UserSerializer, AdminUserSerializer, TeacherSerializer, BookingSerializer, RatingSerializer,NotificationSerializer,RatedTeacherSerializer,TeacherSlotSerializer
 from .models import CustomUser, PasswordResetToken
-from django.core.mail import send_mail
 from datetime import timedelta
-from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+from rest_framework.parsers import MultiPartParser, FormParser
 from django.contrib.auth.hashers import check_password
 from datetime import timedelta
+import json
 import logging
 from django.conf import settings
 from rest_framework.decorators import api_view , authentication_classes
 from rest_framework import generics
 from django.utils import timezone
-from .authentication import CookieJWTAuthentication
+from .authentication import CookieJWTAuthentication, cookie_user
 from django.utils.translation import gettext as _
 from django.utils.timezone import localtime 
 from datetime import datetime
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import transaction
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from django.db.models import OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from .conditional import conditional
+from .fieldsets import fieldset_context, select_fields
+from .filters import (
+    BOOKING_ORDERING, USER_ORDERING, _int_param, filter_bookings, filter_teachers, filter_users, teacher_ordering,
+)
+from .pagination import KeysetPagination, cached_count
+from .renderers import FastJSONParser
+from .events import Subscription
+from .search import search_teacher_ids
+from .utils.activity import activity_buffer
+from .utils.email_utils import queue_email
+from .utils.export import EXPORTS, FORMATS, STREAMS, aiter_sync, export_rows
+from .utils.notifications import (
+    FEED_ORDERING, broadcast_feed, dismiss, feed_item, feed_position, mark_read, notifications_after,
+    notifications_for, personal_feed,
+    send_to_all as send_to_all_users, unread_count_for,
+)
+from .utils.schedule import iter_schedule
+from .utils.waitlist import promote_waitlist
 
 logger = logging.getLogger(__name__)
 def is_admin_user(request):
@@ -31,10 +58,13 @@ def is_admin_user(request):
             status=status.HTTP_401_UNAUTHORIZED
         )
     try:
-        token = AccessToken(access_token)
-        user_id = token['user_id']
-        user = CustomUser.objects.get(id=user_id)
-        return (user.is_superuser or user.is_staff), user
+        user = cookie_user(request)
+        if not (user.is_superuser or user.is_staff):
+            return False, Response(
+                {'detail': 'You do not have permission to perform this action.'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        return True, user
     except (TokenError, CustomUser.DoesNotExist):
         return False, Response(
             {'detail': 'Invalid token.'},
@@ -84,7 +114,7 @@ class LoginView(APIView):
 
 
             user.last_activity = timezone.now()
-            user.save()
+            user.save(update_fields=['last_activity'])
 
             response = Response({
                 'user': serializer.data,
@@ -124,24 +154,22 @@ class CheckAuthView(APIView):
             return Response({'user': None}, status=status.HTTP_200_OK)
 
         try:
-            token = AccessToken(access_token)
-            user_id = token['user_id']
-            user = CustomUser.objects.get(id=user_id)
+            user = cookie_user(request)
 
             current_time = timezone.now()
             local_last_activity = localtime(user.last_activity) if user.last_activity else None
             local_current_time = localtime(current_time)
 
-            if user.last_activity:
-                time_difference = current_time - user.last_activity
+            last_seen = activity_buffer.last_seen(user)
+            if last_seen:
+                time_difference = current_time - last_seen
                 if time_difference > timedelta(days=4):
                     response = Response({'user': None}, status=status.HTTP_200_OK)
                     response.delete_cookie('access_token')
                     response.delete_cookie('refresh_token')
                     return response
 
-            user.last_activity = timezone.now()
-            user.save()
+            activity_buffer.touch(user, current_time)
             serializer = UserSerializer(user)
             return Response({
                 'user': serializer.data,
@@ -161,23 +189,57 @@ class LogoutView(APIView):
         return response
     
 
+class TeacherSearchView(APIView):
+    default_limit = 20
+    max_limit = 50
+
+    @conditional(ResourceVersion.TEACHERS, public=True, no_cache=True)
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response([])
+        try:
+            limit = min(int(request.query_params.get('limit', self.default_limit)), self.max_limit)
+        except ValueError:
+            return Response({"detail": "limit must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+
+        teacher_ids = search_teacher_ids(query, max(limit, 1))
+        context = fieldset_context(request)
+        teachers = select_fields(Teacher.objects.all(), TeacherSerializer, context).in_bulk(teacher_ids)
+        ranked = [teachers[teacher_id] for teacher_id in teacher_ids if teacher_id in teachers]
+        serializer = TeacherSerializer(ranked, many=True, context=context)
+        return Response(serializer.data)
+
+
 class TeachersView(APIView):
-    parser_classes = [MultiPartParser, FormParser, JSONParser]
+    parser_classes = [MultiPartParser, FormParser, FastJSONParser]
+    page_size = 20
+    max_page_size = 100
 
+    @conditional(ResourceVersion.TEACHERS, public=True, no_cache=True)
     def get(self, request, pk=None):
+        context = fieldset_context(request)
         if pk is not None:
             try:
-                teacher = Teacher.objects.get(id=pk)
-                serializer = TeacherSerializer(teacher)
+                teacher = select_fields(Teacher.objects.all(), TeacherSerializer, context).get(id=pk)
+                serializer = TeacherSerializer(teacher, context=context)
                 return Response(serializer.data)
             except Teacher.DoesNotExist:
                 return Response(
                     {"detail": "Teacher not found."},
                     status=status.HTTP_404_NOT_FOUND
                 )
-        teachers = Teacher.objects.all()
-        serializer = TeacherSerializer(teachers, many=True)
-        return Response(serializer.data)
+        teachers = filter_teachers(Teacher.objects.all(), request.query_params)
+        ordering = teacher_ordering(request.query_params)
+        # Always a page, so no request reads the whole catalog.
+        paginator = KeysetPagination(ordering, self.page_size, self.max_page_size)
+        page = paginator.paginate_queryset(select_fields(teachers, TeacherSerializer, context, ordering), request)
+        serializer = TeacherSerializer(page, many=True, context=context)
+        return Response({
+            'count': cached_count(teachers, version=request.resource_versions[ResourceVersion.TEACHERS]),
+            'next': paginator.get_next_cursor(),
+            'results': serializer.data,
+        })
 
     def post(self, request):
         is_admin, response = is_admin_user(request)
@@ -270,6 +332,8 @@ class TeachersView(APIView):
 
 
 class BookingsView(APIView):
+    # Bookings embed their teacher.
+    @conditional(ResourceVersion.TEACHERS, ResourceVersion.bookings, private=True, no_cache=True)
     def get(self, request):
         access_token = request.COOKIES.get('access_token')
         if not access_token:
@@ -279,11 +343,10 @@ class BookingsView(APIView):
             )
 
         try:
-            token = AccessToken(access_token)
-            user_id = token['user_id']
-            user = CustomUser.objects.get(id=user_id)
-            bookings = Booking.objects.filter(user=user).order_by('-created_at')
-            serializer = BookingSerializer(bookings, many=True)
+            user = cookie_user(request)
+            context = fieldset_context(request)
+            bookings = select_fields(Booking.objects.filter(user=user), BookingSerializer, context, ['created_at'])
+            serializer = BookingSerializer(bookings.order_by('-created_at'), many=True, context=context)
             return Response(serializer.data)
         except (TokenError, CustomUser.DoesNotExist) as e:
             return Response(
@@ -305,9 +368,7 @@ class BookingsView(APIView):
             )
 
         try:
-            token = AccessToken(access_token)
-            user_id = token['user_id']
-            user = CustomUser.objects.get(id=user_id)
+            user = cookie_user(request)
             
             data = request.data.copy()
             
@@ -339,27 +400,30 @@ class BookingsView(APIView):
             )
 
         try:
-            token = AccessToken(access_token)
-            user_id = token['user_id']
-            user = CustomUser.objects.get(id=user_id)
+            user = cookie_user(request)
             booking = Booking.objects.get(id=booking_id, user=user)
 
             action = request.data.get('action')
             if action == 'mark_rated':
                 booking.rated = True
-                booking.save()
+                booking.save(update_fields=['rated'])
                 return Response(
                     {'detail': _('تم وضع علامة تم التقييم على الحجز.')},
                     status=status.HTTP_200_OK
                 )
             elif action == 'close_popup':
                 booking.closed_time = timezone.now()
-                booking.save()
+                booking.save(update_fields=['closed_time'])
                 return Response(
                     {'detail': _('تم إغلاق نافذة الحجز المنبثقة.')},
                     status=status.HTTP_200_OK
                 )
             elif action == 'cancel':
+                if booking.status == 'cancelled':
+                    return Response(
+                        {'detail': _('الحجز ملغى بالفعل.')},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
                 try:
                     time_str = booking.time.strip()
                     time_obj = None
@@ -409,7 +473,13 @@ class BookingsView(APIView):
                     context={'user': user}
                 )
                 if serializer.is_valid():
-                    serializer.save()
+                    try:
+                        serializer.save()
+                    except ValidationError as e:
+                        return Response(
+                            {'detail': _('فشل في إلغاء الحجز.'), 'errors': e.detail},
+                            status=status.HTTP_400_BAD_REQUEST
+                        )
                     Notification.objects.create(
                         user=user,
                         title=_('تم إلغاء الحجز'),
@@ -419,32 +489,7 @@ class BookingsView(APIView):
                         is_read=False
                     )
 
-                    current_bookings = Booking.objects.filter(
-                        teacher=booking.teacher,
-                        date=booking.date,
-                        time=booking.time,
-                        place=booking.place,
-                        status__in=['confirmed', 'modified']
-                    ).count()
-                    if current_bookings < booking.teacher.max_students_per_group:
-                        pending_booking = Booking.objects.filter(
-                            teacher=booking.teacher,
-                            date=booking.date,
-                            time=booking.time,
-                            place=booking.place,
-                            status='pending'
-                        ).order_by('created_at').first()
-                        if pending_booking:
-                            pending_booking.status = 'confirmed'
-                            pending_booking.save()
-                            Notification.objects.create(
-                                user=pending_booking.user,
-                                title=_('تم تأكيد حجزك'),
-                                message=_(
-                                    f'حجزك مع {pending_booking.teacher.name} لمادة {pending_booking.subject} في {pending_booking.date} الساعة {pending_booking.time} ({pending_booking.place}) تم تأكيده.'
-                                ),
-                                is_read=False
-                            )
+                    promote_waitlist(booking.teacher, [(booking.date, booking.time, booking.place)])
 
                     return Response(
                         {'detail': _('تم إلغاء الحجز بنجاح.')},
@@ -484,28 +529,35 @@ class CheckScheduleChangesView(APIView):
             new_schedule = request.data.get('new_schedule', {})
             new_slot = request.data.get('new_slot', {})
 
-            if not all(key in new_slot for key in ['date', 'time', 'place']):
+            if not isinstance(old_schedule, dict) or not isinstance(new_schedule, dict):
+                return Response(
+                    {'detail': 'old_schedule and new_schedule must be objects.'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            if not isinstance(new_slot, dict) or not all(key in new_slot for key in ['date', 'time', 'place']):
                 return Response(
                     {'detail': 'New slot must include date, time, and place.'},
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
+            # Undated, legacy or misdated entries name no bookable slot and are skipped.
+            new_places = {(slot_date, time): place for slot_date, time, place in iter_schedule(new_schedule)}
             affected_bookings = []
-            bookings = Booking.objects.filter(teacher=teacher, status__in=['confirmed', 'modified'])
-
-            for booking in bookings:
-                date_str = booking.date.strftime('%Y-%m-%d')
-                time = booking.time
-                old_slot_exists = date_str in old_schedule and time in old_schedule[date_str]
-                new_slot_changed = (
-                    date_str not in new_schedule or
-                    time not in new_schedule.get(date_str, {}) or
-                    new_schedule[date_str][time] != old_schedule.get(date_str, {}).get(time)
-                )
+            changed_slots = Q()
+            for slot_date, time, place in iter_schedule(old_schedule):
+                if new_places.get((slot_date, time)) != place:
+                    changed_slots |= Q(date=slot_date, time=time)
 
-                if old_slot_exists and new_slot_changed:
-                    booking.status = 'modified'
-                    booking.save()
+            bookings = Booking.objects.none()
+            if changed_slots:
+                bookings = Booking.objects.filter(
+                    changed_slots, teacher=teacher, status__in=['confirmed', 'modified']
+                ).select_related('user')
+
+            with transaction.atomic():
+                for booking in bookings:
+                    date_str = booking.date.strftime('%Y-%m-%d')
+                    booking.change_status('modified', teacher.max_students_per_group)
 
                     subject = 'Change in Your Booking Schedule'
                     message = (
@@ -516,13 +568,7 @@ class CheckScheduleChangesView(APIView):
                         f'Thank you,\nEduBridge Team'
                     )
                     recipient = booking.user.email
-                    send_mail(
-                        subject,
-                        message,
-                        settings.DEFAULT_FROM_EMAIL,
-                        [recipient],
-                        fail_silently=False,
-                    )
+                    queue_email(subject, message, [recipient])
 
                     affected_bookings.append({
                         'id': booking.id,
@@ -570,14 +616,13 @@ class NotifyStudentsView(APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            email_success_count = 0
-            email_failed_count = 0
+            email_queued_count = 0
 
             with transaction.atomic():
                 for booking in bookings:
+                    new_status = 'cancelled' if action == 'cancel' else 'modified'
                     if not booking.user.email:
-                        booking.status = 'cancelled' if action == 'cancel' else 'modified'
-                        booking.save()
+                        booking.change_status(new_status, teacher.max_students_per_group)
                         continue
 
                     subject = ''
@@ -593,7 +638,6 @@ class NotifyStudentsView(APIView):
                             f'Please check the bookings page to schedule a new session if needed.\n'
                             f'Thank you,\nEduBridge Team'
                         )
-                        booking.status = 'cancelled'
                     else:
                         new_slot = request.data.get('new_slot', {})
                         if not all(key in new_slot for key in ['date', 'time', 'place']):
@@ -612,23 +656,14 @@ class NotifyStudentsView(APIView):
                             f'Please check your email and confirm the new booking or reschedule from the bookings page.\n'
                             f'Thank you,\nEduBridge Team'
                         )
-                        booking.status = 'modified'
-
-                    try:
-                        send_mail(
-                            subject,
-                            full_message,
-                            settings.DEFAULT_FROM_EMAIL,
-                            [booking.user.email],
-                            fail_silently=False,
-                        )
-                        email_success_count += 1
-                    except Exception as e:
-                        email_failed_count += 1
 
-                    booking.save()
+                    # A pending booking cannot be moved into a full slot.
+                    if not booking.change_status(new_status, teacher.max_students_per_group):
+                        continue
+                    queue_email(subject, full_message, [booking.user.email])
+                    email_queued_count += 1
 
-            response_detail = f'Notifications processed: {email_success_count} emails sent successfully, {email_failed_count} failed.'
+            response_detail = f'Notifications processed: {email_queued_count} emails queued for delivery.'
             return Response({'detail': response_detail}, status=status.HTTP_200_OK)
         except Teacher.DoesNotExist:
             return Response(
@@ -642,6 +677,29 @@ class NotifyStudentsView(APIView):
             )
         
 
+class AvailableSlotsView(APIView):
+    def get(self, request):
+        date = request.query_params.get('date')
+        if not date:
+            return Response({'detail': 'date is required.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            date = datetime.strptime(date, '%Y-%m-%d').date()
+        except ValueError:
+            return Response({'detail': "date must be in 'YYYY-MM-DD' format."}, status=status.HTTP_400_BAD_REQUEST)
+
+        booked = SlotOccupancy.objects.filter(
+            teacher_id=OuterRef('teacher_id'), date=OuterRef('date'), time=OuterRef('time'), place=OuterRef('place')
+        ).values('confirmed_count')
+        slots = TeacherSlot.objects.filter(date=date, teacher__status='active').select_related('teacher').annotate(
+            booked=Coalesce(Subquery(booked), 0)
+        )
+        teacher_id = _int_param(request.query_params, 'teacher')
+        if teacher_id is not None:
+            slots = slots.filter(teacher_id=teacher_id)
+        serializer = TeacherSlotSerializer(slots.order_by('start_time', 'teacher_id'), many=True)
+        return Response(serializer.data)
+
+
 class GetBookingsBySlotView(APIView):
     def get(self, request, teacher_id):
         try:
@@ -656,7 +714,8 @@ class GetBookingsBySlotView(APIView):
                 place=place,
                 status__in=['confirmed', 'modified']
             )
-            serializer = BookingSerializer(bookings, many=True)
+            context = fieldset_context(request)
+            serializer = BookingSerializer(select_fields(bookings, BookingSerializer, context), many=True, context=context)
             return Response(serializer.data)
         except Teacher.DoesNotExist:
             return Response(
@@ -682,9 +741,7 @@ class RatingsView(APIView):
             )
 
         try:
-            token = AccessToken(access_token)
-            user_id = token['user_id']
-            user = CustomUser.objects.get(id=user_id)
+            user = cookie_user(request)
             data = request.data
 
             teacher_id = data.get('teacher')
@@ -722,11 +779,10 @@ class RatingsView(APIView):
             )
 
         try:
-            token = AccessToken(access_token)
-            user_id = token['user_id']
-            user = CustomUser.objects.get(id=user_id)
-            ratings = Rating.objects.filter(user=user)
-            serializer = RatingSerializer(ratings, many=True)
+            user = cookie_user(request)
+            context = fieldset_context(request)
+            ratings = select_fields(Rating.objects.filter(user=user), RatingSerializer, context)
+            serializer = RatingSerializer(ratings, many=True, context=context)
             return Response(serializer.data)
         except (TokenError, CustomUser.DoesNotExist):
             return Response(
@@ -746,9 +802,7 @@ class RatedTeacherView(APIView):
             )
 
         try:
-            token = AccessToken(access_token)
-            user_id = token['user_id']
-            user = CustomUser.objects.get(id=user_id)
+            user = cookie_user(request)
             rated_teachers = RatedTeacher.objects.filter(user=user)
             serializer = RatedTeacherSerializer(rated_teachers, many=True)
             return Response(serializer.data)
@@ -772,9 +826,7 @@ class RatedTeacherView(APIView):
             )
 
         try:
-            token = AccessToken(access_token)
-            user_id = token['user_id']
-            user = CustomUser.objects.get(id=user_id)
+            user = cookie_user(request)
             
             data = request.data.copy()
             
@@ -840,12 +892,10 @@ class ForgotPasswordView(APIView):
             f'{_("Click the link to reset your password")}: {reset_link}\n\n'
             f'{_("This link will expire in 15 minutes.")}'
         )
-        send_mail(
+        queue_email(
             subject=_('Reset Your Password'),
             message=email_message,
-            from_email='your-email@gmail.com',
             recipient_list=[email],
-            fail_silently=False,
         )
 
         return Response({'message': 'If the email exists, a reset link has been sent.'}, status=status.HTTP_200_OK)
@@ -869,7 +919,7 @@ class ResetPasswordView(APIView):
                 )
 
             user.set_password(new_password)
-            user.save()
+            user.save(update_fields=['password'])
             reset_token.delete()  
 
             return Response({'message': 'Password reset successfully.'}, status=status.HTTP_200_OK)
@@ -880,7 +930,7 @@ class ResetPasswordView(APIView):
       
 
 class ProfileView(APIView):
-    parser_classes = [MultiPartParser, FormParser, JSONParser]
+    parser_classes = [MultiPartParser, FormParser, FastJSONParser]
 
     def get(self, request):
         access_token = request.COOKIES.get('access_token')
@@ -891,10 +941,8 @@ class ProfileView(APIView):
             )
 
         try:
-            token = AccessToken(access_token)
-            user_id = token['user_id']
-            user = CustomUser.objects.get(id=user_id)
-            serializer = UserSerializer(user, context={'request': request})
+            user = cookie_user(request)
+            serializer = UserSerializer(user, context=fieldset_context(request, request=request))
             return Response(serializer.data)
         except (TokenError, CustomUser.DoesNotExist):
             return Response(
@@ -911,9 +959,7 @@ class ProfileView(APIView):
             )
 
         try:
-            token = AccessToken(access_token)
-            user_id = token['user_id']
-            user = CustomUser.objects.get(id=user_id)
+            user = cookie_user(request)
             
             
             data = {
@@ -940,12 +986,12 @@ class ProfileView(APIView):
                 {'detail': 'An unexpected error occurred.'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
-    parser_classes = [MultiPartParser, FormParser, JSONParser]
+    parser_classes = [MultiPartParser, FormParser, FastJSONParser]
 
     
 
 class SettingsView(APIView):
-    parser_classes = [MultiPartParser, FormParser, JSONParser]
+    parser_classes = [MultiPartParser, FormParser, FastJSONParser]
     def get(self, request):
         access_token = request.COOKIES.get('access_token')
         if not access_token:
@@ -955,9 +1001,7 @@ class SettingsView(APIView):
             )
 
         try:
-            token = AccessToken(access_token)
-            user_id = token['user_id']
-            user = CustomUser.objects.get(id=user_id)
+            user = cookie_user(request)
             serializer = UserSerializer(user, context={'request': request})
             return Response(serializer.data)
         except (TokenError, CustomUser.DoesNotExist):
@@ -975,9 +1019,7 @@ class SettingsView(APIView):
             )
 
         try:
-            token = AccessToken(access_token)
-            user_id = token['user_id']
-            user = CustomUser.objects.get(id=user_id)
+            user = cookie_user(request)
             
             
             data = {
@@ -1020,9 +1062,7 @@ class SettingsView(APIView):
             )
 
         try:
-            token = AccessToken(access_token)
-            user_id = token['user_id']
-            user = CustomUser.objects.get(id=user_id)
+            user = cookie_user(request)
             user.delete()
             return Response({'detail': 'Account deleted successfully.'}, status=status.HTTP_204_NO_CONTENT)
         except (TokenError, CustomUser.DoesNotExist):
@@ -1042,14 +1082,30 @@ class NotificationListView(generics.ListAPIView):
     serializer_class = NotificationSerializer
     authentication_classes = [CookieJWTAuthentication]
     
+    @conditional(ResourceVersion.notifications, ResourceVersion.BROADCASTS, private=True, no_cache=True)
     def get(self, request, *args, **kwargs):
         return super().get(request, *args, **kwargs)
     
     def get_queryset(self):
         if self.request.user.is_authenticated:
-            return Notification.objects.filter(user=self.request.user)
+            return notifications_for(self.request.user)
         return Notification.objects.none()
 
+    def get_serializer_context(self):
+        return fieldset_context(self.request, **super().get_serializer_context())
+
+    def list(self, request, *args, **kwargs):
+        if not KeysetPagination.requested(request):
+            return super().list(request, *args, **kwargs)
+
+        paginator = KeysetPagination(FEED_ORDERING)
+        page = []
+        if request.user.is_authenticated:
+            sources = [personal_feed(request.user), broadcast_feed(request.user)]
+            page = [feed_item(row) for row in paginator.paginate_querysets(sources, request)]
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
 
 
 @api_view(["GET"])
@@ -1061,9 +1117,7 @@ def unread_count(request):
         return Response({"unread_count": 0}, status=status.HTTP_401_UNAUTHORIZED)
     
     try:
-        unread_notifications = Notification.objects.filter(user=user, is_read=False)
-        unread_count = unread_notifications.count()
-        return Response({"unread_count": unread_count})
+        return Response({"unread_count": unread_count_for(user)})
     except Exception as e:
         return Response(
             {"error": "Failed to fetch unread notifications"},
@@ -1071,6 +1125,52 @@ def unread_count(request):
         )
 
 
+STREAM_HEARTBEAT = 25
+
+
+def _sse(event, data):
+    return f'event: {event}\ndata: {json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False)}\n\n'
+
+
+async def _notification_events(user):
+    with Subscription(user.pk) as subscription:
+        yield 'retry: 5000\n\n'
+        unread = None
+        position = await sync_to_async(feed_position)(user)
+        while True:
+            count = await sync_to_async(unread_count_for)(user)
+            if count != unread:
+                unread = count
+                yield _sse('unread_count', {'unread_count': count})
+            items, position = await sync_to_async(notifications_after)(user, position)
+            for item in items:
+                yield _sse('notification', NotificationSerializer(item).data)
+            while not await subscription.wait(STREAM_HEARTBEAT):
+                yield ': keep-alive\n\n'
+
+
+@require_GET
+async def notification_stream(request):
+    auth = await sync_to_async(CookieJWTAuthentication().authenticate)(request)
+    if auth is None:
+        return JsonResponse({"error": "Authentication required"}, status=status.HTTP_401_UNAUTHORIZED)
+    user = auth[0]
+
+    if not isinstance(request, ASGIRequest):
+        # A WSGI worker cannot hold the stream open, so send the current
+        # count and let EventSource reconnect after ``retry``.
+        count = await sync_to_async(unread_count_for)(user)
+        response = HttpResponse(
+            'retry: 30000\n\n' + _sse('unread_count', {'unread_count': count}),
+            content_type='text/event-stream',
+        )
+    else:
+        response = StreamingHttpResponse(_notification_events(user), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache, no-transform'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 class CreateNotificationView(APIView):
     authentication_classes = [CookieJWTAuthentication]
     
@@ -1088,22 +1188,16 @@ class CreateNotificationView(APIView):
                 return Response({"error": "title and message are required"}, status=status.HTTP_400_BAD_REQUEST)
             
             if send_to_all:
-                users = CustomUser.objects.all()
-                if not users.exists():
+                audience = CustomUser.objects.count()
+                if not audience:
                     return Response({"error": "No users found in the system"}, status=status.HTTP_400_BAD_REQUEST)
                 
-                notifications = []
-                for user in users:
-                    notification = Notification.objects.create(
-                        user=user,
-                        title=title,
-                        message=message,
-                        is_read=False
-                    )
-                    notifications.append(notification)
-                
-                serializer = NotificationSerializer(notifications, many=True)
-                return Response({"message": "Notifications sent to all users", "data": serializer.data}, status=status.HTTP_201_CREATED)
+                broadcast = send_to_all_users(title, message, created_by=request.user, audience=audience)
+                return Response({
+                    "message": "Notifications sent to all users",
+                    "broadcast_id": broadcast.id,
+                    "count": broadcast.recipient_count,
+                }, status=status.HTTP_201_CREATED)
             else:
                 if not user_id:
                     return Response({"error": "user_id is required when sending to a specific user"}, status=status.HTTP_400_BAD_REQUEST)
@@ -1140,9 +1234,24 @@ def mark_notifications_read(request):
     if not user or not user.is_authenticated:
         return Response({"error": "Authentication required"}, status=status.HTTP_401_UNAUTHORIZED)
     
+    ids = request.data.get('ids')
+    cursor = request.data.get('cursor')
+    if ids is not None and (not isinstance(ids, list) or not all(isinstance(i, int) for i in ids)):
+        return Response({"error": "ids must be a list of notification ids"}, status=status.HTTP_400_BAD_REQUEST)
+
     try:
-        Notification.objects.filter(user=user, is_read=False).update(is_read=True)
-        return Response({"message": "Notifications marked as read"}, status=status.HTTP_200_OK)
+        through = None
+        if ids is None and cursor:
+            paginator = KeysetPagination(FEED_ORDERING)
+            through = paginator.through(paginator.decode_cursor(cursor, Notification))
+        updated = mark_read(user, ids=ids, through=through)
+        return Response({
+            "message": "Notifications marked as read",
+            "updated": updated,
+            "unread_count": unread_count_for(user),
+        }, status=status.HTTP_200_OK)
+    except ValidationError:
+        return Response({"error": "Invalid cursor"}, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
         return Response(
             {"error": "Failed to mark notifications as read"},
@@ -1158,12 +1267,9 @@ class DeleteNotificationView(APIView):
             if not request.user.is_authenticated:
                 return Response({"error": "Authentication required"}, status=status.HTTP_401_UNAUTHORIZED)
 
-            try:
-                notification = Notification.objects.get(id=notification_id, user=request.user)
-            except Notification.DoesNotExist:
+            if not dismiss(request.user, notification_id):
                 return Response({"error": "Notification not found or you do not have permission to delete it"}, status=status.HTTP_404_NOT_FOUND)
 
-            notification.delete()
             return Response({"message": "Notification deleted successfully"}, status=status.HTTP_200_OK)
 
         except Exception as e:
@@ -1188,13 +1294,22 @@ class UserDeleteView(APIView):
 
 
 class AllUsersView(APIView):
+    page_size = 50
+    max_page_size = 200
+
     def get(self, request):
         is_admin, response = is_admin_user(request)
         if not is_admin:
             return response
-        users = CustomUser.objects.all()
-        serializer = UserSerializer(users, many=True)
-        return Response(serializer.data)
+        users = filter_users(CustomUser.objects.all(), request.query_params)
+        paginator = KeysetPagination(USER_ORDERING, self.page_size, self.max_page_size)
+        page = paginator.paginate_queryset(users.only(*AdminUserSerializer.Meta.fields), request)
+        serializer = AdminUserSerializer(page, many=True)
+        return Response({
+            'count': cached_count(users),
+            'next': paginator.get_next_cursor(),
+            'results': serializer.data,
+        })
 
     def delete(self, request, user_id):
         is_admin, response = is_admin_user(request)
@@ -1208,10 +1323,40 @@ class AllUsersView(APIView):
             return Response({"error": "User not found"}, status=status.HTTP_404_NOT_FOUND)
     
 class AllBookingsView(APIView):
+    page_size = 50
+    max_page_size = 200
+
     def get(self, request):
         is_admin, response = is_admin_user(request)
         if not is_admin:
             return response
-        bookings = Booking.objects.all().order_by('-created_at')
-        serializer = BookingSerializer(bookings, many=True)
-        return Response(serializer.data)
\ No newline at end of file
+        bookings = filter_bookings(Booking.objects.all(), request.query_params)
+        context = fieldset_context(request)
+        paginator = KeysetPagination(BOOKING_ORDERING, self.page_size, self.max_page_size)
+        page = paginator.paginate_queryset(
+            select_fields(bookings, BookingSerializer, context, BOOKING_ORDERING), request
+        )
+        serializer = BookingSerializer(page, many=True, context=context)
+        return Response({
+            'count': cached_count(bookings),
+            'next': paginator.get_next_cursor(),
+            'results': serializer.data,
+        })
+
+
+class AdminExportView(APIView):
+    def get(self, request, resource, export_format):
+        is_admin, response = is_admin_user(request)
+        if not is_admin:
+            return response
+        if resource not in EXPORTS or export_format not in FORMATS:
+            return Response({'detail': 'Unknown export.'}, status=status.HTTP_404_NOT_FOUND)
+
+        names, rows = export_rows(resource, request.query_params)
+        content = STREAMS[export_format](names, rows)
+        if isinstance(request._request, ASGIRequest):
+            content = aiter_sync(content)
+        response = StreamingHttpResponse(content, content_type=FORMATS[export_format])
+        filename = f'{resource}-{timezone.localdate().isoformat()}.{export_format}'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
@@ -35,17 +35,45 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'api.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.middleware.QueryInstrumentationMiddleware',
 ]
 
+# Responses at least this many bytes long are gzipped for clients that accept it.
+COMPRESSION_MIN_LENGTH = 1024
+
+# Threads that build the thumbnail and card images of uploaded pictures (api/utils/images.py).
+IMAGE_DERIVATIVE_WORKERS = 2
+
+# Per-request query counts, N+1 warnings and a slow-query log (api.sql logger).
+SQL_INSTRUMENTATION = False
+SQL_N_PLUS_ONE_THRESHOLD = 10
+SQL_SLOW_QUERY_MS = 100
+
+# last_activity is written at most once per user per LAST_ACTIVITY_WRITE_INTERVAL
+# seconds; pending writes are flushed in one batch every LAST_ACTIVITY_FLUSH_INTERVAL.
+LAST_ACTIVITY_WRITE_INTERVAL = 300
+LAST_ACTIVITY_FLUSH_INTERVAL = 30
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.CookieJWTAuthentication',
+    ),
+    # orjson when it is installed, the stdlib json module otherwise.
+    'DEFAULT_RENDERER_CLASSES': (
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'api.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ),
 }
 
@@ -75,6 +103,14 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Seconds a writer waits for SQLite's write lock before failing.
+            'timeout': 20,
+        },
+        'TEST': {
+            # A file (not shared-cache memory) so threaded tests get real locking.
+            'NAME': BASE_DIR / 'test_db.sqlite3',
+        },
     }
 }
 
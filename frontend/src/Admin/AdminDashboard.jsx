@@ -94,8 +94,8 @@ const AdminDashboard = ({ apiUrl = "/api/" }) => {
   };
 
   const getProfilePicture = () => {
-    if (user && user.profile_picture) {
-      return user.profile_picture;
+    if (user && user.profile_picture_thumbnail) {
+      return user.profile_picture_thumbnail;
     }
     return defultimage;
   };
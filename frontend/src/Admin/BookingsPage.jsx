@@ -1,55 +1,77 @@
-import React, { useState, useEffect, useContext } from "react";
+import React, { useState, useEffect, useContext, useCallback } from "react";
 import axios from "axios";
 import { useNavigate } from "react-router-dom";
 import { AuthContext } from "../context/AuthContext";
 import { useTranslation } from "react-i18next";
 
+// Only what the bookings table shows.
+export const ADMIN_BOOKING_FIELDS =
+  "id,date,time,status,user.first_name,teacher.name";
+
 const BookingsPage = ({ apiUrl }) => {
   const { t, i18n } = useTranslation();
   const { user, isAuthenticated, isAuthLoading } = useContext(AuthContext);
   const navigate = useNavigate();
   const [bookings, setBookings] = useState([]);
+  const [count, setCount] = useState(0);
+  const [nextCursor, setNextCursor] = useState(null);
   const [search, setSearch] = useState("");
+  const [query, setQuery] = useState("");
   const [filterStatus, setFilterStatus] = useState("all");
   const [error, setError] = useState(null);
   const [loading, setLoading] = useState(true);
 
+  const isAdmin = Boolean(user && (user.is_staff || user.is_superuser));
+
   useEffect(() => {
-    if (
-      !isAuthLoading &&
-      (!isAuthenticated || !user || (!user.is_staff && !user.is_superuser))
-    ) {
+    if (!isAuthLoading && (!isAuthenticated || !isAdmin)) {
       navigate("/login");
     } else {
       setLoading(false);
-      fetchBookings();
     }
-  }, [isAuthLoading, isAuthenticated, user, navigate, t]);
+  }, [isAuthLoading, isAuthenticated, isAdmin, navigate]);
 
-  const fetchBookings = async () => {
-    try {
-      const response = await axios.get(`${apiUrl}bookings/all/`, {
-        withCredentials: true,
-      });
-      setBookings(response.data);
-    } catch (error) {
-      setError(t("bookingPage.failed_to_fetch_bookings"));
-      console.error("Error fetching bookings:", error.response?.data);
-    }
-  };
+  // Filtering happens on the server, so wait for typing to pause.
+  useEffect(() => {
+    const timer = setTimeout(() => setQuery(search.trim()), 300);
+    return () => clearTimeout(timer);
+  }, [search]);
 
-  const filteredBookings = bookings.filter((booking) => {
-    const matchesSearch =
-      (booking.user?.first_name || "")
-        .toLowerCase()
-        .includes(search.toLowerCase()) ||
-      (booking.teacher?.name || "")
-        .toLowerCase()
-        .includes(search.toLowerCase());
-    const matchesStatus =
-      filterStatus === "all" || booking.status === filterStatus;
-    return matchesSearch && matchesStatus;
-  });
+  const fetchBookings = useCallback(
+    async (cursor = null) => {
+      try {
+        const params = { page_size: 50, fields: ADMIN_BOOKING_FIELDS };
+        if (filterStatus !== "all") params.status = filterStatus;
+        if (query) params.q = query;
+        if (cursor) params.cursor = cursor;
+        const response = await axios.get(`${apiUrl}bookings/all/`, {
+          params,
+          withCredentials: true,
+        });
+        setBookings((prev) =>
+          cursor ? [...prev, ...response.data.results] : response.data.results
+        );
+        setCount(response.data.count);
+        setNextCursor(response.data.next);
+      } catch (error) {
+        setError(t("bookingPage.failed_to_fetch_bookings"));
+        console.error("Error fetching bookings:", error.response?.data);
+      }
+    },
+    [apiUrl, filterStatus, query, t]
+  );
+
+  useEffect(() => {
+    if (isAdmin) fetchBookings();
+  }, [isAdmin, fetchBookings]);
+
+  const exportUrl = (format) => {
+    const params = new URLSearchParams();
+    if (filterStatus !== "all") params.set("status", filterStatus);
+    if (query) params.set("q", query);
+    const qs = params.toString();
+    return `${apiUrl}admin/export/bookings.${format}${qs ? `?${qs}` : ""}`;
+  };
 
   const handleSearchChange = (e) => {
     setSearch(e.target.value);
@@ -88,14 +110,19 @@ const BookingsPage = ({ apiUrl }) => {
               <option value="all">{t("bookingPage.all")}</option>
               <option value="pending">{t("bookingPage.pending")}</option>
               <option value="confirmed">{t("bookingPage.confirmed")}</option>
-              <option value="completed">{t("bookingPage.completed")}</option>
+              <option value="modified">{t("bookingPage.modified")}</option>
               <option value="cancelled">{t("bookingPage.cancelled")}</option>
             </select>
+            <a className="p-10 rad-6" href={exportUrl("csv")} download>
+              {t("bookingPage.export_csv")}
+            </a>
           </div>
         </div>
 
         <div className="bookings-list p-20 rad-10">
-          <h2 className="mt-0 mb-10 text-light">{t("bookingPage.bookings")}</h2>
+          <h2 className="mt-0 mb-10 text-light">
+            {t("bookingPage.bookings")} ({count})
+          </h2>
           <div className="table-responsive">
             <table className="w-full">
               <thead>
@@ -108,7 +135,7 @@ const BookingsPage = ({ apiUrl }) => {
                 </tr>
               </thead>
               <tbody>
-                {filteredBookings.map((booking) => (
+                {bookings.map((booking) => (
                   <tr key={booking.id}>
                     <td>{booking.user?.first_name || "N/A"}</td>
                     <td>{booking.teacher?.name || "N/A"}</td>
@@ -120,6 +147,14 @@ const BookingsPage = ({ apiUrl }) => {
               </tbody>
             </table>
           </div>
+          {nextCursor && (
+            <button
+              className="p-10 rad-6 mt-10"
+              onClick={() => fetchBookings(nextCursor)}
+            >
+              {t("bookingPage.load_more")}
+            </button>
+          )}
         </div>
       </div>
     </div>
@@ -3,6 +3,7 @@ import axios from "axios";
 import { Link, useNavigate } from "react-router-dom";
 import { useTranslation } from "react-i18next";
 import { AuthContext } from "../context/AuthContext";
+import { ADMIN_BOOKING_FIELDS } from "./BookingsPage";
 import "../pages/Notifications/Notifications.css";
 
 const DashboardPage = ({ apiUrl = "/api/" }) => {
@@ -31,22 +32,34 @@ const DashboardPage = ({ apiUrl = "/api/" }) => {
 
   const fetchStats = useCallback(async () => {
     try {
-      const [teachersRes, usersRes, bookingsRes, notificationsRes] =
+      const [teachersRes, usersRes, bookingsRes, pendingRes, notificationsRes] =
         await Promise.all([
-          axios.get(`${apiUrl}teachers/`, { withCredentials: true }),
-          axios.get(`${apiUrl}users/all/`, { withCredentials: true }),
-          axios.get(`${apiUrl}bookings/all/`, { withCredentials: true }),
+          axios.get(`${apiUrl}teachers/`, {
+            params: { status: "all", page_size: 1, fields: "id" },
+            withCredentials: true,
+          }),
+          axios.get(`${apiUrl}users/all/`, {
+            params: { page_size: 1 },
+            withCredentials: true,
+          }),
+          axios.get(`${apiUrl}bookings/all/`, {
+            params: { page_size: 5, fields: ADMIN_BOOKING_FIELDS },
+            withCredentials: true,
+          }),
+          axios.get(`${apiUrl}bookings/all/`, {
+            params: { status: "pending", page_size: 1, fields: "id" },
+            withCredentials: true,
+          }),
           axios.get(`${apiUrl}notifications/`, { withCredentials: true }),
         ]);
       setStats({
-        totalTeachers: teachersRes.data.length,
-        totalUsers: usersRes.data.length,
-        totalBookings: bookingsRes.data.length,
-        pendingBookings: bookingsRes.data.filter((b) => b.status === "pending")
-          .length,
+        totalTeachers: teachersRes.data.count,
+        totalUsers: usersRes.data.count,
+        totalBookings: bookingsRes.data.count,
+        pendingBookings: pendingRes.data.count,
         totalNotifications: notificationsRes.data.length,
       });
-      setRecentBookings(bookingsRes.data.slice(0, 5));
+      setRecentBookings(bookingsRes.data.results);
     } catch (error) {
       setError(t("dashboard.error_fetching"));
       console.error("Error fetching stats:", error);
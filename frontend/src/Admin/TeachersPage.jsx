@@ -1,37 +1,49 @@
-import React, { useState, useEffect } from "react";
+import React, { useState, useEffect, useCallback } from "react";
 import axios from "axios";
 import { useTranslation } from "react-i18next";
 
 const TeachersPage = ({ apiUrl }) => {
   const { t, i18n } = useTranslation();
   const [teachers, setTeachers] = useState([]);
+  const [count, setCount] = useState(0);
+  const [nextCursor, setNextCursor] = useState(null);
   const [search, setSearch] = useState("");
+  const [query, setQuery] = useState("");
   const [filterStatus, setFilterStatus] = useState("all");
   const [error, setError] = useState(null);
 
+  // Searching happens on the server, so wait for typing to pause.
   useEffect(() => {
-    const fetchTeachers = async () => {
+    const timer = setTimeout(() => setQuery(search.trim()), 300);
+    return () => clearTimeout(timer);
+  }, [search]);
+
+  const fetchTeachers = useCallback(
+    async (cursor = null) => {
       try {
+        const params = { status: filterStatus, sort: "name", page_size: 50 };
+        if (query) params.q = query;
+        if (cursor) params.cursor = cursor;
         const response = await axios.get(`${apiUrl}teachers/`, {
+          params,
           withCredentials: true,
         });
-        setTeachers(response.data);
+        setTeachers((prev) =>
+          cursor ? [...prev, ...response.data.results] : response.data.results
+        );
+        setCount(response.data.count);
+        setNextCursor(response.data.next);
       } catch (error) {
         setError(t("teacherAdmin.failed_to_fetch_teachers"));
         console.error("Error fetching teachers:", error);
       }
-    };
-    fetchTeachers();
-  }, [apiUrl, t]);
+    },
+    [apiUrl, filterStatus, query, t]
+  );
 
-  const filteredTeachers = teachers.filter((teacher) => {
-    const matchesSearch =
-      (teacher.name || "").toLowerCase().includes(search.toLowerCase()) ||
-      (teacher.subject || "").toLowerCase().includes(search.toLowerCase());
-    const matchesStatus =
-      filterStatus === "all" || (teacher.status || "active") === filterStatus;
-    return matchesSearch && matchesStatus;
-  });
+  useEffect(() => {
+    fetchTeachers();
+  }, [fetchTeachers]);
 
   const handleDelete = async (teacherId) => {
     if (window.confirm(t("teacherAdmin.confirm_delete"))) {
@@ -40,6 +52,7 @@ const TeachersPage = ({ apiUrl }) => {
           withCredentials: true,
         });
         setTeachers(teachers.filter((teacher) => teacher.id !== teacherId));
+        setCount((prev) => prev - 1);
         setError(null);
       } catch (error) {
         setError(t("teacherAdmin.failed_to_delete_teacher"));
@@ -117,7 +130,7 @@ const TeachersPage = ({ apiUrl }) => {
 
         <div className="teachers-list p-20 rad-10">
           <h2 className="mt-0 mb-10 text-light">
-            {t("teacherAdmin.teachers")}
+            {t("teacherAdmin.teachers")} ({count})
           </h2>
           <div className="table-responsive text-light">
             <table className="w-full">
@@ -131,7 +144,7 @@ const TeachersPage = ({ apiUrl }) => {
                 </tr>
               </thead>
               <tbody>
-                {filteredTeachers.map((teacher) => (
+                {teachers.map((teacher) => (
                   <tr key={teacher.id}>
                     <td>{teacher.name}</td>
                     <td>{t(`subjects.${teacher.subject}`)}</td>
@@ -165,6 +178,14 @@ const TeachersPage = ({ apiUrl }) => {
               </tbody>
             </table>
           </div>
+          {nextCursor && (
+            <button
+              className="p-10 rad-6 mt-10"
+              onClick={() => fetchTeachers(nextCursor)}
+            >
+              {t("teacherAdmin.load_more")}
+            </button>
+          )}
         </div>
       </div>
     </div>
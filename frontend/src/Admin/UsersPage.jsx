@@ -1,38 +1,50 @@
-import React, { useState, useEffect } from "react";
+import React, { useState, useEffect, useCallback } from "react";
 import axios from "axios";
 import { useTranslation } from "react-i18next";
 
 const UsersPage = ({ apiUrl }) => {
   const { t } = useTranslation();
   const [users, setUsers] = useState([]);
+  const [count, setCount] = useState(0);
+  const [nextCursor, setNextCursor] = useState(null);
   const [search, setSearch] = useState("");
+  const [query, setQuery] = useState("");
   const [filterRole, setFilterRole] = useState("all");
   const [error, setError] = useState(null);
 
+  // Searching happens on the server, so wait for typing to pause.
   useEffect(() => {
-    const fetchUsers = async () => {
+    const timer = setTimeout(() => setQuery(search.trim()), 300);
+    return () => clearTimeout(timer);
+  }, [search]);
+
+  const fetchUsers = useCallback(
+    async (cursor = null) => {
       try {
+        const params = { page_size: 50 };
+        if (filterRole !== "all") params.is_staff = filterRole === "admin";
+        if (query) params.q = query;
+        if (cursor) params.cursor = cursor;
         const response = await axios.get(`${apiUrl}users/all/`, {
+          params,
           withCredentials: true,
         });
-        setUsers(response.data);
+        setUsers((prev) =>
+          cursor ? [...prev, ...response.data.results] : response.data.results
+        );
+        setCount(response.data.count);
+        setNextCursor(response.data.next);
       } catch (error) {
         setError(t("userpage.error_fetch"));
         console.error("Error fetching users:", error);
       }
-    };
-    fetchUsers();
-  }, [apiUrl, t]);
+    },
+    [apiUrl, filterRole, query, t]
+  );
 
-  const filteredUsers = users.filter((user) => {
-    const matchesSearch =
-      (user.first_name || "").toLowerCase().includes(search.toLowerCase()) ||
-      (user.email || "").toLowerCase().includes(search.toLowerCase());
-    const matchesRole =
-      filterRole === "all" ||
-      (user.is_superuser ? "admin" : "user") === filterRole;
-    return matchesSearch && matchesRole;
-  });
+  useEffect(() => {
+    fetchUsers();
+  }, [fetchUsers]);
 
   const handleDelete = async (userId) => {
     if (window.confirm(t("userpage.confirm_delete"))) {
@@ -41,6 +53,7 @@ const UsersPage = ({ apiUrl }) => {
           withCredentials: true,
         });
         setUsers(users.filter((user) => user.id !== userId));
+        setCount((prev) => prev - 1);
         setError(null);
       } catch (error) {
         setError(t("userpage.error_delete"));
@@ -80,7 +93,9 @@ const UsersPage = ({ apiUrl }) => {
         </div>
 
         <div className="users-list p-20 rad-10">
-          <h2 className="mt-0 mb-10 text-light">{t("userpage.users_list")}</h2>
+          <h2 className="mt-0 mb-10 text-light">
+            {t("userpage.users_list")} ({count})
+          </h2>
           <div className="table-responsive">
             <table className="w-full">
               <thead>
@@ -92,12 +107,12 @@ const UsersPage = ({ apiUrl }) => {
                 </tr>
               </thead>
               <tbody>
-                {filteredUsers.map((user) => (
+                {users.map((user) => (
                   <tr key={user.id}>
                     <td>{user.first_name || t("userpage.default_name")}</td>
                     <td>{user.email}</td>
                     <td>
-                      {user.is_superuser
+                      {user.is_staff || user.is_superuser
                         ? t("userpage.role_admin")
                         : t("userpage.role_user")}
                     </td>
@@ -114,6 +129,14 @@ const UsersPage = ({ apiUrl }) => {
               </tbody>
             </table>
           </div>
+          {nextCursor && (
+            <button
+              className="p-10 rad-6 mt-10"
+              onClick={() => fetchUsers(nextCursor)}
+            >
+              {t("userpage.load_more")}
+            </button>
+          )}
         </div>
       </div>
     </div>
@@ -20,17 +20,17 @@ import AdminDashboard from "./Admin/AdminDashboard";
 
 const API_URL = "/api/";
 const TIMEZONE = "Africa/Cairo";
+// The rating popup only reads these booking fields.
+const BOOKING_FIELDS = "id,date,time,status,rated,closed_time,teacher.id,teacher.name";
 
 const App = () => {
   const { isAuthenticated, user } = useContext(AuthContext);
-  const [teachers, setTeachers] = useState([]);
   const [bookings, setBookings] = useState([]);
   const [ratings, setRatings] = useState([]);
   const [showRatingPopup, setShowRatingPopup] = useState(false);
   const [pendingRating, setPendingRating] = useState(null);
   const [ratedTeachers, setRatedTeachers] = useState(new Set());
   const [shownPopups, setShownPopups] = useState(new Set());
-  const [isLoading, setIsLoading] = useState(true);
 
   const refreshToken = async () => {
     try {
@@ -82,26 +82,6 @@ const App = () => {
     }
   }, [isAuthenticated]);
 
-  useEffect(() => {
-    const fetchTeachers = async () => {
-      try {
-        setIsLoading(true);
-        const response = await axios.get(`${API_URL}teachers/`, {
-          headers: {
-            "Cache-Control": "no-cache",
-          },
-        });
-        setTeachers(response.data);
-      } catch (error) {
-        console.error("Error fetching teachers:", error);
-      } finally {
-        setIsLoading(false);
-      }
-    };
-
-    fetchTeachers();
-  }, []);
-
   const updateTeacherRating = async (teacherId, rating) => {
     try {
       const ratingData = {
@@ -112,22 +92,6 @@ const App = () => {
         withCredentials: true,
       });
       setRatings((prevRatings) => [...prevRatings, response.data]);
-
-      const teacherResponse = await axios.get(
-        `${API_URL}teachers/${teacherId}/`,
-        {
-          headers: {
-            "Cache-Control": "no-cache",
-          },
-        }
-      );
-      const updatedTeacher = teacherResponse.data;
-      setTeachers((prevTeachers) =>
-        prevTeachers.map((teacher) =>
-          teacher.id === teacherId ? updatedTeacher : teacher
-        )
-      );
-
       return response.data;
     } catch (error) {
       console.error("Error updating teacher rating:", error);
@@ -202,6 +166,7 @@ const App = () => {
     const fetchData = async () => {
       try {
         const bookingsResponse = await axios.get(`${API_URL}bookings/`, {
+          params: { fields: BOOKING_FIELDS },
           withCredentials: true,
         });
 
@@ -344,6 +309,7 @@ const App = () => {
           )
         );
         const bookingsResponse = await axios.get(`${API_URL}bookings/`, {
+          params: { fields: BOOKING_FIELDS },
           withCredentials: true,
         });
         setBookings(bookingsResponse.data);
@@ -370,6 +336,7 @@ const App = () => {
         )
       );
       const bookingsResponse = await axios.get(`${API_URL}bookings/`, {
+        params: { fields: BOOKING_FIELDS },
         withCredentials: true,
       });
       setBookings(bookingsResponse.data);
@@ -389,36 +356,24 @@ const App = () => {
       <Routes>
         <Route
           path="/"
-          element={<Home teachers={teachers} isLoading={isLoading} />}
+          element={<Home />}
         />
         <Route
           path="/teachers"
           element={
-            <TeachersList
-              teachers={teachers}
-              user={user}
-              setTeachers={setTeachers}
-              apiUrl={API_URL}
-              isLoading={isLoading}
-            />
+            <TeachersList user={user} apiUrl={API_URL} />
           }
         />
         <Route
           path="/teacher/:id"
           element={
-            <TeacherDetails
-              teachers={teachers}
-              ratings={ratings}
-              apiUrl={API_URL}
-              isLoading={isLoading}
-            />
+            <TeacherDetails ratings={ratings} apiUrl={API_URL} />
           }
         />
         <Route
           path="/booking/:id"
           element={
             <Booking
-              teachers={teachers}
               bookings={bookings}
               setBookings={setBookings}
               updateTeacherRating={updateTeacherRating}
@@ -433,12 +388,7 @@ const App = () => {
         <Route
           path="/admin/*"
           element={
-            <AdminDashboard
-              teachers={teachers}
-              user={user}
-              setTeachers={setTeachers}
-              apiUrl={API_URL}
-            />
+            <AdminDashboard user={user} apiUrl={API_URL} />
           }
         />
         <Route path="/login" element={<Login />} />
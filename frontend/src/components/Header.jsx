@@ -1,9 +1,9 @@
-import React, { useContext, useEffect, useState, useCallback } from "react";
-import { Link, useNavigate, useLocation } from "react-router-dom";
+import React, { useContext, useEffect } from "react";
+import { Link, useNavigate } from "react-router-dom";
 import logo from "../assets/logo.png";
 import { AuthContext } from "../context/AuthContext";
+import { NotificationContext } from "../context/NotificationContext";
 import { useTranslation } from "react-i18next";
-import api from "../api/api";
 import "./Header.css";
 import { FaBell } from "react-icons/fa";
 
@@ -11,35 +11,14 @@ const Header = () => {
   const { isAuthenticated, user, logout, isAuthLoading } =
     useContext(AuthContext);
   const navigate = useNavigate();
-  const location = useLocation();
   const { t, i18n } = useTranslation();
-  const [unreadCount, setUnreadCount] = useState(0);
-
-  const fetchUnreadCount = useCallback(async () => {
-    try {
-      const response = await api.get("/notifications/unread-count/", {
-        withCredentials: true,
-      });
-      setUnreadCount(response.data.unread_count);
-    } catch (err) {
-      setUnreadCount(0);
-    }
-  }, []);
-
-  useEffect(() => {
-    if (!isAuthLoading && isAuthenticated && user) {
-      fetchUnreadCount();
-      const interval = setInterval(fetchUnreadCount, 30000);
-      return () => clearInterval(interval);
-    } else {
-      setUnreadCount(0);
-    }
-  }, [isAuthLoading, isAuthenticated, user, fetchUnreadCount]);
+  const { unreadCount, setUnreadCount, refreshUnreadCount } =
+    useContext(NotificationContext);
 
   useEffect(() => {
     const handleNotificationsMarked = () => {
       if (!isAuthLoading && isAuthenticated && user) {
-        setTimeout(fetchUnreadCount, 100);
+        setTimeout(refreshUnreadCount, 100);
       }
     };
     window.addEventListener(
@@ -52,21 +31,7 @@ const Header = () => {
         handleNotificationsMarked
       );
     };
-  }, [isAuthLoading, isAuthenticated, user, fetchUnreadCount]);
-
-  useEffect(() => {
-    if (!isAuthLoading && isAuthenticated && user) {
-      fetchUnreadCount();
-    } else {
-      setUnreadCount(0);
-    }
-  }, [
-    location.pathname,
-    isAuthLoading,
-    isAuthenticated,
-    user,
-    fetchUnreadCount,
-  ]);
+  }, [isAuthLoading, isAuthenticated, user, refreshUnreadCount]);
 
   useEffect(() => {
     const savedLanguage = localStorage.getItem("language");
@@ -1,4 +1,10 @@
-import React, { createContext, useContext, useState, useEffect } from "react";
+import React, {
+  createContext,
+  useCallback,
+  useContext,
+  useState,
+  useEffect,
+} from "react";
 import { AuthContext } from "./AuthContext";
 import api from "../api/api";
 
@@ -8,22 +14,45 @@ export const NotificationProvider = ({ children }) => {
   const { isAuthenticated } = useContext(AuthContext);
   const [unreadCount, setUnreadCount] = useState(0);
 
+  const refreshUnreadCount = useCallback(async () => {
+    try {
+      const response = await api.get("notifications/unread-count/");
+      setUnreadCount(response.data.unread_count);
+    } catch (err) {}
+  }, []);
+
   useEffect(() => {
-    if (isAuthenticated) {
-      const fetchUnreadCount = async () => {
-        try {
-          const response = await api.get("notifications/unread-count/");
-          setUnreadCount(response.data.unread_count);
-        } catch (err) {}
-      };
-      fetchUnreadCount();
-      const interval = setInterval(fetchUnreadCount, 60000);
+    if (!isAuthenticated) {
+      setUnreadCount(0);
+      return;
+    }
+
+    if (typeof EventSource === "undefined") {
+      refreshUnreadCount();
+      const interval = setInterval(refreshUnreadCount, 60000);
       return () => clearInterval(interval);
     }
-  }, [isAuthenticated]);
+
+    const source = new EventSource("/api/notifications/stream/", {
+      withCredentials: true,
+    });
+    source.addEventListener("unread_count", (event) => {
+      setUnreadCount(JSON.parse(event.data).unread_count);
+    });
+    source.addEventListener("notification", (event) => {
+      window.dispatchEvent(
+        new CustomEvent("notificationReceived", {
+          detail: JSON.parse(event.data),
+        })
+      );
+    });
+    return () => source.close();
+  }, [isAuthenticated, refreshUnreadCount]);
 
   return (
-    <NotificationContext.Provider value={{ unreadCount, setUnreadCount }}>
+    <NotificationContext.Provider
+      value={{ unreadCount, setUnreadCount, refreshUnreadCount }}
+    >
       {children}
     </NotificationContext.Provider>
   );
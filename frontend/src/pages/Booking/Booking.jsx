@@ -4,8 +4,10 @@ import "./Booking.css";
 import { useTranslation } from "react-i18next";
 import axios from "axios";
 
+// The booking page only shows and submits these teacher fields.
+const TEACHER_FIELDS = "id,name,subject,price_per_session";
+
 const Booking = ({
-  teachers,
   bookings,
   setBookings,
   updateTeacherRating,
@@ -14,13 +16,29 @@ const Booking = ({
   const { t } = useTranslation();
   const { id } = useParams();
   const location = useLocation();
-  const teacher = teachers.find((t) => t.id === parseInt(id));
   const { selectedDate, selectedTime, place } = location.state || {};
 
+  // undefined while loading, null if there is no such teacher.
+  const [teacher, setTeacher] = useState(undefined);
   const [paymentCompleted, setPaymentCompleted] = useState(false);
   const [isLoading, setIsLoading] = useState(false);
   const [error, setError] = useState("");
 
+  useEffect(() => {
+    const fetchTeacher = async () => {
+      try {
+        const response = await axios.get(`/api/teachers/${id}/`, {
+          params: { fields: TEACHER_FIELDS },
+          withCredentials: true,
+        });
+        setTeacher(response.data);
+      } catch (error) {
+        setTeacher(null);
+      }
+    };
+    fetchTeacher();
+  }, [id]);
+
   useEffect(() => {
     if (!teacher) return;
 
@@ -36,6 +54,10 @@ const Booking = ({
     }
   }, [bookings, teacher, selectedDate, selectedTime, place]);
 
+  if (teacher === undefined) {
+    return <p className="text-center mt-5">{t("bookings.loading")}</p>;
+  }
+
   if (!teacher) {
     return <p className="text-center mt-5">{t("booking.teacherNotFound")}</p>;
   }
@@ -23,6 +23,7 @@ const BookingsList = () => {
     try {
       setIsLoading(true);
       const response = await axios.get(`/api/bookings/`, {
+        params: { fields: "id,date,time,place,status,subject,teacher.name" },
         withCredentials: true,
       });
 
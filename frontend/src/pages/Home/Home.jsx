@@ -35,16 +35,10 @@ const Home = () => {
     const fetchFeaturedTeachers = async () => {
       try {
         const response = await axios.get(`${apiUrl}teachers/`, {
+          params: { sort: "rating", page_size: 3 },
           withCredentials: true,
         });
-        const topRatedTeachers = response.data
-          .filter((teacher) => teacher.is_top_rated)
-          .slice(0, 3);
-        const nonTopRatedTeachers = response.data
-          .filter((teacher) => !teacher.is_top_rated)
-          .slice(0, 3 - topRatedTeachers.length);
-        const selectedTeachers = [...topRatedTeachers, ...nonTopRatedTeachers];
-        setFeaturedTeachers(selectedTeachers);
+        setFeaturedTeachers(response.data.results);
       } catch (error) {
         setError(t("hero.failedToLoadTeachers"));
       }
@@ -64,7 +58,7 @@ const Home = () => {
     >
       <div className="teacher-image-wrapper">
         <img
-          src={teacher.image ? `${apiUrl}${teacher.image}` : defaultImage}
+          src={teacher.image_card ? `${apiUrl}${teacher.image_card}` : defaultImage}
           alt={teacher.name}
           className="teachers-card-image"
         />
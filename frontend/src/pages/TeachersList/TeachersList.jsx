@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from "react";
+import React, { useState, useEffect, useCallback } from "react";
 import Header from "../../components/Header";
 import Slider from "react-slick";
 import "slick-carousel/slick/slick.css";
@@ -25,13 +25,13 @@ const generateTimes = () => {
   return times;
 };
 
-const TeachersList = ({
-  teachers: initialTeachers,
-  user,
-  setTeachers,
-  apiUrl = "/api/",
-}) => {
+const PAGE_SIZE = 24;
+
+const TeachersList = ({ user, apiUrl = "/api/" }) => {
   const { t } = useTranslation();
+  const [teachers, setTeachers] = useState([]);
+  const [count, setCount] = useState(0);
+  const [nextCursor, setNextCursor] = useState(null);
   const [filters, setFilters] = useState({
     subject: "",
     governorate: "",
@@ -105,10 +105,36 @@ const TeachersList = ({
   const staticGrades = ["First", "Second", "Third"];
   const staticTimes = generateTimes();
 
+  // Filtering happens on the server, one page at a time.
+  const fetchTeachers = useCallback(
+    async (cursor = null) => {
+      try {
+        const params = { page_size: PAGE_SIZE };
+        Object.entries(filters).forEach(([key, value]) => {
+          if (value) params[key] = value;
+        });
+        if (cursor) params.cursor = cursor;
+        const response = await axios.get(`${apiUrl}teachers/`, {
+          params,
+          withCredentials: true,
+        });
+        setTeachers((prev) =>
+          cursor ? [...prev, ...response.data.results] : response.data.results
+        );
+        setCount(response.data.count);
+        setNextCursor(response.data.next);
+      } catch (error) {
+        setErrorMessage(t("teachersList.errors.fetchError"));
+      }
+    },
+    [apiUrl, filters, t]
+  );
+
+  useEffect(() => {
+    fetchTeachers();
+  }, [fetchTeachers]);
+
   useEffect(() => {
-    if (!initialTeachers || initialTeachers.length === 0) {
-      fetchTeachers();
-    }
     if (selectedTeacher?.id && selectedTeacher?.schedule) {
       const entries = [];
       Object.entries(selectedTeacher.schedule).forEach(([date, times]) => {
@@ -123,18 +149,7 @@ const TeachersList = ({
       });
       setScheduleEntries(entries);
     }
-  }, [initialTeachers, selectedTeacher]);
-
-  const fetchTeachers = async () => {
-    try {
-      const response = await axios.get(`${apiUrl}teachers/`, {
-        withCredentials: true,
-      });
-      setTeachers(response.data);
-    } catch (error) {
-      setErrorMessage(t("teachersList.errors.fetchError"));
-    }
-  };
+  }, [selectedTeacher]);
 
   const handleCancelLesson = async (entry) => {
     try {
@@ -180,64 +195,35 @@ const TeachersList = ({
     }
   };
 
-  const teachers = initialTeachers || [];
-  const governorates = [
-    ...new Set([
-      ...staticGovernorates,
-      ...(teachers.length ? teachers.map((t) => t.governorate) : []),
-    ]),
-  ];
-  const subjects = [
-    ...new Set([
-      ...staticSubjects,
-      ...(teachers.length ? teachers.map((t) => t.subject) : []),
-    ]),
-  ];
-  const grades = [
-    ...new Set([
-      ...staticGrades,
-      ...(teachers.length ? teachers.flatMap((t) => t.grade) : []),
-    ]),
-  ];
-
-  const filteredTeachers = teachers.filter(
-    (teacher) =>
-      (filters.subject === "" || teacher.subject.includes(filters.subject)) &&
-      (filters.governorate === "" ||
-        teacher.governorate.includes(filters.governorate)) &&
-      (filters.grade === "" || teacher.grade.includes(filters.grade)) &&
-      (teacher.status || "active") !== "suspended"
-  );
-
   const sliderSettings = {
     dots: false,
-    infinite: filteredTeachers.length > 3,
+    infinite: teachers.length > 3,
     speed: 500,
-    slidesToShow: Math.min(filteredTeachers.length, 3),
+    slidesToShow: Math.min(teachers.length, 3),
     slidesToScroll: 1,
     autoplaySpeed: 3000,
-    arrows: filteredTeachers.length > 3,
+    arrows: teachers.length > 3,
     centerMode: false,
     centerPadding: "0px",
     responsive: [
       {
         breakpoint: 1000,
         settings: {
-          slidesToShow: Math.min(filteredTeachers.length, 2),
+          slidesToShow: Math.min(teachers.length, 2),
           centerMode: false,
         },
       },
       {
         breakpoint: 768,
         settings: {
-          slidesToShow: Math.min(filteredTeachers.length, 1),
+          slidesToShow: Math.min(teachers.length, 1),
           centerMode: false,
         },
       },
       {
         breakpoint: 576,
         settings: {
-          slidesToShow: Math.min(filteredTeachers.length, 1),
+          slidesToShow: Math.min(teachers.length, 1),
           centerMode: true,
           centerPadding: "0px",
         },
@@ -382,13 +368,6 @@ const TeachersList = ({
         );
         updatedTeacherData = response.data;
       } else {
-        const teacherExists = teachers.some(
-          (teacher) => teacher.name === updatedTeacher.name
-        );
-        if (teacherExists) {
-          setErrorMessage(t("teachersList.errors.teacherExists"));
-          return;
-        }
         const response = await axios.post(`${apiUrl}teachers/`, formData, {
           withCredentials: true,
           headers: { "Content-Type": "multipart/form-data" },
@@ -397,15 +376,16 @@ const TeachersList = ({
         updatedTeacherData = response.data;
       }
 
-      setTeachers((prevTeachers) => {
-        if (updatedTeacher.id) {
-          return prevTeachers.map((teacher) =>
+      if (updatedTeacher.id) {
+        setTeachers((prevTeachers) =>
+          prevTeachers.map((teacher) =>
             teacher.id === updatedTeacher.id ? updatedTeacherData : teacher
-          );
-        } else {
-          return [...prevTeachers, updatedTeacherData];
-        }
-      });
+          )
+        );
+      } else {
+        // A new teacher may sort onto any page, so start over.
+        fetchTeachers();
+      }
 
       setErrorMessage(
         t("teachersList.saveSuccessWithNotifications", {
@@ -415,7 +395,10 @@ const TeachersList = ({
       closeModal();
     } catch (error) {
       setErrorMessage(
-        error.response?.data?.detail || t("teachersList.errors.saveError")
+        error.response?.status === 400 &&
+          error.response?.data?.detail === "Teacher already exists."
+          ? t("teachersList.errors.teacherExists")
+          : error.response?.data?.detail || t("teachersList.errors.saveError")
       );
     }
   };
@@ -426,8 +409,10 @@ const TeachersList = ({
         await axios.delete(`${apiUrl}teachers/${teacherId}/`, {
           withCredentials: true,
         });
-        const teacherResponse = await axios.get(`${apiUrl}teachers/`);
-        setTeachers(teacherResponse.data);
+        setTeachers((prevTeachers) =>
+          prevTeachers.filter((teacher) => teacher.id !== teacherId)
+        );
+        setCount((prev) => prev - 1);
       } catch (error) {
         setErrorMessage(t("teachersList.errors.deleteError"));
       }
@@ -445,7 +430,7 @@ const TeachersList = ({
         >
           <div className="teacher-image-wrapper">
             <img
-              src={teacher.image ? `${apiUrl}${teacher.image}` : defaultImage}
+              src={teacher.image_card ? `${apiUrl}${teacher.image_card}` : defaultImage}
               alt={t("teachersList.teacherImageAlt", { name: teacher.name })}
               className="teachers-card-image"
             />
@@ -571,7 +556,7 @@ const TeachersList = ({
                   <option value="">
                     {t("teachersList.selectSubjectOption")}
                   </option>
-                  {subjects.map((subject, index) => (
+                  {staticSubjects.map((subject, index) => (
                     <option key={index} value={subject}>
                       {t(`subjects.${subject}`)}
                     </option>
@@ -590,7 +575,7 @@ const TeachersList = ({
                   <option value="">
                     {t("teachersList.selectGovernorateOption")}
                   </option>
-                  {governorates.map((gov, index) => (
+                  {staticGovernorates.map((gov, index) => (
                     <option key={index} value={gov}>
                       {t(`governorates.${gov}`)}
                     </option>
@@ -609,7 +594,7 @@ const TeachersList = ({
                   <option value="">
                     {t("teachersList.selectGradeOption")}
                   </option>
-                  {grades.map((grade, index) => (
+                  {staticGrades.map((grade, index) => (
                     <option key={index} value={grade}>
                       {t(`grades.${grade}`)}
                     </option>
@@ -618,17 +603,30 @@ const TeachersList = ({
               </div>
             </div>
           </form>
-          {filteredTeachers.length > 0 ? (
+          {teachers.length > 0 ? (
             <Slider
               {...sliderSettings}
               className="teachers-slider"
               aria-label={t("teachersList.sliderLabel")}
             >
-              {filteredTeachers.map((teacher) => renderTeacherCard(teacher))}
+              {teachers.map((teacher) => renderTeacherCard(teacher))}
             </Slider>
           ) : (
             <p className="text-center">{t("teachersList.noTeachersFound")}</p>
           )}
+          {nextCursor && (
+            <div className="text-center mt-3">
+              <button
+                className="teachers-btn-primary"
+                onClick={() => fetchTeachers(nextCursor)}
+              >
+                {t("teachersList.loadMore", {
+                  shown: teachers.length,
+                  count,
+                })}
+              </button>
+            </div>
+          )}
         </div>
       </main>
 
@@ -710,7 +708,7 @@ const TeachersList = ({
                   <option value="">
                     {t("teachersList.form.selectSubject")}
                   </option>
-                  {subjects.map((subject, index) => (
+                  {staticSubjects.map((subject, index) => (
                     <option key={index} value={subject}>
                       {t(`subjects.${subject}`)}
                     </option>
@@ -738,7 +736,7 @@ const TeachersList = ({
                   <option value="">
                     {t("teachersList.form.selectGovernorate")}
                   </option>
-                  {governorates.map((gov, index) => (
+                  {staticGovernorates.map((gov, index) => (
                     <option key={index} value={gov}>
                       {t(`governorates.${gov}`)}
                     </option>